@@ -3,26 +3,55 @@ F1 Data Analysis Web Application - Main Backend
 Real-time Formula 1 data using FastF1 library
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, url_for
 from flask_cors import CORS
-import fastf1
-import fastf1.core
-import pandas as pd
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import logging
 import os
+import threading
 
-# Create cache directory if it doesn't exist
-cache_dir = 'cache'
-if not os.path.exists(cache_dir):
-    os.makedirs(cache_dir)
-    print(f"Created cache directory: {cache_dir}")
+from assets import StaticFiles
+from circuits import CircuitStore, build_layout, circuit_id, circuit_payload
+from columnar import encode_frame, encode_rows, msgpack_response, wants_msgpack
+from comparison import FASTEST, align as align_laps, parse_laps
+from disk_cache import (
+    DiskCache, enable as enable_disk_cache, offline_from_env, options_from_env as disk_cache_options_from_env,
+)
+from downsampling import downsample, options_from_args as downsampling_options
+from http_cache import HttpCache, IMMUTABLE
+from live import EVENTS as LIVE_EVENTS, LiveHub, options_from_env as live_options_from_env
+import metrics
+from pagination import (
+    FrameLapKeys, after_cursor, frame_ndjson_lines, lap_cursor, lap_key, ndjson_lines, order_rows, page_options,
+    project, sort_lap_frame,
+)
+from payloads import (
+    PayloadUnavailable, LAP_COLUMNS, TELEMETRY_COLUMNS,
+    build_results, build_laps, build_race_control, build_drivers, session_laps,
+)
+from precomputed import PrecomputedStore
+from prefetch import options_from_env as prefetch_options_from_env, read_status, start_in_process
+from preload import memory_usage
+from roster import AssetIndex, RosterIndex, RosterPending
+from schedule_cache import ScheduleCache
+from season import SeasonAggregator, SeasonPending
+from serializers import cached_json_response, dumps, serialize_frame, json_response
+from session_cache import SessionCache, SessionLoading, has_data
+from telemetry_store import LapNotFound, TelemetryStore
+from upstream import (
+    NegativeCache, NotAvailableYet, UpstreamGuard, UpstreamUnavailable, negative_ttl,
+    options_from_env as upstream_options_from_env,
+)
 
-# Enable FastF1 cache for better performance
-fastf1.Cache.enable_cache(cache_dir)
+# FastF1's on-disk cache: FASTF1_CACHE_DIR, kept under FASTF1_CACHE_MAX_MB by evicting
+# least recently used sessions. FASTF1_OFFLINE=true serves from the cache only.
+disk_cache = DiskCache(**disk_cache_options_from_env())
+enable_disk_cache(disk_cache.root, offline=offline_from_env())
 
-# Configure Flask to serve the React frontend build directory
+# Configure Flask to serve the React frontend build directory; fingerprinted files are
+# cached for good and precompressed files are sent as they are (see assets.py)
 app = Flask(__name__, static_folder='frontend/build', static_url_path='/')
+static_files = StaticFiles(app)
 
 # Configure CORS for production - Allow all origins with credentials
 CORS(app, 
@@ -35,6 +64,321 @@ CORS(app,
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Latency histograms and per-stage timings for /api/metrics (optionally a Server-Timing header)
+metrics.init_app(app, server_timing=metrics.server_timing_from_env())
+
+
+
+def served_from_disk(session):
+    """Whether FastF1 loads a session from its disk cache alone (final and already downloaded)"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    try:
+        return session.date + SESSION_FINAL_AFTER <= now and os.path.isdir(disk_cache.session_dir(session))
+    except (AttributeError, TypeError):
+        return False
+
+
+# Loads that go to the network share one rate limit and circuit breaker per host
+# (UPSTREAM_* settings); in offline mode nothing goes upstream
+upstream_guard = None
+if not offline_from_env():
+    upstream_guard = UpstreamGuard(disk_cache.root, is_local=served_from_disk, **upstream_options_from_env())
+
+# "Not available yet" answers, remembered per worker for a schedule-aware TTL
+negative_cache = NegativeCache()
+NEGATIVE_CACHE_MIN_TTL = int(os.environ.get('NEGATIVE_CACHE_MIN_TTL', 30))
+NEGATIVE_CACHE_MAX_TTL = int(os.environ.get('NEGATIVE_CACHE_MAX_TTL', 3600))
+
+# Keep recently used sessions loaded in memory (budget is per gunicorn worker)
+session_cache = SessionCache(
+    max_entries=int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', 8)),
+    max_bytes=int(os.environ.get('SESSION_CACHE_MAX_MB', 1024)) * 1024 * 1024,
+    load_workers=int(os.environ.get('SESSION_LOAD_WORKERS', 4)),
+    upstream=upstream_guard,
+)
+
+# In async mode a request waits up to SESSION_LOAD_WAIT_SECONDS for a cold session, then
+# gets 202 Accepted and a progress URL while the load carries on in the pool. Only a few
+# request threads may wait at once so cheap endpoints always have threads left; the
+# rest get their 202 straight away. Sync mode always waits for the load.
+SERVING_MODE = os.environ.get('SERVING_MODE', 'async').lower()
+SESSION_LOAD_WAIT = float(os.environ.get('SESSION_LOAD_WAIT_SECONDS', 5))
+load_waiters = threading.BoundedSemaphore(int(os.environ.get('SESSION_LOAD_MAX_WAITERS', 2)))
+
+
+def load_session(year, round_number, session_type, data):
+    """Get a session from the cache, loading it on the load pool (may raise SessionLoading)"""
+    with metrics.stage('load'):
+        if SERVING_MODE != 'async':
+            session = session_cache.fetch(year, round_number, session_type, data=data)
+        elif not load_waiters.acquire(blocking=False):
+            session = session_cache.fetch(year, round_number, session_type, data=data, timeout=0)
+        else:
+            try:
+                session = session_cache.fetch(year, round_number, session_type, data=data,
+                                              timeout=SESSION_LOAD_WAIT)
+            finally:
+                load_waiters.release()
+    # Recently served races stay pinned in the on-disk cache
+    disk_cache.touch(session)
+    return session
+
+
+def loading_response(e):
+    """202 Accepted for a session that is still loading, pointing at its progress"""
+    year, round_number, session_type = e.key
+    progress_url = url_for('get_load_progress', year=year, round_number=round_number,
+                           session_type=session_type)
+    response = jsonify({
+        'status': e.status,
+        'message': 'Session data is loading, try again shortly.',
+        'progress_url': progress_url,
+        'retry_after': 2,
+    })
+    response.status_code = 202
+    response.headers['Location'] = progress_url
+    response.headers['Retry-After'] = '2'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def unavailable_response(e):
+    """404 for a payload the session doesn't have (yet), with when to look again if known"""
+    response = jsonify({'error': str(e)})
+    response.status_code = 404
+    if isinstance(e, NotAvailableYet):
+        response.headers['Retry-After'] = str(e.retry_after)
+        response.headers['Cache-Control'] = f'public, max-age={e.retry_after}'
+    return response
+
+
+def upstream_response(e):
+    """503 for a load the upstream rate limit or open circuit refused"""
+    response = jsonify({'error': str(e), 'reason': e.reason, 'retry_after': e.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def build_payload(name, build, year, round_number, session_type, data):
+    """
+    Build a payload from the loaded session, answering from the negative cache when it
+    was recently found missing
+    A missing payload is remembered. A session without results is also dropped from
+    memory, so the next load after the TTL sees whatever has been published since; one
+    that only lacks an optional payload (race control, weather) stays cached for the
+    other endpoints and the negative cache alone answers for that payload.
+    """
+    key = (name, *session_cache.make_key(year, round_number, session_type))
+    negative_cache.check(key)
+    session = load_session(year, round_number, session_type, data=data)
+    try:
+        return build(session)
+    except PayloadUnavailable as e:
+        try:
+            start = schedule_cache.get(year).session_start(round_number, session_type)
+        except Exception:
+            start = None
+        ttl = negative_ttl(start, datetime.now(timezone.utc).replace(tzinfo=None),
+                           NEGATIVE_CACHE_MIN_TTL, NEGATIVE_CACHE_MAX_TTL)
+        negative_cache.add(key, str(e), ttl)
+        if not has_data(session, 'results'):
+            session_cache.discard(year, round_number, session_type)
+        raise NotAvailableYet(str(e), ttl) from e
+
+
+def require_laps(session):
+    """The session itself, if it has lap timing to slice telemetry with"""
+    if len(session.laps) == 0:
+        raise PayloadUnavailable('Telemetry data is not available for this session yet.')
+    return session
+
+# Season schedules; the running season is refetched after SCHEDULE_CACHE_TTL seconds
+schedule_cache = ScheduleCache(current_ttl=int(os.environ.get('SCHEDULE_CACHE_TTL', 3600)))
+
+# Payloads of finished sessions written ahead of time by ingest.py
+precomputed = PrecomputedStore(os.environ.get('PRECOMPUTED_DIR', 'precomputed'))
+telemetry_store = TelemetryStore(os.environ.get('PRECOMPUTED_DIR', 'precomputed'))
+circuit_store = CircuitStore(os.environ.get('PRECOMPUTED_DIR', 'precomputed'))
+
+# Sessions are final (results, penalties) once this long past their scheduled start
+SESSION_FINAL_AFTER = timedelta(hours=24)
+
+
+def session_is_final(year, round_number=None, session_type='R'):
+    """Whether a session's data can no longer change (whole seasons without a round)"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if year < now.year:
+        return True
+    if round_number is None:
+        return False
+    try:
+        start = schedule_cache.get(year).session_start(round_number, session_type)
+    except Exception:
+        return False
+    return start is not None and start + SESSION_FINAL_AFTER <= now
+
+
+def session_is_upcoming(year, round_number, session_type):
+    """Whether the schedule has a session starting later than now"""
+    try:
+        start = schedule_cache.get(year).session_start(round_number, session_type)
+    except Exception:
+        return False
+    return start is not None and start > datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def cache_policy(request):
+    """Cache-Control for successful /api responses, by route"""
+    if request.endpoint in ('health_check', 'get_metrics', 'get_cache_stats', 'get_disk_cache_usage',
+                            'get_prefetch_status', 'get_load_progress', 'get_season_status',
+                            'get_live_state'):
+        return 'no-store'
+    view_args = request.view_args or {}
+    if 'year' not in view_args:
+        return 'public, max-age=300'
+    if session_is_final(view_args['year'], view_args.get('round_number'), view_args.get('session_type', 'R')):
+        return IMMUTABLE
+    # Live or recent sessions: short enough to pick up new laps and corrections
+    return 'public, max-age=30'
+
+
+# ETags, conditional requests, Cache-Control and compression for every /api response
+http_cache = HttpCache(app, policy=cache_policy,
+                       max_bytes=int(os.environ.get('HTTP_CACHE_MAX_MB', 64)) * 1024 * 1024)
+
+# Sessions loaded by the season builders (statistics and rosters). A build goes through
+# every race of a season, so it gets a cache of its own that holds one session at a
+# time and leaves the request path's sessions in session_cache alone
+build_session_cache = SessionCache(max_entries=1, load_workers=1, upstream=upstream_guard)
+
+# Season standings, pace and tyre stats, folded from per-round summaries in the store
+season_aggregator = SeasonAggregator(precomputed, build_session_cache, schedule_cache,
+                                     workers=int(os.environ.get('SEASON_LOAD_WORKERS', 4)))
+
+# Season rosters (drivers, teams, substitutions, image keys), folded from each race's
+# driver list; ASSET_DIR holds the drivers/, cars/ and 2026_* image directories
+roster_index = RosterIndex(precomputed, build_session_cache, schedule_cache,
+                           AssetIndex(os.environ.get('ASSET_DIR', os.path.dirname(os.path.abspath(__file__)))),
+                           workers=int(os.environ.get('ROSTER_LOAD_WORKERS', 4)))
+
+# Season payloads by URL name
+SEASON_STATS = {
+    'standings': 'standings',
+    'points-progression': 'points_progression',
+    'pace': 'pace',
+    'tyres': 'tyres',
+}
+
+
+
+def collect_cache_metrics():
+    """Session and HTTP cache counters for /api/metrics"""
+    sessions = session_cache.stats()
+    http = http_cache.stats()
+    return [
+        ('f1api_session_cache_lookups_total', 'counter', 'In-memory session cache lookups by result',
+         [({'result': name}, sessions[name]) for name in ('hits', 'misses', 'upgrades')]),
+        ('f1api_session_cache_hit_ratio', 'gauge', 'Share of session lookups served from memory',
+         [({}, sessions['hit_ratio'])]),
+        ('f1api_session_cache_bytes', 'gauge', 'Estimated memory held by cached sessions', [({}, sessions['bytes'])]),
+        ('f1api_session_cache_entries', 'gauge', 'Sessions held in memory', [({}, sessions['entries'])]),
+        ('f1api_session_cache_evictions_total', 'counter', 'Sessions evicted from memory',
+         [({}, sessions['evictions'])]),
+        ('f1api_session_loads_in_flight', 'gauge', 'Session loads running or queued',
+         [({'state': 'loading'}, sessions['loading']), ({'state': 'queued'}, sessions['queued'])]),
+        ('f1api_http_cache_lookups_total', 'counter', 'Compressed response cache lookups by result',
+         [({'result': 'hits'}, http['hits']), ({'result': 'misses'}, http['misses'])]),
+        ('f1api_http_cache_hit_ratio', 'gauge', 'Share of compressed bodies served from memory',
+         [({}, http['hit_ratio'])]),
+        ('f1api_http_not_modified_total', 'counter', 'Requests answered 304 Not Modified',
+         [({}, http['not_modified'])]),
+    ]
+
+
+metrics.add_collector(collect_cache_metrics)
+
+
+def collect_upstream_metrics():
+    """Negative cache and upstream guard counters for /api/metrics"""
+    negative = negative_cache.stats()
+    collected = [
+        ('f1api_negative_cache_hits_total', 'counter', 'Requests answered from the "not available yet" cache',
+         [({}, negative['hits'])]),
+        ('f1api_negative_cache_entries', 'gauge', 'Payloads remembered as not available yet',
+         [({}, negative['entries'])]),
+    ]
+    if upstream_guard is not None:
+        upstream = upstream_guard.stats()
+        collected += [
+            ('f1api_upstream_fetches_total', 'counter', 'Session loads let through to the data sources',
+             [({}, upstream['fetches'])]),
+            ('f1api_upstream_failures_total', 'counter', 'Session loads that failed upstream',
+             [({}, upstream['failures'])]),
+            ('f1api_upstream_suppressed_total', 'counter', 'Session loads refused before reaching upstream',
+             [({'reason': reason}, count) for reason, count in upstream['suppressed'].items()]),
+            ('f1api_upstream_circuit_open', 'gauge', 'Whether the upstream circuit breaker is open (host-wide)',
+             [({}, int(upstream['circuit'] != 'closed'))]),
+            ('f1api_upstream_tokens', 'gauge', 'Upstream loads the host-wide rate limit allows right now',
+             [({}, upstream['tokens'])]),
+        ]
+    return collected
+
+
+metrics.add_collector(collect_upstream_metrics)
+
+# Warm sessions right after they finish (at most one scheduler per host)
+prefetcher = None
+
+# Live timing pushed over SSE; one feed reader per worker, off unless LIVE_FEED is set.
+# Each open stream holds a request thread: LIVE_MAX_STREAMS per worker keeps threads free
+# for the rest of the API, and streams are closed (and resumed by the client) after
+# LIVE_STREAM_MAX_SECONDS so a slot frees up regularly.
+live_hub = None
+live_options = live_options_from_env()
+if live_options:
+    live_hub = LiveHub(buffer_events=int(os.environ.get('LIVE_BUFFER_EVENTS', 1000)),
+                       heartbeat=int(os.environ.get('LIVE_HEARTBEAT_SECONDS', 15)),
+                       max_streams=int(os.environ.get('LIVE_MAX_STREAMS', 4)),
+                       max_stream_seconds=int(os.environ.get('LIVE_STREAM_MAX_SECONDS', 300)))
+
+    def collect_live_metrics():
+        """Live feed counters for /api/metrics"""
+        stats = live_hub.stats()
+        return [
+            ('f1api_live_subscribers', 'gauge', 'Open live event streams', [({}, stats['subscribers'])]),
+            ('f1api_live_feed_messages_total', 'counter', 'Live timing messages read',
+             [({}, stats['messages'])]),
+            ('f1api_live_events_total', 'counter', 'Live events published', [({}, stats['events_published'])]),
+            ('f1api_live_streams_rejected_total', 'counter', 'Live streams refused at LIVE_MAX_STREAMS',
+             [({}, stats['rejected'])]),
+        ]
+
+    metrics.add_collector(collect_live_metrics)
+
+
+def start_background():
+    """
+    Start this process's background threads: disk cache eviction, prefetch, live feed
+    Threads don't survive fork, so when gunicorn preloads the app in the master
+    (GUNICORN_PRELOAD, set by gunicorn.conf.py) each worker calls this from post_fork;
+    otherwise it runs on import.
+    """
+    global prefetcher
+    if disk_cache.max_bytes:
+        disk_cache.start(interval=int(os.environ.get('FASTF1_CACHE_EVICT_INTERVAL', 600)))
+    if os.environ.get('PREFETCH_ENABLED', 'False').lower() == 'true':
+        prefetcher = start_in_process(precomputed.root, session_cache,
+                                      final_after_hours=SESSION_FINAL_AFTER.total_seconds() / 3600,
+                                      **prefetch_options_from_env())
+    if live_hub is not None:
+        live_hub.start(**live_options)
+
+
+if os.environ.get('GUNICORN_PRELOAD', 'False').lower() != 'true':
+    start_background()
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -42,6 +386,70 @@ def health_check():
     return jsonify({'status': 'healthy', 'message': 'F1 Data API is running'})
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Get this worker's metrics in the Prometheus text format
+    Returns: request latency and stage histograms, session load times, cache hit ratios
+    """
+    return metrics.metrics_response()
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Get in-memory session cache statistics for this worker
+    Returns: hit/miss/eviction counters, memory usage, cached sessions, negative cache,
+             upstream guard and roster counters, and the worker's RSS/PSS/USS
+    """
+    stats = session_cache.stats()
+    stats['http'] = http_cache.stats()
+    stats['negative'] = negative_cache.stats()
+    stats['upstream'] = upstream_guard.stats() if upstream_guard is not None else None
+    stats['roster'] = roster_index.stats()
+    stats['pid'] = os.getpid()
+    stats['process_memory'] = memory_usage()
+    return jsonify(stats)
+
+
+@app.route('/api/cache/disk', methods=['GET'])
+def get_disk_cache_usage():
+    """
+    Get disk usage of the FastF1 cache directory (shared by all workers)
+    Returns: total bytes, budget, evictions and per-session sizes, last use and pinning
+    """
+    usage = disk_cache.usage()
+    usage['offline'] = offline_from_env()
+    return json_response(usage)
+
+
+@app.route('/api/prefetch/status', methods=['GET'])
+def get_prefetch_status():
+    """
+    Get the background prefetch scheduler status
+    Returns: sessions being watched, their load attempts and which are warm
+    """
+    status = prefetcher.status() if prefetcher else read_status(precomputed.root)
+    if status is None:
+        return jsonify({'running': False, 'warm': [], 'sessions': []})
+    return json_response(status)
+
+
+@app.route('/api/loads/<int:year>/<int:round_number>/<session_type>', methods=['GET'])
+def get_load_progress(year, round_number, session_type):
+    """
+    Get the load progress of a session in this worker
+    Returns: status (queued, loading, ready, failed, not_loaded), loaded data, elapsed time
+    """
+    progress = session_cache.progress(year, round_number, session_type)
+    return jsonify({
+        'year': year,
+        'round': round_number,
+        'session_type': session_type,
+        **progress
+    })
+
+
 @app.route('/api/schedule/<int:year>', methods=['GET'])
 def get_schedule(year):
     """
@@ -49,52 +457,9 @@ def get_schedule(year):
     Returns: event names, countries, locations, dates, scheduled times
     """
     try:
-        schedule = fastf1.get_event_schedule(year)
-        
-        # Convert to dictionary format
-        events = []
-        for idx, event in schedule.iterrows():
-            # Skip pre-season testing (RoundNumber 0)
-            if pd.notna(event['RoundNumber']) and int(event['RoundNumber']) == 0:
-                continue
-                
-            # Helper function to convert datetime to UTC ISO format
-            def format_utc_datetime(dt):
-                if pd.notna(dt):
-                    # If datetime is timezone-aware, convert to UTC
-                    if hasattr(dt, 'tzinfo') and dt.tzinfo is not None:
-                        dt_utc = dt.astimezone(timezone.utc)
-                    else:
-                        # Assume it's already UTC if no timezone info
-                        dt_utc = dt.replace(tzinfo=timezone.utc)
-                    return dt_utc.strftime('%Y-%m-%dT%H:%M:%SZ')
-                return None
-            
-            event_data = {
-                'round_number': int(event['RoundNumber']) if pd.notna(event['RoundNumber']) else None,
-                'country': event['Country'],
-                'location': event['Location'],
-                'event_name': event['EventName'],
-                'event_date': event['EventDate'].strftime('%Y-%m-%d') if pd.notna(event['EventDate']) else None,
-                'event_format': event['EventFormat'],
-                'session1': event['Session1'] if pd.notna(event['Session1']) else None,
-                'session1_date': format_utc_datetime(event['Session1Date']),
-                'session2': event['Session2'] if pd.notna(event['Session2']) else None,
-                'session2_date': format_utc_datetime(event['Session2Date']),
-                'session3': event['Session3'] if pd.notna(event['Session3']) else None,
-                'session3_date': format_utc_datetime(event['Session3Date']),
-                'session4': event['Session4'] if pd.notna(event['Session4']) else None,
-                'session4_date': format_utc_datetime(event['Session4Date']),
-                'session5': event['Session5'] if pd.notna(event['Session5']) else None,
-                'session5_date': format_utc_datetime(event['Session5Date']),
-            }
-            events.append(event_data)
-        
-        return jsonify({
-            'year': year,
-            'events': events,
-            'total_events': len(events)
-        })
+        season = schedule_cache.get(year)
+        return cached_json_response(season.body, season.etag, season.last_modified,
+                                    max_age=schedule_cache.max_age(year))
     except Exception as e:
         logger.error(f"Error fetching schedule: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -104,17 +469,13 @@ def get_schedule(year):
 def get_event(year, round_number):
     """Get specific event details"""
     try:
-        event = fastf1.get_event(year, round_number)
-        
-        event_data = {
-            'event_name': event['EventName'],
-            'country': event['Country'],
-            'location': event['Location'],
-            'event_date': event['EventDate'].strftime('%Y-%m-%d') if pd.notna(event['EventDate']) else None,
-            'event_format': event['EventFormat'],
-        }
-        
-        return jsonify(event_data)
+        season = schedule_cache.get(year)
+        event_data = season.event(round_number)
+        if event_data is None:
+            return jsonify({'error': f'Round {round_number} not found in the {year} schedule.'}), 404
+
+        return cached_json_response(dumps(event_data), f'{season.etag}-{round_number}', season.last_modified,
+                                    max_age=schedule_cache.max_age(year))
     except Exception as e:
         logger.error(f"Error fetching event: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -127,106 +488,110 @@ def get_session_results(year, round_number, session_type):
     Returns: driver names, team names, positions, points, status
     """
     try:
-        session = fastf1.get_session(year, round_number, session_type)
-        session.load()
-        
-        results = session.results
-        if len(results) == 0:
-            return jsonify({'error': 'Session results are not available yet.'}), 404
+        payload = precomputed.load('session', year, round_number, session_type)
+        if payload is None:
+            payload = build_payload('session', build_results, year, round_number, session_type, ('results',))
         
-        drivers = []
-        for idx, driver in results.iterrows():
-            driver_data = {
-                'position': int(driver['Position']) if pd.notna(driver['Position']) else None,
-                'driver_number': str(driver['DriverNumber']),
-                'abbreviation': driver['Abbreviation'],
-                'full_name': driver['FullName'],
-                'team_name': driver['TeamName'],
-                'team_color': driver['TeamColor'] if pd.notna(driver['TeamColor']) else None,
-                'grid_position': int(driver['GridPosition']) if pd.notna(driver['GridPosition']) else None,
-                'points': float(driver['Points']) if pd.notna(driver['Points']) else 0,
-                'status': driver['Status'] if pd.notna(driver['Status']) else None,
-                'time': str(driver['Time']) if pd.notna(driver['Time']) else None,
-            }
-            drivers.append(driver_data)
-        
-        return jsonify({
+        return json_response({
             'year': year,
             'round': round_number,
             'session_type': session_type,
-            'results': drivers
+            **payload
         })
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching session results: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+def ndjson_response(lines, total, next_cursor):
+    """Streamed NDJSON rows, with the matching row count and where the next page starts"""
+    response = Response(lines, mimetype='application/x-ndjson')
+    response.headers['X-Total-Count'] = str(total)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
 @app.route('/api/laps/<int:year>/<int:round_number>/<session_type>', methods=['GET'])
 def get_laps(year, round_number, session_type):
     """
-    Get lap timing data
+    Get lap timing data, lap by lap then by driver number
+    Query: driver, limit (page size), cursor (next_cursor of the previous page),
+           fields (comma-separated), format=ndjson (stream every row)
     Returns: sector times, lap times, pit stops, tyre data
     """
     try:
         driver_number = request.args.get('driver', None)
+        try:
+            options = page_options(request.args, [column.name for column in LAP_COLUMNS])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        session = fastf1.get_session(year, round_number, session_type)
-        session.load()
+        payload = precomputed.load('laps', year, round_number, session_type)
+        if payload is None and options['stream']:
+            # Stream the session's laps in order, serializing a chunk of rows at a time
+            laps = build_payload('laps', session_laps, year, round_number, session_type, ('laps',))
+            if driver_number:
+                laps = laps[(laps['DriverNumber'].astype(str) == driver_number) | (laps['Driver'] == driver_number)]
+                if laps.empty:
+                    return jsonify({'error': f'Driver {driver_number} not found in this session.'}), 404
+            laps = sort_lap_frame(laps)
+            keys = FrameLapKeys(laps)
+            start = after_cursor(keys, options['cursor'])
+            end = len(laps) if options['limit'] is None else min(start + options['limit'], len(laps))
+            return ndjson_response(frame_ndjson_lines(laps.iloc[start:end], LAP_COLUMNS, options['fields']),
+                                   len(laps), keys.cursor(end - 1) if end < len(laps) else None)
+        if payload is None:
+            payload = build_payload('laps', build_laps, year, round_number, session_type, ('laps',))
         
-        if len(session.laps) == 0:
-            return jsonify({'error': 'Lap data is not available for this session yet.'}), 404
-            
+        laps = payload['laps']
         if driver_number:
-            try:
-                laps = session.laps.pick_driver(driver_number)
-            except ValueError:
+            # Match on number or abbreviation like Laps.pick_driver()
+            laps = [lap for lap in laps
+                    if driver_number in (lap['driver_number'], lap['driver'])]
+            if not laps:
                 return jsonify({'error': f'Driver {driver_number} not found in this session.'}), 404
-        else:
-            laps = session.laps
         
-        # Limit to first 100 laps for performance
-        laps = laps.head(100)
+        laps, keys = order_rows(laps, lap_key)
+        start = after_cursor(keys, options['cursor'])
+        limit = options['limit']
         
-        def format_timedelta(td):
-            if pd.isna(td):
-                return None
-            total_seconds = td.total_seconds()
-            minutes = int(total_seconds // 60)
-            seconds = total_seconds % 60
-            if minutes > 0:
-                return f"{minutes}:{seconds:06.3f}"
-            else:
-                return f"{seconds:06.3f}"
+        if options['stream']:
+            rows = laps[start:] if limit is None else laps[start:start + limit]
+            return ndjson_response(ndjson_lines(rows, options['fields']), len(laps),
+                                   lap_cursor(rows[-1]) if start + len(rows) < len(laps) else None)
         
-        lap_data = []
-        for idx, lap in laps.iterrows():
-            lap_info = {
-                'time': str(lap['Time']) if pd.notna(lap['Time']) else None,
-                'driver': lap['Driver'],
-                'driver_number': str(lap['DriverNumber']),
-                'lap_time': format_timedelta(lap['LapTime']),
-                'lap_number': int(lap['LapNumber']) if pd.notna(lap['LapNumber']) else None,
-                'stint': int(lap['Stint']) if pd.notna(lap['Stint']) else None,
-                'pit_out_time': str(lap['PitOutTime']) if pd.notna(lap['PitOutTime']) else None,
-                'pit_in_time': str(lap['PitInTime']) if pd.notna(lap['PitInTime']) else None,
-                'sector1_time': format_timedelta(lap['Sector1Time']),
-                'sector2_time': format_timedelta(lap['Sector2Time']),
-                'sector3_time': format_timedelta(lap['Sector3Time']),
-                'compound': lap['Compound'] if pd.notna(lap['Compound']) else None,
-                'tyre_life': int(lap['TyreLife']) if pd.notna(lap['TyreLife']) else None,
-                'track_status': str(lap['TrackStatus']) if pd.notna(lap['TrackStatus']) else None,
-                'is_personal_best': bool(lap['IsPersonalBest']) if pd.notna(lap['IsPersonalBest']) else False,
-            }
-            lap_data.append(lap_info)
+        page = laps[start:start + limit]
+        has_more = start + len(page) < len(laps)
         
-        return jsonify({
+        binary = wants_msgpack()
+        response = (msgpack_response if binary else json_response)({
             'year': year,
             'round': round_number,
             'session_type': session_type,
             'driver_filter': driver_number,
-            'laps': lap_data,
-            'total_laps': len(lap_data)
+            'laps': (encode_rows(page, LAP_COLUMNS, options['fields']) if binary
+                     else project(page, options['fields'])),
+            'total_laps': len(laps),
+            'total_available': len(laps),
+            'count': len(page),
+            'limit': limit,
+            'next_cursor': lap_cursor(page[-1]) if has_more else None
         })
+        response.vary.add('Accept')
+        return response
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching laps: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -236,55 +601,145 @@ def get_laps(year, round_number, session_type):
 def get_telemetry(year, round_number, session_type, driver_number, lap_number):
     """
     Get telemetry data for a specific lap
-    Returns: speed, rpm, gear, throttle, brake, DRS
+    Query: mode=raw|stride|lttb|distance, step (stride), points (lttb), interval (distance, meters)
+    Returns: speed, rpm, gear, throttle, brake, DRS, distance
     """
     try:
-        session = fastf1.get_session(year, round_number, session_type)
-        session.load()
-        
-        if len(session.laps) == 0:
-            return jsonify({'error': 'Telemetry data is not available for this session yet.'}), 404
-            
         try:
-            lap = session.laps.pick_driver(driver_number).pick_lap(lap_number)
-        except ValueError:
-            return jsonify({'error': f'Driver {driver_number} or lap {lap_number} not found.'}), 404
-            
-        telemetry = lap.get_car_data()
+            options = downsampling_options(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            telemetry = telemetry_store.get_lap(year, round_number, session_type, driver_number, lap_number)
+        except LapNotFound as e:
+            return jsonify({'error': str(e)}), 404
+        
+        if telemetry is None:
+            # Not in the telemetry store; slice it out of the loaded session instead
+            session = build_payload('telemetry', require_laps, year, round_number, session_type,
+                                    ('laps', 'car_data'))
+                
+            try:
+                lap = session.laps.pick_driver(driver_number).pick_lap(lap_number)
+            except ValueError:
+                return jsonify({'error': f'Driver {driver_number} or lap {lap_number} not found.'}), 404
+                
+            telemetry = lap.get_car_data()
         
         if len(telemetry) == 0:
             return jsonify({'error': 'Car data is not available for this lap.'}), 404
         
-        # Sample telemetry to reduce data size (every 10th point)
-        telemetry = telemetry.iloc[::10]
+        total_samples = len(telemetry)
+        telemetry = downsample(telemetry, **options)
         
-        telemetry_data = []
-        for idx, row in telemetry.iterrows():
-            data_point = {
-                'session_time': str(row['SessionTime']) if pd.notna(row['SessionTime']) else None,
-                'speed': int(row['Speed']) if pd.notna(row['Speed']) else None,
-                'rpm': int(row['RPM']) if pd.notna(row['RPM']) else None,
-                'gear': int(row['nGear']) if pd.notna(row['nGear']) else None,
-                'throttle': int(row['Throttle']) if pd.notna(row['Throttle']) else None,
-                'brake': bool(row['Brake']) if pd.notna(row['Brake']) else False,
-                'drs': int(row['DRS']) if pd.notna(row['DRS']) else None,
-            }
-            telemetry_data.append(data_point)
-        
-        return jsonify({
+        binary = wants_msgpack()
+        response = (msgpack_response if binary else json_response)({
             'year': year,
             'round': round_number,
             'session_type': session_type,
             'driver': driver_number,
             'lap_number': lap_number,
-            'telemetry': telemetry_data,
-            'data_points': len(telemetry_data)
+            'mode': options['mode'],
+            'telemetry': (encode_frame(telemetry, TELEMETRY_COLUMNS) if binary
+                          else serialize_frame(telemetry, TELEMETRY_COLUMNS)),
+            'data_points': len(telemetry),
+            'total_samples': total_samples
         })
+        response.vary.add('Accept')
+        return response
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching telemetry: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/telemetry/compare/<int:year>/<int:round_number>/<session_type>', methods=['GET'])
+def compare_telemetry(year, round_number, session_type):
+    """
+    Compare laps of several drivers on a common distance grid
+    Query: laps=VER:12,HAM:fastest or drivers=VER,HAM (fastest laps), interval (meters)
+    Returns: distance grid, aligned speed/rpm/gear/throttle/brake/DRS, lap time and delta to the first lap
+    """
+    try:
+        try:
+            pairs = parse_laps(request.args)
+            interval = downsampling_options(request.args)['interval']
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        session = None
+        car_data = []
+        compared = []
+        for driver, lap_number in pairs:
+            # Stored laps come straight from the telemetry store; the session is loaded
+            # (once) only for laps the store can't serve
+            telemetry = None
+            try:
+                if lap_number == FASTEST:
+                    lap_number = telemetry_store.fastest_lap_number(
+                        year, round_number, session_type, driver) or FASTEST
+                if lap_number != FASTEST:
+                    telemetry = telemetry_store.get_lap(year, round_number, session_type, driver, lap_number)
+            except LapNotFound as e:
+                return jsonify({'error': str(e)}), 404
+
+            if telemetry is None:
+                if session is None:
+                    session = build_payload('telemetry', require_laps, year, round_number, session_type,
+                                            ('laps', 'car_data'))
+
+                try:
+                    driver_laps = session.laps.pick_driver(driver)
+                    if lap_number == FASTEST:
+                        lap = driver_laps.pick_fastest()
+                        if lap is None or lap.empty:
+                            return jsonify({'error': f'No fastest lap found for driver {driver}.'}), 404
+                        lap_number = int(lap['LapNumber'])
+                    else:
+                        lap = driver_laps.pick_lap(lap_number)
+                        if len(lap) == 0:
+                            raise ValueError
+                except ValueError:
+                    return jsonify({'error': f'Driver {driver} or lap {lap_number} not found.'}), 404
+                telemetry = lap.get_car_data()
+
+            if len(telemetry) == 0:
+                return jsonify({'error': f'Car data is not available for driver {driver} lap {lap_number}.'}), 404
+            car_data.append(telemetry)
+            compared.append({'driver': driver, 'lap_number': int(lap_number)})
+
+        try:
+            distance, traces = align_laps(car_data, interval)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+
+        return json_response({
+            'year': year,
+            'round': round_number,
+            'session_type': session_type,
+            'interval': interval,
+            'reference': compared[0],
+            'distance': distance,
+            'laps': [{**lap, **trace} for lap, trace in zip(compared, traces)],
+            'data_points': len(distance)
+        })
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
+    except Exception as e:
+        logger.error(f"Error comparing telemetry: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/race-control/<int:year>/<int:round_number>/<session_type>', methods=['GET'])
 def get_race_control_messages(year, round_number, session_type):
     """
@@ -292,32 +747,22 @@ def get_race_control_messages(year, round_number, session_type):
     Returns: investigations, penalties, restart announcements
     """
     try:
-        session = fastf1.get_session(year, round_number, session_type)
-        session.load()
-        
-        race_control = session.race_control_messages
-        if len(race_control) == 0:
-            return jsonify({'error': 'Race control messages are not available yet.'}), 404
+        payload = precomputed.load('race_control', year, round_number, session_type)
+        if payload is None:
+            payload = build_payload('race_control', build_race_control, year, round_number, session_type, ('messages',))
         
-        messages = []
-        for idx, msg in race_control.iterrows():
-            message_data = {
-                'time': str(msg['Time']) if pd.notna(msg['Time']) else None,
-                'category': msg['Category'] if pd.notna(msg['Category']) else None,
-                'message': msg['Message'] if pd.notna(msg['Message']) else None,
-                'flag': msg['Flag'] if pd.notna(msg['Flag']) else None,
-                'scope': msg['Scope'] if pd.notna(msg['Scope']) else None,
-                'sector': str(msg['Sector']) if pd.notna(msg['Sector']) else None,
-            }
-            messages.append(message_data)
-        
-        return jsonify({
+        return json_response({
             'year': year,
             'round': round_number,
             'session_type': session_type,
-            'messages': messages,
-            'total_messages': len(messages)
+            **payload
         })
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching race control messages: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -327,70 +772,45 @@ def get_race_control_messages(year, round_number, session_type):
 def get_circuit_info(year, round_number):
     """
     Get circuit information
-    Returns: corner numbers, marshall sectors, track markers, lap length, event info
+    A session is loaded only when no stored layout covers the year (then it's stored).
+    A layout inferred from an earlier year is served until the year's race has run and
+    its own layout can be built.
+    Returns: track outline, corners, marshal sectors, rotation, lap length, event info
     """
     try:
-        session = fastf1.get_session(year, round_number, 'R')
-        session.load()
-        
-        try:
-            circuit_info = session.get_circuit_info()
-        except fastf1.core.DataNotLoadedError:
-            return jsonify({'error': 'Circuit data is not available for this session yet.'}), 404
-        
-        # Convert rotation and corners to serializable format
-        circuit_data = {
-            'rotation': float(circuit_info.rotation) if hasattr(circuit_info, 'rotation') else None,
-            'corners': []
-        }
-        
-        if hasattr(circuit_info, 'corners') and circuit_info.corners is not None:
-            for corner in circuit_info.corners:
-                if isinstance(corner, dict):
-                    circuit_data['corners'].append(corner)
-                else:
-                    circuit_data['corners'].append({
-                        'number': str(corner) if corner else None
-                    })
-        
-        # Get event information for circuit details
-        event_info = {}
-        try:
-            event_info = {
-                'location': session.event.get('Location', 'Unknown'),
-                'country': session.event.get('Country', 'Unknown'),
-                'event_name': session.event.get('EventName', 'Unknown'),
-                'event_format': session.event.get('EventFormat', 'Unknown'),
-                'official_name': session.event.get('OfficialEventName', None),
-            }
-        except Exception as event_err:
-            logger.warning(f"Error getting event info: {str(event_err)}")
-            event_info = {
-                'location': 'Unknown',
-                'country': 'Unknown',
-                'event_name': 'Unknown',
-                'event_format': 'Unknown',
-                'official_name': None
-            }
-        
-        # Calculate lap length if lap data available
-        lap_length = None
-        try:
-            if len(session.laps) > 0 and 'Distance' in session.laps.columns:
-                # Get max distance from any lap as circuit length
-                lap_distances = session.laps['Distance'].max()
-                if pd.notna(lap_distances) and lap_distances > 0:
-                    lap_length = round(lap_distances / 1000, 3)  # Convert meters to km
-        except Exception as lap_err:
-            logger.warning(f"Could not calculate lap length: {str(lap_err)}")
-        
-        return jsonify({
+        event = schedule_cache.get(year).event(round_number)
+        if event is None:
+            return jsonify({'error': f'Round {round_number} not found in the {year} schedule.'}), 404
+
+        circuit = circuit_id(event['location'])
+        layout = circuit_store.layout(circuit, year)
+        if layout is None:
+            layout = build_payload('circuit', build_layout, year, round_number, 'R', ('car_data', 'pos_data'))
+            layout = circuit_store.add(circuit, layout, year)
+        elif layout.get('inferred') and not session_is_upcoming(year, round_number, 'R'):
+            # The race has run: check the layout against its own, which may be a new one
+            try:
+                built = build_payload('circuit', build_layout, year, round_number, 'R', ('car_data', 'pos_data'))
+            except (PayloadUnavailable, SessionLoading, UpstreamUnavailable) as e:
+                logger.info(f"Serving the inferred {circuit} layout for {year} for now: {str(e)}")
+            else:
+                layout = circuit_store.add(circuit, built, year)
+
+        response = json_response({
             'year': year,
             'round': round_number,
-            'circuit_info': circuit_data,
-            'event_info': event_info,
-            'lap_length_km': lap_length
+            **circuit_payload(circuit, layout, event)
         })
+        if layout.get('inferred'):
+            # Until the year's race confirms (or replaces) it
+            response.headers['Cache-Control'] = 'public, max-age=300'
+        return response
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching circuit info: {str(e)}")
         import traceback
@@ -403,64 +823,47 @@ def get_drivers(year, round_number, session_type):
     """Get list of drivers for a specific session"""
     try:
         try:
-            session = fastf1.get_session(year, round_number, session_type)
-            session.load()
-            
-            results = session.results
-            if len(results) == 0:
-                raise ValueError("Driver list is not available for this session yet.")
-            
-            drivers = []
-            for idx, driver in results.iterrows():
-                driver_data = {
-                    'driver_number': str(driver['DriverNumber']),
-                    'abbreviation': driver['Abbreviation'],
-                    'full_name': driver['FullName'],
-                    'team_name': driver['TeamName'],
-                    'team_color': driver['TeamColor'] if pd.notna(driver['TeamColor']) else None,
-                }
-                drivers.append(driver_data)
+            payload = precomputed.load('drivers', year, round_number, session_type)
+            if payload is None:
+                payload = build_payload('drivers', build_drivers, year, round_number, session_type,
+                                        ('results',))
             
-            return jsonify({
+            return json_response({
                 'year': year,
                 'round': round_number,
                 'session_type': session_type,
-                'drivers': drivers
+                **payload
             })
+        except (SessionLoading, UpstreamUnavailable):
+            raise
         except Exception as e:
-            if year == 2026:
-                # Fallback to hardcoded 2026 drivers if FastF1 fails
-                drivers_list = [
-                    {'abbreviation': 'GAS', 'full_name': 'Pierre Gasly', 'driver_number': '10', 'team_name': 'Alpine F1 Team', 'team_color': 'FF87BC'},
-                    {'abbreviation': 'COL', 'full_name': 'Franco Colapinto', 'driver_number': '43', 'team_name': 'Alpine F1 Team', 'team_color': 'FF87BC'},
-                    {'abbreviation': 'ALO', 'full_name': 'Fernando Alonso', 'driver_number': '14', 'team_name': 'Aston Martin', 'team_color': '229971'},
-                    {'abbreviation': 'STR', 'full_name': 'Lance Stroll', 'driver_number': '18', 'team_name': 'Aston Martin', 'team_color': '229971'},
-                    {'abbreviation': 'HUL', 'full_name': 'Nico Hulkenberg', 'driver_number': '27', 'team_name': 'Audi', 'team_color': 'F50537'},
-                    {'abbreviation': 'BOR', 'full_name': 'Gabriel Bortoleto', 'driver_number': '5', 'team_name': 'Audi', 'team_color': 'F50537'},
-                    {'abbreviation': 'PER', 'full_name': 'Sergio Perez', 'driver_number': '11', 'team_name': 'Cadillac', 'team_color': 'FFB800'},
-                    {'abbreviation': 'BOT', 'full_name': 'Valtteri Bottas', 'driver_number': '77', 'team_name': 'Cadillac', 'team_color': 'FFB800'},
-                    {'abbreviation': 'LEC', 'full_name': 'Charles Leclerc', 'driver_number': '16', 'team_name': 'Ferrari', 'team_color': 'E8002D'},
-                    {'abbreviation': 'HAM', 'full_name': 'Lewis Hamilton', 'driver_number': '44', 'team_name': 'Ferrari', 'team_color': 'E8002D'},
-                    {'abbreviation': 'OCO', 'full_name': 'Esteban Ocon', 'driver_number': '31', 'team_name': 'Haas F1 Team', 'team_color': 'B6BABD'},
-                    {'abbreviation': 'BEA', 'full_name': 'Oliver Bearman', 'driver_number': '87', 'team_name': 'Haas F1 Team', 'team_color': 'B6BABD'},
-                    {'abbreviation': 'NOR', 'full_name': 'Lando Norris', 'driver_number': '4', 'team_name': 'McLaren', 'team_color': 'FF8000'},
-                    {'abbreviation': 'PIA', 'full_name': 'Oscar Piastri', 'driver_number': '81', 'team_name': 'McLaren', 'team_color': 'FF8000'},
-                    {'abbreviation': 'RUS', 'full_name': 'George Russell', 'driver_number': '63', 'team_name': 'Mercedes', 'team_color': '27F4D2'},
-                    {'abbreviation': 'ANT', 'full_name': 'Andrea Kimi Antonelli', 'driver_number': '12', 'team_name': 'Mercedes', 'team_color': '27F4D2'},
-                    {'abbreviation': 'LAW', 'full_name': 'Liam Lawson', 'driver_number': '30', 'team_name': 'Racing Bulls', 'team_color': '6692FF'},
-                    {'abbreviation': 'LIN', 'full_name': 'Arvid Lindblad', 'driver_number': '40', 'team_name': 'Racing Bulls', 'team_color': '6692FF'},
-                    {'abbreviation': 'VER', 'full_name': 'Max Verstappen', 'driver_number': '1', 'team_name': 'Red Bull Racing', 'team_color': '3671C6'},
-                    {'abbreviation': 'HAD', 'full_name': 'Isack Hadjar', 'driver_number': '6', 'team_name': 'Red Bull Racing', 'team_color': '3671C6'},
-                    {'abbreviation': 'ALB', 'full_name': 'Alexander Albon', 'driver_number': '23', 'team_name': 'Williams', 'team_color': '64C4FF'},
-                    {'abbreviation': 'SAI', 'full_name': 'Carlos Sainz', 'driver_number': '55', 'team_name': 'Williams', 'team_color': '64C4FF'}
-                ]
-                return jsonify({
-                    'year': year,
-                    'round': round_number,
-                    'session_type': session_type,
-                    'drivers': drivers_list
-                })
-            raise e
+            # Sessions that haven't run yet (or failed to load) get the round's line-up from
+            # the season roster. Data missing after the start is only late, and is answered
+            # as such rather than with a roster that may stand in for the real list.
+            if isinstance(e, NotAvailableYet) and not session_is_upcoming(year, round_number, session_type):
+                raise
+            try:
+                drivers_list = roster_index.lineup(year, round_number, timeout=SESSION_LOAD_WAIT)
+            except Exception:
+                drivers_list = None
+            if drivers_list is None:
+                raise e
+            response = json_response({
+                'year': year,
+                'round': round_number,
+                'session_type': session_type,
+                'source': 'roster',
+                'drivers': drivers_list
+            })
+            # A stand-in until the session's own driver list loads
+            response.headers['Cache-Control'] = 'public, max-age=60'
+            return response
+    except PayloadUnavailable as e:
+        return unavailable_response(e)
+    except SessionLoading as e:
+        return loading_response(e)
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching drivers: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -470,52 +873,13 @@ def get_drivers(year, round_number, session_type):
 def get_current_event():
     """Get the current or next upcoming event"""
     try:
-        current_year = datetime.now().year
-        schedule = fastf1.get_event_schedule(current_year)
-        
         now = datetime.now()
-        
-        # Find current or next event
-        for idx, event in schedule.iterrows():
-            if pd.notna(event['EventDate']):
-                event_date = event['EventDate']
-                days_diff = (event_date - now).days
-                
-                # If event is within 7 days (past or future), consider it current
-                if -3 <= days_diff <= 7:
-                    event_data = {
-                        'round_number': int(event['RoundNumber']) if pd.notna(event['RoundNumber']) else None,
-                        'country': event['Country'],
-                        'location': event['Location'],
-                        'event_name': event['EventName'],
-                        'event_date': event['EventDate'].strftime('%Y-%m-%d') if pd.notna(event['EventDate']) else None,
-                        'event_format': event['EventFormat'],
-                        'days_until': days_diff,
-                        'session5_date': event['Session5Date'].strftime('%Y-%m-%d %H:%M:%S') if pd.notna(event['Session5Date']) else None,
-                    }
-                    return jsonify(event_data)
-        
-        # If no current event found, return next future event
-        future_events = schedule[schedule['EventDate'] > now]
-        if len(future_events) > 0:
-            event = future_events.iloc[0]
-            event_date = event['EventDate']
-            days_diff = (event_date - now).days
-            
-            event_data = {
-                'round_number': int(event['RoundNumber']) if pd.notna(event['RoundNumber']) else None,
-                'country': event['Country'],
-                'location': event['Location'],
-                'event_name': event['EventName'],
-                'event_date': event['EventDate'].strftime('%Y-%m-%d') if pd.notna(event['EventDate']) else None,
-                'event_format': event['EventFormat'],
-                'days_until': days_diff,
-                'session5_date': event['Session5Date'].strftime('%Y-%m-%d %H:%M:%S') if pd.notna(event['Session5Date']) else None,
-            }
-            return jsonify(event_data)
-        
-        return jsonify({'error': 'No upcoming events found'}), 404
-        
+        event_data = schedule_cache.get(now.year).current_event(now)
+        if event_data is None:
+            return jsonify({'error': 'No upcoming events found'}), 404
+
+        return json_response(event_data)
+
     except Exception as e:
         logger.error(f"Error fetching current event: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -524,80 +888,155 @@ def get_current_event():
 @app.route('/api/drivers/<int:year>', methods=['GET'])
 def get_all_drivers(year):
     """
-    Get all drivers for a specific year (for Teams page)
-    Returns: driver names, abbreviations, numbers, team names, and team colors
+    Get all drivers of a season (for Teams page), from the season roster
+    Returns: driver names, abbreviations, numbers, teams and colors, the rounds each
+             started, line-up changes by round and image keys under /images/
     """
     try:
-        if year == 2026:
-            # Hardcode 2026 drivers since FastF1 doesn't have the data yet
-            drivers_list = [
-                {'abbreviation': 'GAS', 'full_name': 'Pierre Gasly', 'number': '10', 'team_name': 'Alpine F1 Team', 'team_color': 'FF87BC'},
-                {'abbreviation': 'COL', 'full_name': 'Franco Colapinto', 'number': '43', 'team_name': 'Alpine F1 Team', 'team_color': 'FF87BC'},
-                {'abbreviation': 'ALO', 'full_name': 'Fernando Alonso', 'number': '14', 'team_name': 'Aston Martin', 'team_color': '229971'},
-                {'abbreviation': 'STR', 'full_name': 'Lance Stroll', 'number': '18', 'team_name': 'Aston Martin', 'team_color': '229971'},
-                {'abbreviation': 'HUL', 'full_name': 'Nico Hulkenberg', 'number': '27', 'team_name': 'Audi', 'team_color': 'F50537'},
-                {'abbreviation': 'BOR', 'full_name': 'Gabriel Bortoleto', 'number': '5', 'team_name': 'Audi', 'team_color': 'F50537'},
-                {'abbreviation': 'PER', 'full_name': 'Sergio Perez', 'number': '11', 'team_name': 'Cadillac', 'team_color': 'FFB800'},
-                {'abbreviation': 'BOT', 'full_name': 'Valtteri Bottas', 'number': '77', 'team_name': 'Cadillac', 'team_color': 'FFB800'},
-                {'abbreviation': 'LEC', 'full_name': 'Charles Leclerc', 'number': '16', 'team_name': 'Ferrari', 'team_color': 'E8002D'},
-                {'abbreviation': 'HAM', 'full_name': 'Lewis Hamilton', 'number': '44', 'team_name': 'Ferrari', 'team_color': 'E8002D'},
-                {'abbreviation': 'OCO', 'full_name': 'Esteban Ocon', 'number': '31', 'team_name': 'Haas F1 Team', 'team_color': 'B6BABD'},
-                {'abbreviation': 'BEA', 'full_name': 'Oliver Bearman', 'number': '87', 'team_name': 'Haas F1 Team', 'team_color': 'B6BABD'},
-                {'abbreviation': 'NOR', 'full_name': 'Lando Norris', 'number': '4', 'team_name': 'McLaren', 'team_color': 'FF8000'},
-                {'abbreviation': 'PIA', 'full_name': 'Oscar Piastri', 'number': '81', 'team_name': 'McLaren', 'team_color': 'FF8000'},
-                {'abbreviation': 'RUS', 'full_name': 'George Russell', 'number': '63', 'team_name': 'Mercedes', 'team_color': '27F4D2'},
-                {'abbreviation': 'ANT', 'full_name': 'Andrea Kimi Antonelli', 'number': '12', 'team_name': 'Mercedes', 'team_color': '27F4D2'},
-                {'abbreviation': 'LAW', 'full_name': 'Liam Lawson', 'number': '30', 'team_name': 'Racing Bulls', 'team_color': '6692FF'},
-                {'abbreviation': 'LIN', 'full_name': 'Arvid Lindblad', 'number': '40', 'team_name': 'Racing Bulls', 'team_color': '6692FF'},
-                {'abbreviation': 'VER', 'full_name': 'Max Verstappen', 'number': '1', 'team_name': 'Red Bull Racing', 'team_color': '3671C6'},
-                {'abbreviation': 'HAD', 'full_name': 'Isack Hadjar', 'number': '6', 'team_name': 'Red Bull Racing', 'team_color': '3671C6'},
-                {'abbreviation': 'ALB', 'full_name': 'Alexander Albon', 'number': '23', 'team_name': 'Williams', 'team_color': '64C4FF'},
-                {'abbreviation': 'SAI', 'full_name': 'Carlos Sainz', 'number': '55', 'team_name': 'Williams', 'team_color': '64C4FF'}
-            ]
-            return jsonify({
-                'year': year,
-                'total_drivers': len(drivers_list),
-                'drivers': drivers_list
-            })
+        timeout = SESSION_LOAD_WAIT if SERVING_MODE == 'async' else None
+        roster = roster_index.get(year, timeout=timeout)
+        if not roster['drivers']:
+            return jsonify({'error': f'No driver data for the {year} season yet.'}), 404
 
-        # Get the first race of the season to extract driver info
-        session = fastf1.get_session(year, 1, 'R')
-        session.load()
-        
-        drivers_list = []
-        
-        # Get unique drivers from the session
-        for driver_abbr in session.drivers:
-            driver_info = session.get_driver(driver_abbr)
-            
-            # Extract driver details
-            driver_data = {
-                'abbreviation': driver_abbr,
-                'full_name': driver_info['FullName'] if 'FullName' in driver_info else driver_abbr,
-                'number': str(driver_info['DriverNumber']) if 'DriverNumber' in driver_info else 'N/A',
-                'team_name': driver_info['TeamName'] if 'TeamName' in driver_info else 'Unknown',
-                'team_color': driver_info['TeamColor'] if 'TeamColor' in driver_info else None
-            }
-            drivers_list.append(driver_data)
-        
-        # Sort by team name and then by driver number
-        drivers_list.sort(key=lambda x: (x['team_name'], x['number']))
-        
-        return jsonify({
+        response = json_response({
             'year': year,
-            'total_drivers': len(drivers_list),
-            'drivers': drivers_list
+            'source': roster['source'],
+            'rounds': roster['rounds'],
+            'missing_rounds': roster['missing_rounds'],
+            'total_drivers': len(roster['drivers']),
+            'drivers': roster['drivers'],
+            'lineup_changes': roster['changes']
         })
-        
+        if roster['missing_rounds'] or roster['source'] == 'preseason':
+            # Left-out rounds are retried and preseason line-ups give way to results
+            response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    except RosterPending as e:
+        response = jsonify({
+            **e.progress,
+            'message': 'The season roster is being built, try again shortly.',
+            'retry_after': 5,
+        })
+        response.status_code = 202
+        response.headers['Retry-After'] = '5'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    except UpstreamUnavailable as e:
+        return upstream_response(e)
     except Exception as e:
         logger.error(f"Error fetching drivers for year {year}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/season/<int:year>/status', methods=['GET'])
+def get_season_status(year):
+    """
+    Get the aggregation progress of a season in this worker
+    Returns: status (building, ready, not_built) and rounds done so far
+    """
+    return jsonify({'year': year, **season_aggregator.progress(year)})
+
+
+@app.route('/api/season/<int:year>/<stat>', methods=['GET'])
+def get_season_stats(year, stat):
+    """
+    Get season-wide statistics across all finished races
+    stat: standings, points-progression, pace or tyres
+    Returns: the statistic per driver (and constructor), the rounds included and any missing rounds
+    """
+    if stat not in SEASON_STATS:
+        return jsonify({'error': f"Unknown season statistic '{stat}'. "
+                                 f"Available: {', '.join(SEASON_STATS)}"}), 404
+    try:
+        timeout = SESSION_LOAD_WAIT if SERVING_MODE == 'async' else None
+        payload = season_aggregator.get(year, SEASON_STATS[stat], timeout=timeout)
+        response = json_response({'year': year, **payload})
+        if payload['missing_rounds']:
+            # Rounds that failed to load are retried, so don't let clients keep this for good
+            response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    except SeasonPending as e:
+        progress_url = url_for('get_season_status', year=year)
+        response = jsonify({
+            **e.progress,
+            'message': 'Season statistics are being computed, try again shortly.',
+            'progress_url': progress_url,
+            'retry_after': 5,
+        })
+        response.status_code = 202
+        response.headers['Location'] = progress_url
+        response.headers['Retry-After'] = '5'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    except Exception as e:
+        logger.error(f"Error aggregating season {year}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/live/state', methods=['GET'])
+def get_live_state():
+    """
+    Get the live session state held by this worker
+    Returns: session info, status, classification, completed laps, race control messages and feed stats
+    """
+    if live_hub is None:
+        return jsonify({'error': 'Live mode is not enabled.'}), 404
+    return json_response({**live_hub.snapshot(), 'feed': live_hub.stats()})
+
+
+# Seconds a client refused a live stream waits before trying again
+LIVE_STREAM_RETRY_AFTER = 15
+
+
+@app.route('/api/live/stream', methods=['GET'])
+def stream_live_events():
+    """
+    Stream live session changes as Server-Sent Events
+    Query: events (comma-separated: classification, lap, race_control, status, weather)
+    Returns: a snapshot event, then deltas as they happen; reconnects with Last-Event-ID resume.
+             503 with Retry-After when this worker already holds LIVE_MAX_STREAMS streams
+    """
+    if live_hub is None:
+        return jsonify({'error': 'Live mode is not enabled.'}), 404
+
+    events = None
+    if request.args.get('events'):
+        events = {name.strip() for name in request.args['events'].split(',') if name.strip()}
+        unknown = events - set(LIVE_EVENTS)
+        if unknown:
+            return jsonify({'error': f"Unknown events: {', '.join(sorted(unknown))}. "
+                                     f"Available: {', '.join(LIVE_EVENTS)}"}), 400
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an integer'}), 400
+
+    if not live_hub.admit():
+        response = jsonify({'error': 'Too many live streams on this server right now, try again shortly.',
+                            'retry_after': LIVE_STREAM_RETRY_AFTER})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(LIVE_STREAM_RETRY_AFTER)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    response = Response(live_hub.stream(last_event_id, events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx-style proxies from buffering the stream
+        'X-Accel-Buffering': 'no',
+    })
+    # The server closes the response however the stream ends, even before it starts
+    response.call_on_close(live_hub.release)
+    return response
+
+
 # Serve React App
 @app.route('/')
 def serve():
-    return app.send_static_file('index.html')
+    return static_files.send('index.html')
 
 # Catch-all route to support React Router
 @app.errorhandler(404)
@@ -605,8 +1044,11 @@ def not_found(e):
     # If the request is for an API route, return a JSON error
     if request.path.startswith('/api/'):
         return jsonify({'error': 'Not found'}), 404
+    # A fingerprinted file that isn't there is gone, not a page
+    if request.path.startswith(('/assets/', '/static/')):
+        return 'Not found', 404
     # Otherwise, serve the React app
-    return app.send_static_file('index.html')
+    return static_files.send('index.html')
 
 
 if __name__ == '__main__':
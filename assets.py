@@ -0,0 +1,315 @@
+"""
+Static asset pipeline for the React build
+Run once after `npm run build`: every image the pages show is resized to a few widths,
+encoded as AVIF and WebP under content-hashed names in <build>/assets/, and listed in
+<build>/image-manifest.json, which the frontend reads to build srcsets. Text assets
+(JS, CSS, HTML, JSON, source maps) get precompressed .br and .gz siblings.
+
+StaticFiles then serves the build: fingerprinted files (assets/ and CRA's static/)
+with a one-year immutable Cache-Control, index.html and the manifest revalidated on
+every visit, and a precompressed sibling instead of the file when the client accepts
+its encoding. Repeat visits cost the workers nothing but a 304 for index.html.
+
+Running it again on the same build only encodes the images that changed since.
+
+Usage:
+    python assets.py                          # process frontend/build
+    python assets.py --build-dir dist --workers 4
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import fnmatch
+import gzip
+import hashlib
+from io import BytesIO
+import logging
+import mimetypes
+import os
+import re
+import time
+
+from flask import abort, request, send_file
+import orjson
+from werkzeug.security import safe_join
+
+from http_cache import IMMUTABLE
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # only needed to build variants
+    Image = None
+
+logger = logging.getLogger('assets')
+
+ASSETS_DIR = 'assets'
+IMAGE_MANIFEST = 'image-manifest.json'
+
+# Images to resize, by path in the build, and the widths (CSS px x device pixel ratio)
+# they are shown at; each also keeps a variant at its own width if that is smaller
+IMAGE_SETS = [
+    ('f1_bg.png', (640, 1280, 1920)),
+    ('logo.png', (48, 96, 192)),
+    ('images/drivers/*', (80, 160, 320)),
+    ('images/cars/*', (400, 800, 1600)),
+    ('images/circuits/*', (320, 640, 1280)),
+]
+
+# Formats of every variant, best first (the last is the <img> fallback)
+FORMATS = [
+    ('avif', 'image/avif', {'quality': 55}),
+    ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+]
+# Images that are also referenced as PNG (the favicon in index.html)
+PNG_IMAGES = ('logo.png',)
+
+# Text files worth precompressing, and the encodings served from disk
+COMPRESSIBLE = ('.js', '.css', '.html', '.json', '.map', '.svg', '.txt')
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz')) if brotli is not None else (('gzip', '.gz'),)
+
+# Paths whose names change with their content
+FINGERPRINTED = (f'{ASSETS_DIR}/', 'static/')
+# Entry points that must be revalidated so a deploy is picked up at once
+REVALIDATED = ('index.html', IMAGE_MANIFEST, 'asset-manifest.json')
+# Everything else in the build (unhashed images, for old clients)
+DEFAULT_CACHE_CONTROL = 'public, max-age=86400'
+
+# Not in every platform's mime.types
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+
+_ICON_LINK = re.compile(r'(<link rel="icon" href=")[^"]*(")')
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _widths(widths, width):
+    """Variant widths for an image `width` px wide: none larger than the image"""
+    return sorted({w for w in widths if w < width} | {min(width, max(widths))})
+
+
+def _save(image, build_dir, path, width, extension, options):
+    """Write one variant under its content hash; returns its URL"""
+    buffer = BytesIO()
+    image.save(buffer, format=extension.upper(), **options)
+    data = buffer.getvalue()
+    stem, _ = os.path.splitext(path)
+    name = f'{ASSETS_DIR}/{stem}-{width}w.{fingerprint(data)}.{extension}'
+    target = os.path.join(build_dir, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if not os.path.exists(target):
+        with open(target, 'wb') as f:
+            f.write(data)
+    return '/' + name
+
+
+def build_image(build_dir, path, widths):
+    """
+    Resized AVIF and WebP variants of one image in the build
+    Returns: its manifest entry (size, <source> srcsets, fallback src)
+    """
+    with open(os.path.join(build_dir, path), 'rb') as f:
+        source = f.read()
+    with Image.open(os.path.join(build_dir, path)) as original:
+        original.load()
+        width, height = original.size
+        sources, fallback, png = [], None, None
+        for extension, mimetype, options in FORMATS:
+            srcset = []
+            for variant_width in _widths(widths, width):
+                variant_height = max(1, round(height * variant_width / width))
+                image = original.resize((variant_width, variant_height), Image.LANCZOS) \
+                    if variant_width != width else original
+                url = _save(image, build_dir, path, variant_width, extension, options)
+                srcset.append(f'{url} {variant_width}w')
+                fallback = url
+                if path in PNG_IMAGES and png is None:
+                    png = _save(image, build_dir, path, variant_width, 'png', {'optimize': True})
+            sources.append({'type': mimetype, 'srcset': ', '.join(srcset)})
+    entry = {'source_hash': fingerprint(source), 'width': width, 'height': height,
+             'src': fallback, 'sources': sources}
+    if png is not None:
+        entry['png'] = png
+    return entry
+
+
+def _images(build_dir):
+    """[(path in the build, widths)] for every image IMAGE_SETS covers"""
+    found = []
+    for root, _, names in os.walk(build_dir):
+        relative = os.path.relpath(root, build_dir)
+        if relative.split(os.sep)[0] == ASSETS_DIR:
+            continue
+        for name in sorted(names):
+            path = name if relative == '.' else f'{relative}/{name}'.replace(os.sep, '/')
+            for pattern, widths in IMAGE_SETS:
+                if fnmatch.fnmatch(path, pattern):
+                    found.append((path, widths))
+                    break
+    return found
+
+
+def build_images(build_dir, workers=None):
+    """Build variants of every image and write the manifest; returns the manifest"""
+    if Image is None:
+        raise RuntimeError('Pillow is required to build image variants (pip install Pillow)')
+    manifest_path = os.path.join(build_dir, IMAGE_MANIFEST)
+    try:
+        with open(manifest_path, 'rb') as f:
+            previous = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        previous = {}
+
+    manifest, todo = {}, []
+    for path, widths in _images(build_dir):
+        with open(os.path.join(build_dir, path), 'rb') as f:
+            source_hash = fingerprint(f.read())
+        entry = previous.get(path)
+        if entry is not None and entry['source_hash'] == source_hash and all(
+                os.path.exists(os.path.join(build_dir, url.lstrip('/').split(' ')[0]))
+                for source in entry['sources'] for url in source['srcset'].split(', ')):
+            manifest[path] = entry
+        else:
+            todo.append((path, widths))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(build_image, build_dir, path, widths) for path, widths in todo}
+        for path, future in futures.items():
+            manifest[path] = future.result()
+            logger.info(f"{path}: {len(manifest[path]['sources'][0]['srcset'].split(', '))} widths")
+    logger.info(f"{len(todo)} images encoded, {len(manifest) - len(todo)} unchanged")
+
+    manifest = dict(sorted(manifest.items()))
+    with open(manifest_path, 'wb') as f:
+        f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+    return manifest
+
+
+def rewrite_index(build_dir, manifest):
+    """Point index.html's favicon at the smallest PNG variant of the logo"""
+    path = os.path.join(build_dir, 'index.html')
+    icon = next((manifest[name]['png'] for name in PNG_IMAGES if 'png' in manifest.get(name, {})), None)
+    if icon is None or not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    rewritten = _ICON_LINK.sub(lambda match: f'{match[1]}{icon}{match[2]}', html)
+    if rewritten != html:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(rewritten)
+
+
+def precompress(build_dir):
+    """
+    Write .br and .gz siblings of the text files in the build
+    Returns: (files, bytes before, bytes after the best encoding)
+    """
+    files = before = after = 0
+    for root, _, names in os.walk(build_dir):
+        for name in names:
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            best = len(data)
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding == 'br':
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) >= len(data):
+                    # Not worth decoding; make sure an old sibling isn't served either
+                    if os.path.exists(path + suffix):
+                        os.unlink(path + suffix)
+                    continue
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                best = min(best, len(compressed))
+            files += 1
+            before += len(data)
+            after += best
+    return files, before, after
+
+
+class StaticFiles:
+    """
+    Serves the frontend build in place of Flask's static view
+
+    Cache-Control depends on whether a file's name is fingerprinted (FINGERPRINTED,
+    immutable), an entry point (REVALIDATED, no-cache) or neither. A .br or .gz
+    sibling written by precompress() is sent instead of the file when the client
+    accepts that encoding.
+    """
+
+    def __init__(self, app=None):
+        self.root = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.static_folder
+        app.view_functions['static'] = self.send
+
+    def cache_control(self, filename):
+        if filename.startswith(FINGERPRINTED):
+            return IMMUTABLE
+        if filename in REVALIDATED:
+            return 'no-cache'
+        return DEFAULT_CACHE_CONTROL
+
+    def send(self, filename):
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        response = None
+        if filename.endswith(COMPRESSIBLE):
+            accepted = request.accept_encodings
+            for encoding, suffix in PRECOMPRESSED:
+                # A sibling older than the file is left over from a previous build
+                if accepted[encoding] > 0 and os.path.isfile(path + suffix) and \
+                        os.path.getmtime(path + suffix) >= os.path.getmtime(path):
+                    response = send_file(path + suffix, mimetype=mimetype, conditional=True)
+                    response.headers['Content-Encoding'] = encoding
+                    break
+            if response is None:
+                response = send_file(path, mimetype=mimetype, conditional=True)
+            response.vary.add('Accept-Encoding')
+        else:
+            response = send_file(path, mimetype=mimetype, conditional=True)
+        response.headers['Cache-Control'] = self.cache_control(filename)
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build resized, fingerprinted and precompressed static assets')
+    parser.add_argument('--build-dir', default=os.path.join('frontend', 'build'))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    started = time.perf_counter()
+    manifest = build_images(args.build_dir, args.workers)
+    rewrite_index(args.build_dir, manifest)
+    files, before, after = precompress(args.build_dir)
+
+    originals = sum(os.path.getsize(os.path.join(args.build_dir, path)) for path in manifest)
+    smallest = sum(min(os.path.getsize(os.path.join(args.build_dir, source['srcset'].split(' ')[0].lstrip('/')))
+                       for source in entry['sources']) for entry in manifest.values())
+    logger.info(f"{len(manifest)} images: {originals / 1e6:.1f} MB of originals, "
+                f"{smallest / 1e6:.1f} MB at the smallest width")
+    logger.info(f"{files} text files precompressed: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    logger.info(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+"""
+Endpoint benchmarks against recorded (or synthetic) FastF1 session fixtures
+
+Drives every /api route through the Flask test client, with FastF1 replaced by the
+fixtures from fixtures.py, and reports p50/p95 latency, peak RSS and payload size per
+route and cache setting:
+
+    cold         every in-memory cache and the precomputed store emptied before each
+                 request; a session "load" is unpickling the fixture, roughly what
+                 FastF1 does when its own disk cache is warm
+    warm         the same request repeated with every cache hot
+    precomputed  payloads ingested into the precomputed store, in-memory caches cold
+
+Results are JSON (machine-readable, one row per route and setting); compare two runs
+to see what a change did:
+
+    python benchmarks/bench.py --output before.json
+    git checkout my-branch
+    python benchmarks/bench.py --output after.json --compare before.json
+"""
+
+from datetime import datetime, timezone
+import argparse
+import gc
+import gzip
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+import brotli
+import numpy as np
+
+import fixtures as session_fixtures
+
+REPO_ROOT = session_fixtures.REPO_ROOT
+SETTINGS = ('cold', 'warm', 'precomputed')
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def create_app(fixtures, store_dir, cache_dir):
+    """The real app with FastF1 served from fixtures and nothing touching the network"""
+    os.environ.update({
+        'SERVING_MODE': 'sync',
+        'PRECOMPUTED_DIR': store_dir,
+        'FASTF1_CACHE_DIR': cache_dir,
+        'FASTF1_OFFLINE': 'true',
+        'PREFETCH_ENABLED': 'false',
+        'SESSION_CACHE_MAX_ENTRIES': str(max(len(fixtures), 8)),
+    })
+    sys.path.insert(0, REPO_ROOT)
+    import schedule_cache
+    import session_cache
+
+    fake = session_fixtures.FixtureFastF1(fixtures)
+    session_cache.fastf1 = fake
+    schedule_cache.fastf1 = fake
+    import app
+    logging.getLogger().setLevel(logging.WARNING)
+    return app
+
+
+def routes(fixtures):
+    """(route name, path) for every endpoint, filled in from the fixtures"""
+    paths = [('health', '/api/health')]
+    years = sorted({year for year, _, _ in fixtures})
+    for year in years:
+        paths += [('schedule', f'/api/schedule/{year}'), ('drivers (season)', f'/api/drivers/{year}')]
+        for stat in ('standings', 'points-progression', 'pace', 'tyres'):
+            paths.append((f'season {stat}', f'/api/season/{year}/{stat}'))
+
+    for year, round_number, session_type in sorted(fixtures):
+        session = fixtures[(year, round_number, session_type)].session()
+        base = f'{year}/{round_number}/{session_type}'
+        paths += [
+            ('session', f'/api/session/{base}'),
+            ('laps', f'/api/laps/{base}'),
+            ('laps ndjson', f'/api/laps/{base}?format=ndjson'),
+            ('race-control', f'/api/race-control/{base}'),
+            ('drivers', f'/api/drivers/{base}'),
+        ]
+        laps = session.laps
+        if len(laps):
+            drivers = list(session.results['Abbreviation'].dropna()[:2])
+            driver_number = str(session.results['DriverNumber'].iloc[0])
+            lap_numbers = laps[laps['DriverNumber'] == driver_number]['LapNumber'].dropna()
+            lap_number = int(lap_numbers.iloc[len(lap_numbers) // 2])
+            paths += [
+                ('telemetry', f'/api/telemetry/{base}/{driver_number}/{lap_number}'),
+                ('telemetry raw', f'/api/telemetry/{base}/{driver_number}/{lap_number}?mode=raw'),
+                ('telemetry lttb', f'/api/telemetry/{base}/{driver_number}/{lap_number}?mode=lttb'),
+                ('telemetry compare', f'/api/telemetry/compare/{base}?drivers={",".join(drivers)}'),
+            ]
+        if session_type == 'R':
+            paths += [('event', f'/api/event/{year}/{round_number}'),
+                      ('circuit', f'/api/circuit/{year}/{round_number}')]
+    return paths
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # No procfs (macOS): the peak so far is the best there is
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _RssSampler:
+    """Highest RSS seen while the block runs, sampled every couple of milliseconds"""
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(0.002):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _decode(body, encoding):
+    if encoding == 'br':
+        return brotli.decompress(body)
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    return body
+
+
+class Bench:
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.store_dir = tempfile.mkdtemp(prefix='bench-store-')
+        self.cache_dir = tempfile.mkdtemp(prefix='bench-fastf1-')
+        self.app = create_app(fixtures, self.store_dir, self.cache_dir)
+        self.client = self.app.app.test_client()
+
+    def reset(self):
+        """Empty every in-memory cache"""
+        app = self.app
+        app.session_cache.clear()
+        app.schedule_cache.clear()
+        app.http_cache.clear()
+        app.telemetry_store.clear()
+        app.season_aggregator.clear()
+        app.roster_index.clear()
+
+    def use_store(self, setting):
+        """Empty the precomputed store, then fill it for the precomputed setting"""
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        os.makedirs(self.store_dir)
+        if setting == 'precomputed':
+            from ingest import store_session
+            for (year, round_number, session_type), fixture in self.fixtures.items():
+                store_session(self.store_dir, fixture.session(), year, round_number, session_type)
+
+    def request(self, path):
+        started = time.perf_counter()
+        response = self.client.get(path, headers={'Accept-Encoding': ACCEPT_ENCODING})
+        body = response.get_data()
+        return time.perf_counter() - started, response, body
+
+    def measure(self, path, setting, iterations):
+        self.reset()
+        if setting == 'warm':
+            self.request(path)  # prime
+
+        samples = []
+        gc.collect()
+        with _RssSampler() as rss:
+            for _ in range(iterations):
+                if setting == 'cold':
+                    # Season summaries of finished rounds are written to the store
+                    self.use_store(setting)
+                if setting != 'warm':
+                    self.reset()
+                seconds, response, body = self.request(path)
+                samples.append(seconds)
+
+        encoding = response.headers.get('Content-Encoding')
+        ms = np.array(samples) * 1000
+        return {
+            'status': response.status_code,
+            'iterations': iterations,
+            'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(ms, 95)), 3),
+            'mean_ms': round(float(ms.mean()), 3),
+            'bytes': len(body),
+            'uncompressed_bytes': len(_decode(body, encoding)),
+            'encoding': encoding,
+            'rss_peak_mb': round(rss.peak / 2**20, 1),
+            'rss_growth_mb': round((rss.peak - rss.start) / 2**20, 1),
+        }
+
+
+def _meta(fixtures, args):
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    import fastf1
+    import pandas
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'fastf1': fastf1.__version__,
+        'pandas': pandas.__version__,
+        'fixtures': {f'{y}/{r}/{st}': fixture.source for (y, r, st), fixture in sorted(fixtures.items())},
+        'iterations': {'cold': args.cold_iterations, 'warm': args.iterations, 'precomputed': args.iterations},
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _compare(results, baseline_path):
+    """Print p50/p95 changes against an earlier run"""
+    with open(baseline_path) as f:
+        baseline = {(row['path'], row['setting']): row for row in json.load(f)['results']}
+    print(f"\nChange against {baseline_path} (negative is faster/smaller):", file=sys.stderr)
+    print(f"  {'setting':<12}{'path':<58}{'p50':>9}{'p95':>9}{'bytes':>9}", file=sys.stderr)
+    for row in results:
+        before = baseline.get((row['path'], row['setting']))
+        if before is None:
+            continue
+
+        def change(name):
+            if not before[name]:
+                return '     n/a'
+            return f"{(row[name] / before[name] - 1) * 100:+8.1f}%"
+
+        print(f"  {row['setting']:<12}{row['path'][:57]:<58}{change('p50_ms')}{change('p95_ms')}"
+              f"{change('bytes')}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every /api route against session fixtures')
+    parser.add_argument('--fixtures', default=session_fixtures.FIXTURE_DIR,
+                        help='recorded fixture directory (synthetic fixtures if it has none)')
+    parser.add_argument('--settings', default='cold,warm', help=f"comma-separated: {', '.join(SETTINGS)}")
+    parser.add_argument('--iterations', type=int, default=30, help='requests per route (warm, precomputed)')
+    parser.add_argument('--cold-iterations', type=int, default=5, help='requests per route (cold)')
+    parser.add_argument('--routes', help='only paths containing this text')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+    # FastF1 deprecation warnings from the app's pick_driver/pick_lap calls drown the table
+    warnings.filterwarnings('ignore', category=FutureWarning)
+
+    settings = [s.strip() for s in args.settings.split(',') if s.strip()]
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        parser.error(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+    fixtures = session_fixtures.load_fixtures(args.fixtures)
+    bench = Bench(fixtures)
+    paths = [(name, path) for name, path in routes(fixtures) if not args.routes or args.routes in path]
+
+    results = []
+    try:
+        for setting in settings:
+            iterations = args.cold_iterations if setting == 'cold' else args.iterations
+            bench.use_store(setting)
+            for name, path in paths:
+                row = {'route': name, 'path': path, 'setting': setting, **bench.measure(path, setting, iterations)}
+                results.append(row)
+                print(f"{setting:<12}{path[:58]:<60}{row['status']:>4}  p50 {row['p50_ms']:9.2f} ms  "
+                      f"p95 {row['p95_ms']:9.2f} ms  {row['bytes']:>9} B  rss {row['rss_peak_mb']:7.1f} MB",
+                      file=sys.stderr)
+    finally:
+        shutil.rmtree(bench.store_dir, ignore_errors=True)
+        shutil.rmtree(bench.cache_dir, ignore_errors=True)
+
+    output = json.dumps({'meta': _meta(fixtures, args), 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
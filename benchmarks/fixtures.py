@@ -0,0 +1,471 @@
+"""
+FastF1 session fixtures for benchmarks
+
+Benchmarks can't depend on the F1 timing servers, so they run against fixtures:
+fully loaded FastF1 sessions pickled to disk together with their circuit info and
+season schedule. Record real ones once, on a machine with network access:
+
+    python benchmarks/fixtures.py record 2024 1 R
+    python benchmarks/fixtures.py record 2024 1 Q
+    python benchmarks/fixtures.py record 2024 6 S
+
+Recordings land in benchmarks/fixtures/ (commit a few so every checkout benchmarks real
+sessions) and are only valid for the FastF1 version that made them. When there are none, synthetic fixtures are generated instead: real FastF1
+Session/Laps/Telemetry objects of race-like size (20 drivers, full car and position
+data at ~4 Hz), built from a fixed seed so results stay comparable between commits.
+
+    python benchmarks/fixtures.py synthesize    # write the synthetic set to disk
+"""
+
+import argparse
+import gzip
+import os
+import pickle
+import sys
+
+import fastf1
+import fastf1.core
+import fastf1.events
+import fastf1.mvapi
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+sys.path.insert(0, REPO_ROOT)
+from precomputed import normalize_session_type  # noqa: E402
+
+# Race, qualifying and sprint, plus the sprint weekend's race so season endpoints
+# have more than one round to aggregate
+SYNTHETIC_YEAR = 2024
+SYNTHETIC_SESSIONS = [(SYNTHETIC_YEAR, 1, 'R'), (SYNTHETIC_YEAR, 1, 'Q'),
+                      (SYNTHETIC_YEAR, 2, 'S'), (SYNTHETIC_YEAR, 2, 'R')]
+SEED = 2024
+
+SESSION_NAMES = {'R': 'Race', 'Q': 'Qualifying', 'S': 'Sprint', 'SQ': 'Sprint Qualifying',
+                 'FP1': 'Practice 1', 'FP2': 'Practice 2', 'FP3': 'Practice 3'}
+
+DRIVERS = [
+    ('1', 'VER', 'Max', 'Verstappen', 'Red Bull Racing', '3671C6'),
+    ('11', 'PER', 'Sergio', 'Perez', 'Red Bull Racing', '3671C6'),
+    ('16', 'LEC', 'Charles', 'Leclerc', 'Ferrari', 'E8002D'),
+    ('55', 'SAI', 'Carlos', 'Sainz', 'Ferrari', 'E8002D'),
+    ('4', 'NOR', 'Lando', 'Norris', 'McLaren', 'FF8000'),
+    ('81', 'PIA', 'Oscar', 'Piastri', 'McLaren', 'FF8000'),
+    ('44', 'HAM', 'Lewis', 'Hamilton', 'Mercedes', '27F4D2'),
+    ('63', 'RUS', 'George', 'Russell', 'Mercedes', '27F4D2'),
+    ('14', 'ALO', 'Fernando', 'Alonso', 'Aston Martin', '229971'),
+    ('18', 'STR', 'Lance', 'Stroll', 'Aston Martin', '229971'),
+    ('10', 'GAS', 'Pierre', 'Gasly', 'Alpine', 'FF87BC'),
+    ('31', 'OCO', 'Esteban', 'Ocon', 'Alpine', 'FF87BC'),
+    ('23', 'ALB', 'Alexander', 'Albon', 'Williams', '64C4FF'),
+    ('2', 'SAR', 'Logan', 'Sargeant', 'Williams', '64C4FF'),
+    ('22', 'TSU', 'Yuki', 'Tsunoda', 'RB', '6692FF'),
+    ('3', 'RIC', 'Daniel', 'Ricciardo', 'RB', '6692FF'),
+    ('77', 'BOT', 'Valtteri', 'Bottas', 'Kick Sauber', '52E252'),
+    ('24', 'ZHO', 'Guanyu', 'Zhou', 'Kick Sauber', '52E252'),
+    ('20', 'MAG', 'Kevin', 'Magnussen', 'Haas F1 Team', 'B6BABD'),
+    ('27', 'HUL', 'Nico', 'Hulkenberg', 'Haas F1 Team', 'B6BABD'),
+]
+
+RACE_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SPRINT_POINTS = [8, 7, 6, 5, 4, 3, 2, 1]
+
+CAR_DATA_INTERVAL = 0.27  # seconds between car data samples, as in the live timing feed
+
+
+class Fixture:
+    """A pickled, fully loaded session; every session() call unpickles a fresh copy"""
+
+    def __init__(self, key, session_bytes, circuit_info, schedule, source):
+        self.key = key
+        self.session_bytes = session_bytes
+        self.circuit_info = circuit_info
+        self.schedule = schedule
+        self.source = source
+
+    def session(self):
+        session = pickle.loads(self.session_bytes)
+        # Everything is loaded already; load() must not reach for the network
+        session.load = lambda **kwargs: None
+        circuit_info = self.circuit_info
+
+        def get_circuit_info():
+            if circuit_info is None:
+                raise fastf1.core.DataNotLoadedError('No circuit info in this fixture')
+            return circuit_info
+
+        session.get_circuit_info = get_circuit_info
+        return session
+
+    def save(self, directory=FIXTURE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        year, round_number, session_type = self.key
+        # Synthetic files are regenerated at will and kept out of git; recordings can be committed
+        kind = '.synthetic' if self.source == 'synthetic' else ''
+        path = os.path.join(directory, f'{year}_{round_number:02d}_{session_type}{kind}.pkl.gz')
+        with gzip.open(path, 'wb', compresslevel=3) as f:
+            pickle.dump({
+                'fastf1': fastf1.__version__,
+                'key': self.key,
+                'source': self.source,
+                'session': self.session_bytes,
+                'circuit_info': self.circuit_info,
+                'schedule': self.schedule,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+
+def load_recorded(directory=FIXTURE_DIR):
+    """Fixtures saved in `directory` for this FastF1 version, by (year, round, session type)"""
+    fixtures = {}
+    if not os.path.isdir(directory):
+        return fixtures
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.pkl.gz'):
+            continue
+        with gzip.open(os.path.join(directory, name), 'rb') as f:
+            data = pickle.load(f)
+        if data['fastf1'] != fastf1.__version__:
+            print(f"Skipping {name}: recorded with FastF1 {data['fastf1']}, running {fastf1.__version__}",
+                  file=sys.stderr)
+            continue
+        key = tuple(data['key'])
+        fixtures[key] = Fixture(key, data['session'], data['circuit_info'], data['schedule'], data['source'])
+    return fixtures
+
+
+def record(year, round_number, session_type, cache_dir='cache'):
+    """Load a real session (needs network access) and return it as a fixture"""
+    os.makedirs(cache_dir, exist_ok=True)
+    fastf1.Cache.enable_cache(cache_dir)
+    session = fastf1.get_session(year, round_number, session_type)
+    session.load(laps=True, telemetry=True, weather=True, messages=True)
+    try:
+        circuit_info = session.get_circuit_info()
+    except Exception:
+        circuit_info = None
+    schedule = fastf1.get_event_schedule(year, include_testing=False)
+    key = (year, round_number, normalize_session_type(session_type))
+    return Fixture(key, pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL), circuit_info, schedule,
+                   'recorded')
+
+
+class FixtureFastF1:
+    """Stands in for the fastf1 module: get_session and get_event_schedule from fixtures"""
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.schedules = {year: fixture.schedule for (year, _, _), fixture in fixtures.items()}
+
+    def get_session(self, year, round_number, session_type):
+        key = (int(year), int(round_number), normalize_session_type(session_type))
+        fixture = self.fixtures.get(key)
+        if fixture is None:
+            raise ValueError(f"No fixture for {key[0]} round {key[1]} {key[2]}")
+        return fixture.session()
+
+    def get_event_schedule(self, year, include_testing=True):
+        if year not in self.schedules:
+            raise ValueError(f"No fixture schedule for {year}")
+        return self.schedules[year]
+
+
+# Synthetic sessions
+
+def _track(length=5400.0, points=2000):
+    """A closed, wiggly loop: x, y in meters and distance along it"""
+    theta = np.linspace(0, 2 * np.pi, points)
+    radius = 1 + 0.25 * np.sin(3 * theta) + 0.1 * np.cos(5 * theta)
+    x, y = radius * np.cos(theta), radius * np.sin(theta)
+    distance = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    scale = length / distance[-1]
+    return x * scale, y * scale, distance * scale
+
+
+def _reference_lap(track_distance):
+    """Car data of one lap at reference pace, sampled every CAR_DATA_INTERVAL seconds"""
+    length = track_distance[-1]
+
+    def speed_at(s):
+        # Six corner/straight cycles per lap between ~90 and ~320 km/h
+        return 205 + 115 * np.cos(2 * np.pi * 6 * s / length + 0.4)
+
+    times, distances = [0.0], [0.0]
+    while distances[-1] < length:
+        distances.append(distances[-1] + speed_at(distances[-1]) / 3.6 * CAR_DATA_INTERVAL)
+        times.append(times[-1] + CAR_DATA_INTERVAL)
+    distances = np.minimum(np.array(distances), length)
+    times = np.array(times)
+    speed = speed_at(distances)
+    accel = np.gradient(speed)
+    gear = np.clip(np.ceil(speed / 42), 1, 8).astype(int)
+    rpm = np.clip(10500 + (speed - gear * 40) * 45, 7000, 12200)
+    throttle = np.where(accel >= 0, 100.0, np.clip(100 + accel * 12, 0, 100))
+    brake = accel < -2.5
+    drs = np.where((speed > 290) & (accel > 0), 12, 1)
+    return {'time': times, 'distance': distances, 'Speed': speed, 'RPM': rpm, 'nGear': gear,
+            'Throttle': throttle, 'Brake': brake, 'DRS': drs}
+
+
+def synthetic_schedule(year=SYNTHETIC_YEAR):
+    """Two events: a conventional weekend and a sprint weekend"""
+    formats = {
+        1: ('conventional', ['Practice 1', 'Practice 2', 'Practice 3', 'Qualifying', 'Race']),
+        2: ('sprint_qualifying', ['Practice 1', 'Sprint Qualifying', 'Sprint', 'Qualifying', 'Race']),
+    }
+    offsets = [pd.Timedelta(days=0, hours=11), pd.Timedelta(days=0, hours=15), pd.Timedelta(days=1, hours=11),
+               pd.Timedelta(days=1, hours=15), pd.Timedelta(days=2, hours=15)]
+    rows = []
+    for round_number, (event_format, sessions) in formats.items():
+        start = pd.Timestamp(year=year, month=3, day=1) + pd.Timedelta(weeks=2 * (round_number - 1))
+        row = {
+            'RoundNumber': round_number,
+            'Country': 'Synthetia',
+            'Location': f'Circuit {round_number}',
+            'OfficialEventName': f'FORMULA 1 SYNTHETIC GRAND PRIX {round_number} {year}',
+            'EventDate': start + pd.Timedelta(days=2),
+            'EventName': f'Synthetic Grand Prix {round_number}',
+            'EventFormat': event_format,
+            'F1ApiSupport': True,
+        }
+        for i, (name, offset) in enumerate(zip(sessions, offsets), start=1):
+            row[f'Session{i}'] = name
+            row[f'Session{i}DateUtc'] = start + offset
+            row[f'Session{i}Date'] = (start + offset).tz_localize('UTC').tz_convert('Etc/GMT-3')
+        rows.append(row)
+    return fastf1.events.EventSchedule(pd.DataFrame(rows), year=year)
+
+
+def _lap_plan(session_type, driver_index):
+    """Per lap: (time factor, pit out, pit in, compound, track status) for one driver"""
+    if session_type in ('Q', 'SQ'):
+        # Six runs of out lap, flying lap, in lap
+        return [(1.35, True, False, 'SOFT', '1'), (1.0, False, False, 'SOFT', '1'),
+                (1.45, False, True, 'SOFT', '1')] * 6
+    laps = 57 if session_type == 'R' else 19
+    stops = {laps // 3 + driver_index % 3, 2 * laps // 3 + driver_index % 4} if session_type == 'R' else set()
+    compounds = ['MEDIUM', 'HARD', 'HARD'] if session_type == 'R' else ['MEDIUM']
+    plan, stint = [], 0
+    for lap in range(1, laps + 1):
+        pit_in = lap in stops
+        pit_out = lap - 1 in stops
+        factor = 1.0 + (0.1 if lap == 1 else 0.0) + (0.25 if pit_in or pit_out else 0.0)
+        status = '4' if laps // 2 <= lap < laps // 2 + 3 else '1'
+        if status == '4':
+            factor += 0.4
+        plan.append((factor, pit_out, pit_in, compounds[stint], status))
+        if pit_in:
+            stint += 1
+    return plan
+
+
+def synthesize(year, round_number, session_type, schedule=None, seed=SEED):
+    """A fully loaded synthetic fastf1.core.Session"""
+    schedule = schedule if schedule is not None else synthetic_schedule(year)
+    rng = np.random.default_rng([seed, round_number, sum(map(ord, session_type))])
+    event = schedule.get_event_by_round(round_number)
+    session = fastf1.core.Session(event, SESSION_NAMES[session_type], f1_api_support=True)
+
+    track_x, track_y, track_distance = _track()
+    reference = _reference_lap(track_distance)
+    base_lap = reference['time'][-1]
+    t0 = session.date - pd.Timedelta(hours=1)
+    start = pd.Timedelta(hours=1)
+
+    lap_rows, car_frames, pos_frames = [], {}, {}
+    for index, (number, abbreviation, first, last, team, color) in enumerate(DRIVERS):
+        pace = 1.0 + 0.0012 * index
+        plan = _lap_plan(session_type, index)
+        factors = np.array([p[0] for p in plan]) * pace * (1 + rng.normal(0, 0.002, len(plan)))
+        lap_times = base_lap * factors
+        lap_starts = start.total_seconds() + np.concatenate(([0.0], np.cumsum(lap_times)[:-1]))
+        if session_type in ('Q', 'SQ'):
+            lap_starts += index * 20.0
+
+        # Car data: the reference lap stretched to every lap's time
+        times = (lap_starts[:, None] + reference['time'][None, :] * factors[:, None]).ravel()
+        car = {
+            'SessionTime': pd.to_timedelta(times, unit='s'),
+            'Speed': np.round((reference['Speed'][None, :] / factors[:, None]).ravel()),
+            'RPM': np.round(np.tile(reference['RPM'], len(plan))),
+            'nGear': np.tile(reference['nGear'], len(plan)),
+            'Throttle': np.round(np.tile(reference['Throttle'], len(plan))),
+            'Brake': np.tile(reference['Brake'], len(plan)),
+            'DRS': np.tile(reference['DRS'], len(plan)),
+        }
+        car = pd.DataFrame(car)
+        car['Date'] = t0 + car['SessionTime']
+        car['Time'] = car['SessionTime'] - car['SessionTime'].iloc[0]
+        car['Source'] = 'car'
+        car_frames[number] = fastf1.core.Telemetry(car, session=session, driver=number)
+
+        # Position data, offset from the car data clock like the live feed
+        lap_distance = np.tile(reference['distance'], len(plan))
+        pos = pd.DataFrame({
+            'SessionTime': pd.to_timedelta(times + 0.11, unit='s'),
+            'X': np.round(np.interp(lap_distance, track_distance, track_x) * 10),
+            'Y': np.round(np.interp(lap_distance, track_distance, track_y) * 10),
+            'Z': np.full(len(times), 120.0),
+            'Status': 'OnTrack',
+        })
+        pos['Date'] = t0 + pos['SessionTime']
+        pos['Time'] = pos['SessionTime'] - pos['SessionTime'].iloc[0]
+        pos['Source'] = 'pos'
+        pos_frames[number] = fastf1.core.Telemetry(pos, session=session, driver=number)
+
+        best = np.inf
+        stint, tyre_life = 1, 0
+        for lap, ((_, pit_out, pit_in, compound, status), lap_time, lap_start) in enumerate(
+                zip(plan, lap_times, lap_starts), start=1):
+            if pit_out and lap > 1:
+                stint, tyre_life = stint + 1, 0
+            tyre_life += 1
+            personal_best = not (pit_out or pit_in) and lap_time < best
+            best = min(best, lap_time) if personal_best else best
+            lap_rows.append({
+                'Time': pd.Timedelta(seconds=lap_start + lap_time),
+                'Driver': abbreviation,
+                'DriverNumber': number,
+                'LapTime': pd.Timedelta(seconds=round(lap_time, 3)),
+                'LapNumber': float(lap),
+                'Stint': float(stint),
+                'PitOutTime': pd.Timedelta(seconds=lap_start) if pit_out else pd.NaT,
+                'PitInTime': pd.Timedelta(seconds=lap_start + lap_time) if pit_in else pd.NaT,
+                'Sector1Time': pd.Timedelta(seconds=round(lap_time * 0.31, 3)),
+                'Sector2Time': pd.Timedelta(seconds=round(lap_time * 0.38, 3)),
+                'Sector3Time': pd.Timedelta(seconds=round(lap_time * 0.31, 3)),
+                'SpeedST': float(reference['Speed'].max() / factors[lap - 1]),
+                'IsPersonalBest': personal_best,
+                'Compound': compound,
+                'TyreLife': float(tyre_life),
+                'FreshTyre': tyre_life == 1,
+                'Team': team,
+                'LapStartTime': pd.Timedelta(seconds=lap_start),
+                'LapStartDate': t0 + pd.Timedelta(seconds=lap_start),
+                'TrackStatus': status,
+                'Deleted': False,
+                'FastF1Generated': False,
+                'IsAccurate': not (pit_out or pit_in),
+            })
+
+    laps = pd.DataFrame(lap_rows)
+    if session_type in ('R', 'S'):
+        laps['Position'] = laps.groupby('LapNumber')['Time'].rank(method='first')
+    laps = fastf1.core.Laps(laps.reindex(columns=list(fastf1.core.Laps._COLUMNS)), session=session)
+
+    results = pd.DataFrame([
+        {'DriverNumber': number, 'BroadcastName': f'{first[0]} {last.upper()}', 'Abbreviation': abbreviation,
+         'DriverId': last.lower(), 'TeamName': team, 'TeamColor': color, 'TeamId': team.lower().replace(' ', '_'),
+         'FirstName': first, 'LastName': last, 'FullName': f'{first} {last}', 'CountryCode': '',
+         'Status': 'Finished'}
+        for number, abbreviation, first, last, team, color in DRIVERS
+    ])
+    if session_type in ('R', 'S'):
+        finish = laps.groupby('DriverNumber')['Time'].max()
+        order = finish.sort_values()
+        results['Position'] = results['DriverNumber'].map({d: float(i) for i, d in enumerate(order.index, 1)})
+        results['Time'] = results['DriverNumber'].map(order - order.iloc[0])
+        results.loc[results['Position'] == 1, 'Time'] = order.iloc[0] - start
+        results['GridPosition'] = rng.permutation(len(DRIVERS)) + 1.0
+        points = RACE_POINTS if session_type == 'R' else SPRINT_POINTS
+        results['Points'] = results['Position'].map(lambda p: float(points[int(p) - 1]) if p <= len(points) else 0.0)
+        results['Laps'] = float(laps['LapNumber'].max())
+    else:
+        best_laps = laps.groupby('DriverNumber')['LapTime'].min().sort_values()
+        results['Position'] = results['DriverNumber'].map({d: float(i) for i, d in enumerate(best_laps.index, 1)})
+        for part, cut in (('Q1', 20), ('Q2', 15), ('Q3', 10)):
+            results[part] = results['DriverNumber'].map(best_laps).where(results['Position'] <= cut)
+    results = results.sort_values('Position').reset_index(drop=True)
+    results['ClassifiedPosition'] = results['Position'].astype(int).astype(str)
+    session._results = fastf1.core.SessionResults(results.reindex(columns=list(fastf1.core.SessionResults._COLUMNS)))
+
+    end = laps['Time'].max()
+    messages = [{'Time': t0 + start - pd.Timedelta(minutes=5), 'Category': 'Flag', 'Message': 'GREEN LIGHT - PIT EXIT OPEN',
+                 'Status': None, 'Flag': 'GREEN', 'Scope': 'Track', 'Sector': np.nan, 'RacingNumber': None, 'Lap': 1}]
+    for lap in range(2, int(laps['LapNumber'].max()), 3):
+        messages.append({'Time': t0 + start + pd.Timedelta(seconds=lap * base_lap), 'Category': 'Other',
+                         'Message': f'CAR {DRIVERS[lap % 20][0]} ({DRIVERS[lap % 20][1]}) TIME {lap} DELETED - TRACK LIMITS',
+                         'Status': None, 'Flag': None, 'Scope': None, 'Sector': np.nan, 'RacingNumber': None,
+                         'Lap': lap})
+    messages.append({'Time': t0 + end, 'Category': 'Flag', 'Message': 'CHEQUERED FLAG', 'Status': None,
+                     'Flag': 'CHEQUERED', 'Scope': 'Track', 'Sector': np.nan, 'RacingNumber': None,
+                     'Lap': int(laps['LapNumber'].max())})
+    session._race_control_messages = pd.DataFrame(messages)
+
+    minutes = pd.to_timedelta(np.arange(0, end.total_seconds() + 60, 60), unit='s')
+    session._weather_data = pd.DataFrame({
+        'Time': minutes, 'AirTemp': 24 + rng.normal(0, 0.3, len(minutes)).cumsum() * 0.05,
+        'Humidity': 45.0, 'Pressure': 1012.0, 'Rainfall': False,
+        'TrackTemp': 38 + rng.normal(0, 0.3, len(minutes)).cumsum() * 0.05,
+        'WindDirection': 180, 'WindSpeed': 1.5,
+    })
+    session._track_status = pd.DataFrame({'Time': [start, end], 'Status': ['1', '1'], 'Message': ['AllClear'] * 2})
+    session._session_status = pd.DataFrame({'Time': [start, end], 'Status': ['Started', 'Finished']})
+    session._session_info = {'Meeting': {'Name': event['EventName'], 'Circuit': {'Key': 900 + round_number,
+                                                                                 'ShortName': event['Location']}}}
+    session._t0_date = t0
+    session._session_start_time = start
+    session._total_laps = int(laps['LapNumber'].max())
+    session._laps = laps
+    session._car_data = car_frames
+    session._pos_data = pos_frames
+
+    # Corners where the reference lap is slowest
+    speed = reference['Speed']
+    minima = np.flatnonzero((speed[1:-1] < speed[:-2]) & (speed[1:-1] <= speed[2:])) + 1
+    corner_distance = reference['distance'][minima]
+    corners = pd.DataFrame({
+        'X': np.interp(corner_distance, track_distance, track_x) * 10,
+        'Y': np.interp(corner_distance, track_distance, track_y) * 10,
+        'Number': np.arange(1, len(minima) + 1),
+        'Letter': '',
+        'Angle': 0.0,
+        'Distance': corner_distance,
+    })
+    circuit_info = fastf1.mvapi.CircuitInfo(corners=corners, marshal_lights=corners.copy(),
+                                            marshal_sectors=corners.copy(), rotation=90.0)
+    return session, circuit_info
+
+
+def synthetic_fixtures(sessions=SYNTHETIC_SESSIONS, seed=SEED):
+    """Synthetic fixtures for the given (year, round, session type) keys"""
+    schedules = {}
+    fixtures = {}
+    for year, round_number, session_type in sessions:
+        schedule = schedules.setdefault(year, synthetic_schedule(year))
+        session, circuit_info = synthesize(year, round_number, session_type, schedule, seed)
+        fixtures[(year, round_number, session_type)] = Fixture(
+            (year, round_number, session_type), pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL),
+            circuit_info, schedule, 'synthetic')
+    return fixtures
+
+
+def load_fixtures(directory=FIXTURE_DIR):
+    """Recorded fixtures if there are any, otherwise the synthetic set"""
+    return load_recorded(directory) or synthetic_fixtures()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record or generate benchmark session fixtures')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help='record a real session (needs network access)')
+    record_parser.add_argument('year', type=int)
+    record_parser.add_argument('round', type=int)
+    record_parser.add_argument('session_type')
+    record_parser.add_argument('--cache-dir', default=os.environ.get('FASTF1_CACHE_DIR', 'cache'))
+    commands.add_parser('synthesize', help='write the synthetic fixtures to disk')
+    parser.add_argument('--dir', default=FIXTURE_DIR, help='fixture directory')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        fixtures = [record(args.year, args.round, args.session_type, args.cache_dir)]
+    else:
+        fixtures = synthetic_fixtures().values()
+    for fixture in fixtures:
+        print(fixture.save(args.dir))
+
+
+if __name__ == '__main__':
+    main()
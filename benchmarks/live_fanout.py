@@ -0,0 +1,207 @@
+"""
+Fan-out load test for the live event stream
+Turns a session fixture (see fixtures.py) into a live-timing recording in the format
+FastF1's SignalR client writes, replays it into a LiveHub at high speed and has many
+subscribers read the event stream at once. Reports delivery latency (publish to
+receipt) and CPU per event, which is what decides how many clients a worker can hold.
+
+    python benchmarks/live_fanout.py --subscribers 2000 --speed 200
+    python benchmarks/live_fanout.py --write-feed feed.txt   # a recording for LIVE_FEED
+
+Subscribers read LiveHub.stream() directly on threads, so the numbers cover the
+hub's fan-out and leave out the HTTP server. Under gunicorn each open stream holds a
+worker thread (or a greenlet with gevent workers).
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import fixtures as session_fixtures
+
+sys.path.insert(0, session_fixtures.REPO_ROOT)
+from live import LiveHub  # noqa: E402
+
+_EVENT_ID = re.compile(rb'^id: (\d+)$', re.MULTILINE)
+
+
+def _laptime(value):
+    if pd.isna(value):
+        return ''
+    seconds = value.total_seconds()
+    minutes, seconds = divmod(seconds, 60)
+    return f'{int(minutes)}:{seconds:06.3f}' if minutes else f'{seconds:.3f}'
+
+
+def _utc(t0, session_time):
+    return (t0 + session_time).strftime('%Y-%m-%dT%H:%M:%S.%f') + 'Z'
+
+
+def feed_messages(session):
+    """A loaded session as time-ordered [topic, data, timestamp] live-timing messages"""
+    t0 = session.t0_date
+    start = session.session_start_time
+    messages = []
+
+    def add(session_time, topic, data):
+        messages.append((session_time, topic, data))
+
+    add(start - pd.Timedelta(minutes=10), 'SessionInfo', session.session_info)
+    add(start - pd.Timedelta(minutes=10), 'DriverList', {
+        row.DriverNumber: {'RacingNumber': row.DriverNumber, 'Tla': row.Abbreviation, 'FullName': row.FullName,
+                           'TeamName': row.TeamName, 'TeamColour': row.TeamColor, 'Line': index}
+        for index, row in enumerate(session.results.itertuples(), 1)})
+    add(start, 'SessionStatus', {'Status': 'Started'})
+    add(start, 'TrackStatus', {'Status': '1', 'Message': 'AllClear'})
+
+    laps = session.laps.sort_values('Time')
+    total_laps = int(laps['LapNumber'].max())
+    leader_times = laps.groupby('LapNumber')['Time'].min()
+    previous = {}
+    current_lap = 0
+    for lap in laps.itertuples():
+        number, lap_number = lap.DriverNumber, int(lap.LapNumber)
+        lap_start = lap.Time - lap.LapTime if pd.notna(lap.LapTime) else lap.Time
+        if lap.Stint != previous.get(number):
+            previous[number] = lap.Stint
+            add(lap_start, 'TimingAppData', {'Lines': {number: {'Stints': {
+                str(int(lap.Stint) - 1): {'Compound': lap.Compound, 'New': 'true', 'TotalLaps': 0}}}}})
+        if pd.notna(lap.Sector1Time):
+            add(lap_start + lap.Sector1Time, 'TimingData', {'Lines': {number: {'Sectors': {
+                '0': {'Value': _laptime(lap.Sector1Time)}, '1': {'Value': ''}, '2': {'Value': ''}}}}})
+        if pd.notna(lap.Sector2Time):
+            add(lap_start + lap.Sector1Time + lap.Sector2Time, 'TimingData', {'Lines': {number: {'Sectors': {
+                '1': {'Value': _laptime(lap.Sector2Time)}}}}})
+
+        line = {'NumberOfLaps': lap_number, 'LastLapTime': {'Value': _laptime(lap.LapTime)},
+                'Sectors': {'2': {'Value': _laptime(lap.Sector3Time)}}}
+        if pd.notna(lap.Position):
+            line['Position'] = str(int(lap.Position))
+            gap = (lap.Time - leader_times[lap.LapNumber]).total_seconds()
+            line['GapToLeader'] = f'+{gap:.3f}' if gap else ''
+        line['InPit'] = pd.notna(lap.PitInTime)
+        add(lap.Time, 'TimingAppData', {'Lines': {number: {'Stints': {
+            str(int(lap.Stint) - 1): {'TotalLaps': int(lap.TyreLife)}}}}})
+        add(lap.Time, 'TimingData', {'Lines': {number: line}})
+        if lap_number > current_lap and lap_number < total_laps:
+            current_lap = lap_number
+            add(lap.Time, 'LapCount', {'CurrentLap': lap_number + 1, 'TotalLaps': total_laps})
+
+    for index, message in enumerate(session.race_control_messages.itertuples()):
+        add(message.Time - t0, 'RaceControlMessages', {'Messages': {str(index): {
+            'Utc': message.Time.strftime('%Y-%m-%dT%H:%M:%S'), 'Lap': message.Lap, 'Category': message.Category,
+            'Message': message.Message, 'Flag': message.Flag, 'Scope': message.Scope}}})
+    for weather in session.weather_data.itertuples():
+        add(weather.Time, 'WeatherData', {'AirTemp': f'{weather.AirTemp:.1f}',
+                                          'TrackTemp': f'{weather.TrackTemp:.1f}',
+                                          'Rainfall': str(int(weather.Rainfall))})
+    add(laps['Time'].max(), 'SessionStatus', {'Status': 'Finished'})
+
+    messages.sort(key=lambda message: message[0])
+    return [[topic, data, _utc(t0, session_time)] for session_time, topic, data in messages]
+
+
+def write_feed(session, path):
+    with open(path, 'w') as f:
+        for message in feed_messages(session):
+            f.write(json.dumps(message, default=str) + '\n')
+    return path
+
+
+def run(feed, subscribers, speed, buffer_events):
+    hub = LiveHub(buffer_events=buffer_events, heartbeat=1)
+    published = {}
+    ingest = hub.ingest
+
+    def timed_ingest(*message):
+        before = hub._last_id
+        ingest(*message)
+        now = time.perf_counter()
+        for event_id in range(before + 1, hub._last_id + 1):
+            published[event_id] = now
+
+    hub.ingest = timed_ingest
+    received = [[] for _ in range(subscribers)]
+    ready = threading.Barrier(subscribers + 1)
+
+    def subscribe(samples):
+        stream = hub.stream()
+        next(stream)  # retry hint
+        ready.wait()
+        for chunk in stream:
+            now = time.perf_counter()
+            samples.extend((int(event_id), now) for event_id in _EVENT_ID.findall(chunk))
+
+    threads = [threading.Thread(target=subscribe, args=(samples,), daemon=True) for samples in received]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    hub.start(feed, follow=False, speed=speed)
+    hub._thread.join()
+    time.sleep(0.5)  # let subscribers drain
+    elapsed = time.perf_counter() - started
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    hub.stop()
+
+    latencies = np.array([(at - published[event_id]) * 1000 for samples in received
+                          for event_id, at in samples if event_id in published])
+    cpu = usage.ru_utime - usage_before.ru_utime + usage.ru_stime - usage_before.ru_stime
+    stats = hub.stats()
+    return {
+        'subscribers': subscribers,
+        'speed': speed,
+        'messages': stats['messages'],
+        'events': stats['events_published'],
+        'deliveries': int(len(latencies)),
+        'seconds': round(elapsed, 2),
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+        'latency_p99_ms': round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+        'latency_max_ms': round(float(latencies.max()), 2) if len(latencies) else None,
+        'cpu_ms_per_event': round(cpu * 1000 / max(stats['events_published'], 1), 3),
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test live event fan-out with a replayed feed')
+    parser.add_argument('--fixtures', default=session_fixtures.FIXTURE_DIR)
+    parser.add_argument('--session', default=None, help='fixture key, e.g. 2024/1/R (default: first race)')
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--speed', type=float, default=100, help='replay speed (0: as fast as possible)')
+    parser.add_argument('--buffer-events', type=int, default=1000)
+    parser.add_argument('--write-feed', help='only write the recording to this file')
+    args = parser.parse_args()
+
+    fixtures = session_fixtures.load_fixtures(args.fixtures)
+    if args.session:
+        year, round_number, session_type = args.session.split('/')
+        key = (int(year), int(round_number), session_type)
+    else:
+        key = next(key for key in sorted(fixtures) if key[2] == 'R')
+    session = fixtures[key].session()
+
+    if args.write_feed:
+        print(write_feed(session, args.write_feed))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        feed = write_feed(session, os.path.join(directory, 'feed.txt'))
+        result = run(feed, args.subscribers, args.speed or None, args.buffer_events)
+    print(json.dumps({'session': '/'.join(map(str, key)), **result}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
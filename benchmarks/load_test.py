@@ -0,0 +1,219 @@
+"""
+Load test: /api/health latency while cold session loads are in flight
+
+Starts the app under gunicorn (gthread, one worker) once per serving mode, fires 50
+concurrent requests for 50 different cold sessions and keeps probing /api/health until
+every session has been served. In sync mode request threads block on their load, so the
+health check queues behind them; in async mode they hand back 202 Accepted and the
+health check stays flat.
+
+There is no network access to the F1 timing servers in CI, so by default session loads
+are simulated (a sleep for the download plus some pandas work for the parsing) inside
+the gunicorn worker. Point --url at a running server to test real FastF1 loads instead.
+
+Run from the repository root:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --url http://localhost:5000 --year 2021
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _SimulatedSession:
+    """Stands in for fastf1.core.Session: slow load(), small results table"""
+
+    def __init__(self, year, round_number, session_type, load_seconds):
+        self.event = pd.Series({'year': year, 'RoundNumber': round_number})
+        self.name = session_type
+        self.load_seconds = load_seconds
+        self._results = None
+
+    def load(self, **kwargs):
+        time.sleep(self.load_seconds)  # download
+        frame = pd.DataFrame(np.random.rand(200_000, 8))  # parse
+        frame.sort_values(0).describe()
+        self._results = pd.DataFrame({
+            'Position': np.arange(1, 21, dtype=float),
+            'DriverNumber': [str(n) for n in range(1, 21)],
+            'Abbreviation': [f'D{n:02d}' for n in range(1, 21)],
+        })
+
+    @property
+    def results(self):
+        return self._results
+
+
+def create_simulated_app():
+    """gunicorn entry point: the real app with FastF1 session loads simulated"""
+    sys.path.insert(0, REPO_ROOT)
+    import session_cache
+
+    load_seconds = float(os.environ.get('SIMULATED_LOAD_SECONDS', 3))
+
+    class _FastF1:
+        @staticmethod
+        def get_session(year, round_number, session_type):
+            return _SimulatedSession(year, round_number, session_type, load_seconds)
+
+    session_cache.fastf1 = _FastF1
+    import app
+    return app.app
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(url, timeout=60):
+    """Return (status, headers, body, seconds)"""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            body = response.read()
+            return response.status, response.headers, body, time.perf_counter() - started
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read(), time.perf_counter() - started
+
+
+def _fetch_session(base_url, path, deadline):
+    """Request a session the way the frontend does: on 202 wait Retry-After and ask again"""
+    started = time.perf_counter()
+    accepted = 0
+    while time.perf_counter() < deadline:
+        status, headers, _, _ = _get(base_url + path, timeout=max(deadline - time.perf_counter(), 1))
+        if status != 202:
+            return status, accepted, time.perf_counter() - started
+        accepted += 1
+        time.sleep(float(headers.get('Retry-After', 2)))
+    return None, accepted, time.perf_counter() - started
+
+
+def _percentiles(samples):
+    if not samples:
+        return 'no samples'
+    ms = np.array(samples) * 1000
+    return (f"p50 {np.percentile(ms, 50):7.1f} ms   p95 {np.percentile(ms, 95):7.1f} ms   "
+            f"max {ms.max():7.1f} ms   ({len(ms)} probes)")
+
+
+def run(base_url, paths, baseline_seconds=2.0, time_limit=600):
+    """Probe /api/health before and during the cold loads; returns a summary dict"""
+    baseline = []
+    end = time.perf_counter() + baseline_seconds
+    while time.perf_counter() < end:
+        baseline.append(_get(base_url + '/api/health')[3])
+        time.sleep(0.05)
+
+    deadline = time.perf_counter() + time_limit
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(paths)) as clients:
+        futures = [clients.submit(_fetch_session, base_url, path, deadline) for path in paths]
+
+        during = []
+        while not all(f.done() for f in futures):
+            during.append(_get(base_url + '/api/health', timeout=time_limit)[3])
+            time.sleep(0.05)
+        results = [f.result() for f in futures]
+
+    return {
+        'baseline': baseline,
+        'during': during,
+        'elapsed': time.perf_counter() - started,
+        'ok': sum(1 for status, _, _ in results if status == 200),
+        'accepted': sum(accepted for _, accepted, _ in results),
+        'load_times': [seconds for _, _, seconds in results],
+    }
+
+
+def _report(title, summary, loads):
+    print(f"\n{title}")
+    print(f"  /api/health idle:          {_percentiles(summary['baseline'])}")
+    print(f"  /api/health during loads:  {_percentiles(summary['during'])}")
+    print(f"  sessions served: {summary['ok']}/{loads} in {summary['elapsed']:.1f}s "
+          f"(202 responses: {summary['accepted']}, "
+          f"slowest client {max(summary['load_times']):.1f}s)")
+
+
+def _serve(mode, args):
+    """Start gunicorn with the simulated app in the given serving mode"""
+    port = _free_port()
+    env = dict(os.environ,
+               SERVING_MODE=mode,
+               SIMULATED_LOAD_SECONDS=str(args.load_seconds),
+               SESSION_LOAD_WORKERS=str(args.load_workers),
+               SESSION_CACHE_MAX_ENTRIES=str(args.loads),
+               PRECOMPUTED_DIR=tempfile.mkdtemp(prefix='loadtest-store-'),
+               PREFETCH_ENABLED='false')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--pythonpath', f'{REPO_ROOT},{os.path.dirname(__file__)}',
+         '--chdir', tempfile.mkdtemp(prefix='loadtest-'),
+         '--worker-class', 'gthread', '--workers', '1', '--threads', str(args.threads),
+         '--timeout', '600', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+         'load_test:create_simulated_app()'],
+        env=env)
+
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            if _get(base_url + '/api/health', timeout=1)[0] == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Health-check latency under concurrent cold session loads')
+    parser.add_argument('--url', help='test a running server instead of simulated loads')
+    parser.add_argument('--year', type=int, default=2021, help='season to request with --url')
+    parser.add_argument('--loads', type=int, default=50, help='concurrent cold session requests')
+    parser.add_argument('--modes', default='sync,async', help='serving modes to compare (simulated)')
+    parser.add_argument('--load-seconds', type=float, default=3, help='simulated load time')
+    parser.add_argument('--load-workers', type=int, default=4, help='SESSION_LOAD_WORKERS')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    args = parser.parse_args()
+
+    if args.url:
+        # Distinct sessions of one season: every round's race, then qualifying, ...
+        paths = [f'/api/session/{args.year}/{round_number}/{session_type}'
+                 for session_type in ('R', 'Q', 'FP1', 'FP2', 'FP3')
+                 for round_number in range(1, 23)][:args.loads]
+        _report(f"{args.url}: {args.loads} cold session requests", run(args.url.rstrip('/'), paths), args.loads)
+        return
+
+    paths = [f'/api/session/{2019 + i // 10}/{i % 10 + 1}/R' for i in range(args.loads)]
+    print(f"{args.loads} cold session loads of {args.load_seconds:.0f}s each, "
+          f"{args.load_workers} load workers, gunicorn gthread x{args.threads}")
+    for mode in args.modes.split(','):
+        process, base_url = _serve(mode, args)
+        try:
+            summary = run(base_url, paths)
+            stats = json.loads(_get(base_url + '/api/cache/stats')[2])
+        finally:
+            process.terminate()
+            process.wait()
+        _report(f"SERVING_MODE={mode}", summary, args.loads)
+        print(f"  session loads: {stats['loads']}, coalesced requests: {stats['coalesced']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark: column-wise serializer vs the old iterrows() loops
+Uses synthetic frames shaped like a full race's laps (~1,200 rows) and car data (~500k rows)
+
+Run from the repository root:
+    python benchmarks/serialization_benchmark.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payloads import LAP_COLUMNS, TELEMETRY_COLUMNS  # noqa: E402
+from serializers import serialize_frame, dumps  # noqa: E402
+
+
+def make_laps(drivers=20, laps_per_driver=60, seed=0):
+    rng = np.random.default_rng(seed)
+    n = drivers * laps_per_driver
+
+    def times(mean, spread, missing):
+        values = pd.to_timedelta(rng.normal(mean, spread, n), unit='s')
+        return values.where(rng.random(n) > missing)
+
+    return pd.DataFrame({
+        'Time': pd.to_timedelta(np.arange(n) * 5.0 + 300, unit='s'),
+        'Driver': np.repeat([f'D{i:02d}' for i in range(drivers)], laps_per_driver),
+        'DriverNumber': np.repeat([str(i + 1) for i in range(drivers)], laps_per_driver),
+        'LapTime': times(92, 2, 0.05),
+        'LapNumber': np.tile(np.arange(1, laps_per_driver + 1), drivers).astype(float),
+        'Stint': rng.integers(1, 4, n).astype(float),
+        'PitOutTime': times(600, 300, 0.95),
+        'PitInTime': times(600, 300, 0.95),
+        'Sector1Time': times(28, 1, 0.05),
+        'Sector2Time': times(35, 1, 0.05),
+        'Sector3Time': times(29, 1, 0.05),
+        'Compound': rng.choice(['SOFT', 'MEDIUM', 'HARD'], n),
+        'TyreLife': rng.integers(1, 40, n).astype(float),
+        'TrackStatus': rng.choice(['1', '12', '4'], n),
+        'IsPersonalBest': rng.random(n) > 0.8,
+    })
+
+
+def make_car_data(n=500_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'SessionTime': pd.to_timedelta(np.arange(n) * 0.24, unit='s'),
+        'Speed': rng.uniform(80, 330, n),
+        'RPM': rng.uniform(8000, 12500, n),
+        'nGear': rng.integers(1, 9, n),
+        'Throttle': rng.uniform(0, 100, n),
+        'Brake': rng.random(n) > 0.8,
+        'DRS': rng.choice([0, 1, 8, 10, 12, 14], n),
+        'Distance': np.cumsum(rng.uniform(5, 22, n)),
+    })
+
+
+def legacy_laps(laps):
+    """The per-row loop get_laps used before the column-wise serializer"""
+    def format_timedelta(td):
+        if pd.isna(td):
+            return None
+        total_seconds = td.total_seconds()
+        minutes = int(total_seconds // 60)
+        seconds = total_seconds % 60
+        if minutes > 0:
+            return f"{minutes}:{seconds:06.3f}"
+        else:
+            return f"{seconds:06.3f}"
+
+    lap_data = []
+    for idx, lap in laps.iterrows():
+        lap_data.append({
+            'time': str(lap['Time']) if pd.notna(lap['Time']) else None,
+            'driver': lap['Driver'],
+            'driver_number': str(lap['DriverNumber']),
+            'lap_time': format_timedelta(lap['LapTime']),
+            'lap_number': int(lap['LapNumber']) if pd.notna(lap['LapNumber']) else None,
+            'stint': int(lap['Stint']) if pd.notna(lap['Stint']) else None,
+            'pit_out_time': str(lap['PitOutTime']) if pd.notna(lap['PitOutTime']) else None,
+            'pit_in_time': str(lap['PitInTime']) if pd.notna(lap['PitInTime']) else None,
+            'sector1_time': format_timedelta(lap['Sector1Time']),
+            'sector2_time': format_timedelta(lap['Sector2Time']),
+            'sector3_time': format_timedelta(lap['Sector3Time']),
+            'compound': lap['Compound'] if pd.notna(lap['Compound']) else None,
+            'tyre_life': int(lap['TyreLife']) if pd.notna(lap['TyreLife']) else None,
+            'track_status': str(lap['TrackStatus']) if pd.notna(lap['TrackStatus']) else None,
+            'is_personal_best': bool(lap['IsPersonalBest']) if pd.notna(lap['IsPersonalBest']) else False,
+        })
+    return lap_data
+
+
+def legacy_telemetry(telemetry):
+    """The per-row loop get_telemetry used before the column-wise serializer"""
+    telemetry_data = []
+    for idx, row in telemetry.iterrows():
+        telemetry_data.append({
+            'session_time': str(row['SessionTime']) if pd.notna(row['SessionTime']) else None,
+            'speed': int(row['Speed']) if pd.notna(row['Speed']) else None,
+            'rpm': int(row['RPM']) if pd.notna(row['RPM']) else None,
+            'gear': int(row['nGear']) if pd.notna(row['nGear']) else None,
+            'throttle': int(row['Throttle']) if pd.notna(row['Throttle']) else None,
+            'brake': bool(row['Brake']) if pd.notna(row['Brake']) else False,
+            'drs': int(row['DRS']) if pd.notna(row['DRS']) else None,
+        })
+    return telemetry_data
+
+
+def best_of(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def compare(label, frame, legacy, columns, repeat):
+    """Time the legacy loop against the production column spec from payloads.py"""
+    old_time, old = best_of(lambda: legacy(frame), repeat)
+    new_time, new = best_of(lambda: dumps(serialize_frame(frame, columns)), repeat)
+    # The spec may have grown fields the legacy loop never sent (telemetry distance)
+    shared = [column for column in columns if column.name in old[0]]
+    assert dumps(old) == dumps(serialize_frame(frame, shared)), \
+        f"{label}: serializer output differs from the legacy loop"
+    print(f"{label:<28} {len(frame):>8} rows   legacy {old_time * 1000:9.1f} ms   "
+          f"columnar {new_time * 1000:8.1f} ms   {old_time / new_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    compare('laps (full race)', make_laps(), legacy_laps, LAP_COLUMNS, repeat=5)
+    compare('car data (full session)', make_car_data(), legacy_telemetry, TELEMETRY_COLUMNS, repeat=1)
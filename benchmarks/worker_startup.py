@@ -0,0 +1,230 @@
+"""
+Startup time and memory of gunicorn workers, with and without preloading
+Runs the real app under gunicorn (gunicorn.conf.py) with FastF1 replaced by the
+session fixtures (see fixtures.py), once with PRELOAD_APP=true and once with false,
+and reports for each:
+
+    listening_s     launch until /api/health answers
+    workers_s       launch until every worker has answered a request
+    warm_s          launch until every worker has served the hot sessions' laps
+    first_hit_ms    latency of each worker's first request for a hot session
+    memory          RSS, PSS and USS of the master and each worker afterwards (PSS
+                    splits shared pages between the processes sharing them, so the
+                    total PSS is what the host really spends)
+
+    python benchmarks/worker_startup.py --workers 4
+    python benchmarks/worker_startup.py --modes preload --sessions 2024/1/R
+
+Each worker is reached over its own keep-alive connection: a connection is opened,
+asked for /api/cache/stats (which names the worker's pid) and kept if that worker
+has no connection yet.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import fixtures as session_fixtures
+
+REPO_ROOT = session_fixtures.REPO_ROOT
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODES = ('preload', 'no-preload')
+
+
+def fixture_app():
+    """gunicorn app factory: the bench app over the fixtures in BENCH_FIXTURE_DIR"""
+    import bench
+    fixtures = session_fixtures.load_recorded(os.environ['BENCH_FIXTURE_DIR'])
+    return bench.create_app(fixtures, os.environ['BENCH_STORE_DIR'], os.environ['BENCH_CACHE_DIR']).app
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(connection, path):
+    started = time.perf_counter()
+    connection.request('GET', path)
+    response = connection.getresponse()
+    body = response.read()
+    return response.status, body, (time.perf_counter() - started) * 1000
+
+
+def _memory(pid):
+    usage = {'rss': 0, 'pss': 0, 'uss': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            key = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}.get(name)
+            if key:
+                usage[key] += int(value.split()[0]) * 1024
+    return {key: round(value / 1e6, 1) for key, value in usage.items()}
+
+
+def _children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def _connect_workers(port, workers, deadline):
+    """{pid: keep-alive connection} with one connection per worker"""
+    connections = {}
+    while len(connections) < workers:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Only {len(connections)} of {workers} workers answered")
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+        try:
+            status, body, _ = _get(connection, '/api/cache/stats')
+        except OSError:
+            connection.close()
+            time.sleep(0.05)
+            continue
+        pid = json.loads(body)['pid'] if status == 200 else None
+        if pid is None or pid in connections:
+            connection.close()
+        else:
+            connections[pid] = connection
+    return connections
+
+
+def run(mode, workers, sessions, data, fixture_dir, timeout):
+    port = _free_port()
+    store_dir = tempfile.mkdtemp(prefix='bench-store-')
+    cache_dir = tempfile.mkdtemp(prefix='bench-cache-')
+    env = {
+        **os.environ,
+        'PRELOAD_APP': 'true' if mode == 'preload' else 'false',
+        'PRELOAD_SESSIONS': ','.join(sessions),
+        'PRELOAD_DATA': data,
+        'WEB_CONCURRENCY': str(workers),
+        'PORT': str(port),
+        'BENCH_FIXTURE_DIR': fixture_dir,
+        'BENCH_STORE_DIR': store_dir,
+        'BENCH_CACHE_DIR': cache_dir,
+        'PYTHONWARNINGS': 'ignore::FutureWarning',
+    }
+    env.pop('GUNICORN_PRELOAD', None)
+    command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_ROOT, 'gunicorn.conf.py'),
+               '--chdir', BENCHMARKS_DIR, '--worker-class', 'gthread', '--threads', '8',
+               '--timeout', str(timeout), '--keep-alive', str(timeout), 'worker_startup:fixture_app()']
+    log = tempfile.TemporaryFile()
+    started = time.monotonic()
+    server = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = started + timeout
+        while True:
+            if server.poll() is not None or time.monotonic() > deadline:
+                log.seek(0)
+                raise RuntimeError(f"gunicorn did not come up:\n{log.read().decode(errors='replace')[-4000:]}")
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+                status, _, _ = _get(connection, '/api/health')
+                connection.close()
+                if status == 200:
+                    break
+            except OSError:
+                time.sleep(0.05)
+        listening = time.monotonic() - started
+
+        connections = _connect_workers(port, workers, deadline)
+        answered = time.monotonic() - started
+
+        first_hits = {}
+        for pid, connection in connections.items():
+            for key in sessions:
+                status, _, elapsed = _get(connection, f'/api/laps/{key}')
+                if status != 200:
+                    raise RuntimeError(f"/api/laps/{key} answered {status}")
+                first_hits.setdefault(key, []).append(round(elapsed, 1))
+        warm = time.monotonic() - started
+
+        memory = {'master': _memory(server.pid)}
+        for index, pid in enumerate(sorted(_children(server.pid))):
+            memory[f'worker {index + 1}'] = _memory(pid)
+        for connection in connections.values():
+            connection.close()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+        shutil.rmtree(store_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    worker_memory = [usage for name, usage in memory.items() if name != 'master']
+    return {
+        'mode': mode,
+        'workers': workers,
+        'listening_s': round(listening, 2),
+        'workers_s': round(answered, 2),
+        'warm_s': round(warm, 2),
+        'first_hit_ms': first_hits,
+        'memory_mb': memory,
+        'worker_rss_mb_avg': round(sum(u['rss'] for u in worker_memory) / len(worker_memory), 1),
+        'worker_uss_mb_avg': round(sum(u['uss'] for u in worker_memory) / len(worker_memory), 1),
+        'total_pss_mb': round(sum(u['pss'] for u in memory.values()), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure worker startup and memory with and without preloading')
+    parser.add_argument('--fixtures', default=session_fixtures.FIXTURE_DIR,
+                        help='recorded fixture directory (synthetic fixtures if it has none)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modes', default=','.join(MODES), help=f"comma-separated: {', '.join(MODES)}")
+    parser.add_argument('--sessions', help='hot sessions, e.g. 2024/1/R,2024/2/R (default: every race fixture)')
+    parser.add_argument('--data', default='laps', help='PRELOAD_DATA slices')
+    parser.add_argument('--timeout', type=int, default=600, help='seconds to wait for gunicorn')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    fixtures = session_fixtures.load_recorded(args.fixtures)
+    fixture_dir = args.fixtures
+    temporary = None
+    if not fixtures:
+        # Workers read fixtures from disk, so write the synthetic set once up front
+        temporary = fixture_dir = tempfile.mkdtemp(prefix='bench-fixtures-')
+        fixtures = session_fixtures.synthetic_fixtures()
+        for fixture in fixtures.values():
+            fixture.save(fixture_dir)
+    sessions = [s.strip() for s in args.sessions.split(',')] if args.sessions else \
+        [f'{year}/{round_number}/{session_type}' for year, round_number, session_type in sorted(fixtures)
+         if session_type == 'R']
+
+    results = []
+    try:
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            if mode not in MODES:
+                parser.error(f"Unknown mode: {mode}")
+            row = run(mode, args.workers, sessions, args.data, fixture_dir, args.timeout)
+            results.append(row)
+            print(f"{mode:<12}listening {row['listening_s']:6.2f}s  workers {row['workers_s']:6.2f}s  "
+                  f"warm {row['warm_s']:6.2f}s  worker RSS {row['worker_rss_mb_avg']:7.1f} MB  "
+                  f"USS {row['worker_uss_mb_avg']:7.1f} MB  total PSS {row['total_pss_mb']:7.1f} MB",
+                  file=sys.stderr)
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    output = json.dumps({'sessions': sessions, 'data': args.data, 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
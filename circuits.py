@@ -0,0 +1,280 @@
+"""
+Circuit layouts: track outline, corners and lap length, built once per layout
+A layout comes from the position data of a race's fastest lap. The outline is reduced
+to a fixed point budget with Douglas-Peucker, and the lap length is the distance the car
+covered on that lap (the old laps['Distance'] lookup never had a column to read).
+
+Layouts are stored per circuit, not per race, as <store>/circuits/<circuit_id>.json.gz,
+so /api/circuit for a later season (or a race that hasn't happened yet) reads a small
+file instead of loading a session. A circuit keeps a new layout only when a race's
+outline is more than LAYOUT_TOLERANCE_M away from every stored one (a new chicane, a
+reprofiled corner); otherwise the race's year is added to the matching layout.
+"""
+
+import logging
+import os
+import threading
+import unicodedata
+
+import fastf1.core
+import numpy as np
+import pandas as pd
+
+from file_lock import lock
+from payloads import PayloadUnavailable
+from precomputed import read_payload, write_payload
+
+logger = logging.getLogger(__name__)
+
+# Outline points kept after simplification; ~15 m between points on a 5 km track
+# where it bends, far fewer along the straights
+MAX_POINTS = 400
+
+# Outlines further apart than this (meters, at any point) are different layouts
+LAYOUT_TOLERANCE_M = 30
+
+CIRCUITS_DIR = 'circuits'
+
+
+def circuit_id(location):
+    """URL-safe id of a circuit from the schedule's Location ('São Paulo' -> 'sao-paulo')"""
+    text = unicodedata.normalize('NFKD', str(location)).encode('ascii', 'ignore').decode()
+    words = ''.join(c if c.isalnum() else ' ' for c in text.lower()).split()
+    return '-'.join(words)
+
+
+def simplify(x, y, max_points):
+    """
+    Douglas-Peucker simplification of a polyline to at most `max_points` points
+    Each point is ranked by the tolerance at which Douglas-Peucker would still keep it
+    (never above the rank of the split that contains it), and the best-ranked points
+    survive: the result is Douglas-Peucker with the smallest tolerance that fits.
+    Returns: indices of the kept points, in order
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    rank = np.full(n, -1.0)
+    rank[0] = rank[-1] = np.inf
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        first, last, ceiling = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        chord = np.hypot(dx, dy)
+        if chord > 0:
+            distance = np.abs(dx * py - dy * px) / chord
+        else:
+            # A closed lap starts and ends at the same point
+            distance = np.hypot(px, py)
+        index = int(np.argmax(distance))
+        split = first + 1 + index
+        rank[split] = min(float(distance[index]), ceiling)
+        stack.append((first, split, rank[split]))
+        stack.append((split, last, rank[split]))
+    return np.sort(np.argsort(-rank, kind='stable')[:max_points])
+
+
+def _distance_to_outline(x, y, outline):
+    """Largest distance from any point (x, y) to the polyline `outline` (meters)"""
+    ax, ay = np.asarray(outline['x'][:-1]), np.asarray(outline['y'][:-1])
+    bx, by = np.asarray(outline['x'][1:]), np.asarray(outline['y'][1:])
+    dx, dy = bx - ax, by - ay
+    lengths = np.maximum(dx ** 2 + dy ** 2, 1e-9)
+    # Points along rows, segments along columns
+    t = np.clip(((x[:, None] - ax) * dx + (y[:, None] - ay) * dy) / lengths, 0, 1)
+    gaps = np.hypot(ax + t * dx - x[:, None], ay + t * dy - y[:, None])
+    return float(gaps.min(axis=1).max())
+
+
+def same_layout(a, b, tolerance=LAYOUT_TOLERANCE_M):
+    """Whether two layouts' outlines stay within `tolerance` meters of each other"""
+    ax, ay = np.asarray(a['outline']['x']), np.asarray(a['outline']['y'])
+    bx, by = np.asarray(b['outline']['x']), np.asarray(b['outline']['y'])
+    return max(_distance_to_outline(ax, ay, b['outline']),
+               _distance_to_outline(bx, by, a['outline'])) <= tolerance
+
+
+def _markers(frame):
+    """
+    Corner or marshal sector rows of FastF1's CircuitInfo as plain records
+    Positions in meters like the outline; distances (along the reference lap's
+    telemetry) are already in car-data meters.
+    """
+    markers = []
+    for row in frame.itertuples():
+        letter = getattr(row, 'Letter', '')
+        angle = getattr(row, 'Angle', np.nan)
+        distance = getattr(row, 'Distance', np.nan)
+        markers.append({
+            'number': int(row.Number),
+            'letter': letter if isinstance(letter, str) else '',
+            'x': round(float(row.X) / 10, 1),
+            'y': round(float(row.Y) / 10, 1),
+            'angle': round(float(angle), 1) if pd.notna(angle) else None,
+            'distance': round(float(distance), 1) if pd.notna(distance) else None,
+        })
+    return markers
+
+
+def build_layout(session, max_points=MAX_POINTS):
+    """
+    Layout of the circuit a loaded race was run on (needs laps, car and position data)
+    Returns: outline (x, y in meters and distance along the lap), corners, marshal
+    sectors, rotation and lap length
+    """
+    try:
+        lap = session.laps.pick_fastest()
+        if lap is None or lap.empty:
+            raise PayloadUnavailable('Circuit data is not available for this session yet.')
+        pos = lap.get_pos_data()
+        car = lap.get_car_data()
+    except fastf1.core.DataNotLoadedError:
+        raise PayloadUnavailable('Circuit data is not available for this session yet.')
+
+    # Position data is in 1/10 m; drop gaps and samples where the car didn't move
+    xy = pos[['X', 'Y']].dropna().to_numpy(dtype='float64') / 10
+    if len(xy):
+        xy = xy[np.concatenate(([True], np.any(np.diff(xy, axis=0) != 0, axis=1)))]
+    if len(xy) < 10:
+        raise PayloadUnavailable('Circuit data is not available for this session yet.')
+    x, y = xy[:, 0], xy[:, 1]
+    path = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+
+    # Distance driven (speed over time) is the lap length; the position trace only
+    # stands in when there is no car data
+    lap_length = float(car.add_distance()['Distance'].iloc[-1]) if len(car) else float('nan')
+    if not np.isfinite(lap_length) or lap_length <= 0:
+        lap_length = float(path[-1] + np.hypot(x[0] - x[-1], y[0] - y[-1]))
+    # Outline distances on the same scale as the corners' (which follow car data)
+    scale = lap_length / path[-1] if path[-1] else 1.0
+
+    keep = simplify(x, y, max_points)
+    layout = {
+        'lap_length_m': round(lap_length, 1),
+        'rotation': None,
+        'corners': [],
+        'marshal_sectors': [],
+        'outline': {
+            'x': np.round(x[keep], 1).tolist(),
+            'y': np.round(y[keep], 1).tolist(),
+            'distance': np.round(path[keep] * scale, 1).tolist(),
+        },
+        'source_points': int(len(x)),
+        'built_from': {
+            'year': int(session.event.year),
+            'round': int(session.event.RoundNumber),
+            'driver': str(lap['Driver']),
+            'lap_number': int(lap['LapNumber']),
+        },
+    }
+
+    try:
+        info = session.get_circuit_info()
+    except Exception as e:
+        # Corner data comes from a separate API; the outline is useful without it
+        logger.warning(f"No corner data for {session.event.year} {session.event.EventName}: {str(e)}")
+    else:
+        layout['rotation'] = float(info.rotation)
+        layout['corners'] = _markers(info.corners)
+        layout['marshal_sectors'] = _markers(info.marshal_sectors)
+    return layout
+
+
+class CircuitStore:
+    """Layouts by circuit id, shared by the app and ingest (which may run in parallel)"""
+
+    def __init__(self, root):
+        self.root = os.path.join(root, CIRCUITS_DIR)
+        self._lock = threading.Lock()
+        self._cache = {}  # circuit id -> (mtime, layouts)
+
+    def path(self, circuit_id):
+        return os.path.join(self.root, f'{circuit_id}.json.gz')
+
+    def layouts(self, circuit_id):
+        """Every stored layout of a circuit, oldest first (re-read only when the file changes)"""
+        path = self.path(circuit_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            cached = self._cache.get(circuit_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        stored = read_payload(path)
+        layouts = stored['layouts'] if stored else []
+        with self._lock:
+            self._cache[circuit_id] = (mtime, layouts)
+        return layouts
+
+    def layout(self, circuit_id, year):
+        """
+        The layout a circuit had in `year`, or None if it can't be known without a session
+        That is the one seen that year, or else the one seen most recently before it (a
+        one-off layout isn't picked over the main one that was used again after it),
+        marked 'inferred': the track may have changed since, which only that year's race
+        can tell. Earlier seasons than any stored layout may have used another one.
+        """
+        earlier, last_seen = None, None
+        for layout in self.layouts(circuit_id):
+            if year in layout['years']:
+                return layout
+            before = [seen for seen in layout['years'] if seen < year]
+            if before and (last_seen is None or max(before) > last_seen):
+                earlier, last_seen = layout, max(before)
+        return {**earlier, 'inferred': True} if earlier is not None else None
+
+    def add(self, circuit_id, layout, year):
+        """
+        Record that a circuit had this layout in `year`
+        Returns: the stored layout, which is an earlier one if the outlines match
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, '.lock'), 'w') as lock_file:
+            # Ingest workers may add races of the same circuit at the same time
+            lock(lock_file)
+            stored = read_payload(self.path(circuit_id)) or {'circuit_id': circuit_id, 'layouts': []}
+            layouts = stored['layouts']
+            match = next((existing for existing in layouts if same_layout(existing, layout)), None)
+            if match is None:
+                match = {**layout, 'years': []}
+                layouts.append(match)
+                logger.info(f"New layout for circuit {circuit_id} from {year} "
+                            f"({layout['lap_length_m'] / 1000:.3f} km)")
+            elif year in match['years']:
+                return match
+            match['years'] = sorted({*match['years'], year})
+            layouts.sort(key=lambda existing: existing['years'][0])
+            write_payload(self.path(circuit_id), stored)
+        return match
+
+
+def circuit_payload(circuit_id, layout, event):
+    """Data for /api/circuit from a stored layout and the event's schedule record"""
+    return {
+        'circuit_id': circuit_id,
+        'circuit_info': {
+            'rotation': layout['rotation'],
+            'corners': layout['corners'],
+            'marshal_sectors': layout['marshal_sectors'],
+        },
+        'event_info': {
+            'location': event['location'],
+            'country': event['country'],
+            'event_name': event['event_name'],
+            'event_format': event['event_format'],
+            'official_name': event.get('official_name'),
+        },
+        'lap_length_km': round(layout['lap_length_m'] / 1000, 3),
+        'track': {
+            **layout['outline'],
+            'points': len(layout['outline']['x']),
+            'layout_years': layout['years'],
+            'built_from': layout['built_from'],
+            'inferred': layout.get('inferred', False),
+        },
+    }
@@ -0,0 +1,136 @@
+"""
+Columnar MessagePack encoding for telemetry and lap data
+Clients that send `Accept: application/vnd.msgpack` get each column as one packed,
+little-endian typed array instead of a JSON object per row: no repeated keys, and
+times as integer milliseconds instead of timedelta strings. JSON stays the default.
+
+A column is a map:
+    {'type': 'int32' | 'float32' | 'uint8', 'data': <bytes>, 'unit': 'ms' (times only),
+     'missing': <one uint8 per row, 1 where the value is missing> (only if any are)}
+or, for text columns, {'type': 'string', 'data': [str or None, ...]}.
+Missing floats are NaN. In JavaScript a numeric column is e.g.
+`new Int32Array(data.slice().buffer)` (slice() copies to an aligned buffer).
+"""
+
+from flask import Response, request
+import numpy as np
+import pandas as pd
+
+try:
+    import msgpack
+except ImportError:  # optional; JSON only without it
+    msgpack = None
+
+import metrics
+from serializers import Column
+
+MSGPACK_MIMETYPE = 'application/vnd.msgpack'
+# Older clients and libraries still send the unregistered name
+_MSGPACK_ALIASES = ('application/x-msgpack', 'application/msgpack')
+
+# Column kind (serializers.Column) -> typed array
+_NUMERIC_TYPES = {
+    'int': ('int32', '<i4'),
+    'float': ('float32', '<f4'),
+    'bool': ('uint8', 'u1'),
+    'laptime': ('int32', '<i4'),
+    'timedelta': ('int32', '<i4'),
+}
+_TIME_KINDS = ('laptime', 'timedelta')
+
+
+def wants_msgpack():
+    """
+    Whether the request's Accept header prefers MessagePack over JSON
+    A missing header or */* means JSON.
+    """
+    if msgpack is None:
+        return False
+    offered = ['application/json', MSGPACK_MIMETYPE, *_MSGPACK_ALIASES]
+    return request.accept_mimetypes.best_match(offered, default='application/json') != 'application/json'
+
+
+def _parse_milliseconds(text):
+    """'0 days 00:01:32.345000' (str(pd.Timedelta)), '1:32.345' or '32.345' -> ms"""
+    days, _, clock = text.rpartition(' days ')
+    seconds = 0.0
+    for part in clock.lstrip('+').split(':'):
+        seconds = seconds * 60 + float(part)
+    return (int(days or 0) * 86400 + seconds) * 1000
+
+
+def _milliseconds(values):
+    """Timedeltas, or their serialized strings, as float milliseconds (NaN if missing)"""
+    if not pd.api.types.is_timedelta64_dtype(values.dtype):
+        # Precomputed rows hold formatted strings; a plain loop beats pandas string ops here
+        return np.fromiter((np.nan if value is None or value != value else _parse_milliseconds(value)
+                            for value in values.to_numpy(dtype=object)), dtype='float64', count=len(values))
+    ns = values.to_numpy(dtype='timedelta64[ns]')
+    milliseconds = ns.astype('int64') / 1e6
+    milliseconds[np.isnat(ns)] = np.nan
+    return milliseconds
+
+
+def _encode_column(values, kind):
+    if kind not in _NUMERIC_TYPES:
+        missing = values.isna().to_numpy()
+        data = values.astype(object).to_numpy()
+        if kind != 'raw':
+            data = values.astype(str).to_numpy(dtype=object)
+        data[missing] = None
+        return {'type': 'string', 'data': data.tolist()}
+
+    name, dtype = _NUMERIC_TYPES[kind]
+    if kind in _TIME_KINDS:
+        numbers = _milliseconds(values)
+    else:
+        numbers = pd.to_numeric(values.astype(object).where(values.notna()), errors='coerce').to_numpy(
+            dtype='float64', na_value=np.nan)
+    missing = np.isnan(numbers)
+
+    if name == 'float32':
+        column = {'type': name, 'data': numbers.astype(dtype).tobytes()}
+    else:
+        column = {'type': name, 'data': np.round(np.where(missing, 0, numbers)).astype(dtype).tobytes()}
+        if missing.any():
+            column['missing'] = missing.astype('u1').tobytes()
+    if kind in _TIME_KINDS:
+        column['unit'] = 'ms'
+    return column
+
+
+def encode_frame(df, columns):
+    """
+    Encode DataFrame columns (serializers.Column specs) as {output name: column}
+    Columns the frame doesn't have are all missing.
+    """
+    with metrics.stage('serialize'):
+        encoded = {}
+        for column in columns:
+            if column.source in df.columns:
+                values = df[column.source]
+            else:
+                values = pd.Series([None] * len(df), index=df.index, dtype=object)
+            encoded[column.name] = _encode_column(values, column.kind)
+        return encoded
+
+
+def encode_rows(rows, columns, fields=None):
+    """
+    Encode already-serialized rows (dicts keyed by output name, as in precomputed
+    payloads) as {output name: column}, keeping only `fields` if given
+    """
+    if fields is not None:
+        columns = [column for column in columns if column.name in fields]
+        columns.sort(key=lambda column: fields.index(column.name))
+    frame = pd.DataFrame.from_records(rows, columns=[column.name for column in columns])
+    # Same specs, but read from the columns already named after the outputs
+    return encode_frame(frame, [Column(column.name, column.name, column.kind, column.default)
+                                for column in columns])
+
+
+def msgpack_response(payload, status=200):
+    """Build a MessagePack response"""
+    with metrics.stage('serialize'):
+        body = msgpack.packb(payload, use_bin_type=True)
+    return Response(body, status=status, mimetype=MSGPACK_MIMETYPE)
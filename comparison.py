@@ -0,0 +1,123 @@
+"""
+Lap comparison on a common distance grid
+Aligns several laps of car data by distance driven, so traces can be overlaid and the
+time gap between them read off at every point of the lap
+"""
+
+import numpy as np
+
+from downsampling import CONTINUOUS_CHANNELS, DISCRETE_CHANNELS, integrate_distance
+
+MAX_TRACES = 10
+FASTEST = 'fastest'
+
+# Output names of the aligned channels
+CHANNEL_NAMES = {
+    'Speed': 'speed',
+    'RPM': 'rpm',
+    'Throttle': 'throttle',
+    'nGear': 'gear',
+    'Brake': 'brake',
+    'DRS': 'drs',
+}
+
+
+def parse_laps(args):
+    """
+    (driver, lap number or 'fastest') pairs from query parameters
+    laps=VER:12,HAM:fastest picks laps; drivers=VER,HAM is short for each driver's fastest.
+    Raises ValueError with a message for the client on invalid values.
+    """
+    pairs = []
+    for item in filter(None, args.get('laps', '').split(',')):
+        driver, _, lap = item.strip().partition(':')
+        lap = lap.strip().lower() or FASTEST
+        if lap != FASTEST:
+            try:
+                lap = int(lap)
+            except ValueError:
+                raise ValueError(f"Invalid lap '{item}', expected DRIVER:LAP or DRIVER:fastest")
+        pairs.append((driver.strip(), lap))
+    for driver in filter(None, args.get('drivers', '').split(',')):
+        pairs.append((driver.strip(), FASTEST))
+
+    if not pairs:
+        raise ValueError('Pass laps=DRIVER:LAP,... or drivers=DRIVER,...')
+    if len(pairs) > MAX_TRACES:
+        raise ValueError(f'At most {MAX_TRACES} laps can be compared at once')
+    if any(not driver for driver, _ in pairs):
+        raise ValueError('Every lap needs a driver number or abbreviation')
+    return pairs
+
+
+def _elapsed_seconds(telemetry):
+    session_time = telemetry['SessionTime'].to_numpy(dtype='timedelta64[ns]').astype('int64')
+    return (session_time - session_time[0]) / 1e9
+
+
+def align(laps, interval=10.0):
+    """
+    Interpolate laps of car data onto one distance grid
+    `laps` is a list of car data DataFrames (the first is the reference for deltas).
+    The grid runs every `interval` meters up to the shortest lap's length.
+    Returns (grid, [dict of channel -> aligned array, including time and delta]).
+
+    All traces are interpolated together: each trace's distances are offset by its
+    index times a span longer than any lap, so one searchsorted over the concatenated
+    (still sorted) distances locates every grid point of every trace.
+    """
+    distances = [integrate_distance(lap) for lap in laps]
+    if any(len(distance) < 2 for distance in distances):
+        raise ValueError('Not enough car data to compare these laps')
+
+    length = min(distance[-1] for distance in distances)
+    grid = np.arange(0.0, length, interval)
+    if len(grid) == 0 or grid[-1] < length:
+        grid = np.append(grid, length)
+
+    span = max(distance[-1] for distance in distances) + interval + 1.0
+    sizes = np.array([len(distance) for distance in distances])
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    keys = np.concatenate([distance + i * span for i, distance in enumerate(distances)])
+    queries = (np.arange(len(laps))[:, None] * span + grid[None, :]).ravel()
+
+    # Sample at or before each grid point (within its own trace) and the one after
+    lower = np.searchsorted(keys, queries, side='right') - 1
+    first = np.repeat(starts, len(grid))
+    last = np.repeat(starts + sizes - 1, len(grid))
+    lower = np.clip(lower, first, last)
+    upper = np.minimum(lower + 1, last)
+    gap = keys[upper] - keys[lower]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(gap > 0, (queries - keys[lower]) / gap, 0.0)
+    weight = np.clip(weight, 0.0, 1.0)
+
+    def interpolate(values):
+        return (values[lower] * (1 - weight) + values[upper] * weight).reshape(len(laps), len(grid))
+
+    def hold(values):
+        return values[lower].reshape(len(laps), len(grid))
+
+    aligned = {'time': interpolate(np.concatenate([_elapsed_seconds(lap) for lap in laps]))}
+    for name in CONTINUOUS_CHANNELS:
+        if all(name in lap.columns for lap in laps):
+            aligned[name] = interpolate(np.concatenate([lap[name].to_numpy(dtype='float64') for lap in laps]))
+    for name in DISCRETE_CHANNELS:
+        if all(name in lap.columns for lap in laps):
+            aligned[name] = hold(np.concatenate([lap[name].to_numpy() for lap in laps]))
+    aligned['delta'] = aligned['time'] - aligned['time'][0]
+
+    traces = []
+    for i in range(len(laps)):
+        trace = {
+            'time': np.round(aligned['time'][i], 3).tolist(),
+            'delta': np.round(aligned['delta'][i], 3).tolist(),
+        }
+        for name, output in CHANNEL_NAMES.items():
+            if name in aligned:
+                values = aligned[name][i]
+                if name in CONTINUOUS_CHANNELS:
+                    values = np.round(values, 1)
+                trace[output] = values.tolist()
+        traces.append(trace)
+    return np.round(grid, 1).tolist(), traces
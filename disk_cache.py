@@ -0,0 +1,259 @@
+"""
+Size-bounded management of the FastF1 on-disk cache
+FastF1 keeps parsed API data as pickles in one directory per session
+(<root>/<year>/<event>/<session>/) plus a SQLite cache of raw HTTP responses. This
+module keeps that directory under a size budget by deleting whole sessions, least
+recently used first, while never touching the current season or recently used races.
+
+The directory's modification time is the "last used" clock: the app touches a session's
+directory whenever it serves the session, so recency is shared by every gunicorn worker
+and survives restarts and redeploys on the same volume.
+
+Report usage or evict from the command line:
+    python disk_cache.py report
+    python disk_cache.py enforce
+"""
+
+from datetime import datetime
+import argparse
+import logging
+import os
+import shutil
+import threading
+import time
+
+import fastf1
+import orjson
+
+from file_lock import lock
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_FILE = 'fastf1_http_cache.sqlite'
+LOCK_FILE = '.evict.lock'
+
+
+def enable(root, offline=False):
+    """
+    Point FastF1 at the cache directory
+    In offline mode nothing is downloaded: sessions are served from the cache only and
+    anything missing fails straight away instead of waiting on the network.
+    """
+    os.makedirs(root, exist_ok=True)
+    fastf1.Cache.enable_cache(root)
+    if offline:
+        fastf1.Cache.offline_mode(True)
+        logger.info(f"FastF1 offline mode: serving only from {root}")
+
+
+def release_connections():
+    """
+    Close FastF1's pooled HTTP connections and its SQLite handle
+    Both reopen on next use. Called before gunicorn forks workers from a preloading
+    master, so no socket or database connection ends up shared between processes.
+    """
+    for session in (fastf1.req.Cache._requests_session, fastf1.req.Cache._requests_session_cached):
+        if session is not None:
+            session.close()
+
+
+def _directory_bytes(path):
+    total = files = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.stat(os.path.join(directory, name)).st_size
+                files += 1
+            except FileNotFoundError:
+                pass
+    return total, files
+
+
+class DiskCache:
+    """
+    LRU eviction of session directories in the FastF1 cache
+
+    Sessions of `pin_seasons` (default: the current season) and sessions used within
+    the last `pin_recent_hours` are pinned. A `max_bytes` of 0 disables eviction.
+    """
+
+    def __init__(self, root, max_bytes=0, pin_seasons=None, pin_recent_hours=72, touch_interval=60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.pin_seasons = pin_seasons
+        self.pin_recent = pin_recent_hours * 3600
+        self.touch_interval = touch_interval
+
+        self._lock = threading.Lock()
+        self._touched = {}  # session directory -> time of our last touch
+        self._stop = threading.Event()
+        self._thread = None
+        self.evictions = 0
+        self.freed_bytes = 0
+
+    def session_dir(self, session):
+        # api_path looks like /static/2024/2024-03-02_Bahrain_Grand_Prix/2024-03-02_Race/
+        return os.path.join(self.root, session.api_path[len('/static/'):].strip('/'))
+
+    def touch(self, session):
+        """Mark a session as just used (at most once per touch_interval per worker)"""
+        try:
+            path = self.session_dir(session)
+        except (AttributeError, TypeError):
+            return
+        now = time.time()
+        with self._lock:
+            if now - self._touched.get(path, 0) < self.touch_interval:
+                return
+            self._touched[path] = now
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def _pinned_seasons(self):
+        if self.pin_seasons is not None:
+            return set(self.pin_seasons)
+        return {datetime.now().year}
+
+    def sessions(self):
+        """Every cached session directory with its size, last use and whether it is pinned"""
+        pinned_seasons = self._pinned_seasons()
+        now = time.time()
+        sessions = []
+        for year in sorted(os.listdir(self.root)) if os.path.isdir(self.root) else ():
+            year_dir = os.path.join(self.root, year)
+            if not year.isdigit() or not os.path.isdir(year_dir):
+                continue
+            for event in sorted(os.listdir(year_dir)):
+                event_dir = os.path.join(year_dir, event)
+                if not os.path.isdir(event_dir):
+                    continue
+                for name in sorted(os.listdir(event_dir)):
+                    path = os.path.join(event_dir, name)
+                    try:
+                        last_used = os.stat(path).st_mtime
+                    except FileNotFoundError:
+                        continue
+                    if not os.path.isdir(path):
+                        continue
+                    size, files = _directory_bytes(path)
+                    sessions.append({
+                        'path': os.path.relpath(path, self.root),
+                        'year': int(year),
+                        'event': event,
+                        'session': name,
+                        'bytes': size,
+                        'files': files,
+                        'last_used': datetime.fromtimestamp(last_used).isoformat(timespec='seconds'),
+                        'last_used_ts': last_used,
+                        'pinned': int(year) in pinned_seasons or now - last_used < self.pin_recent,
+                    })
+        return sessions
+
+    def _http_cache_bytes(self):
+        try:
+            return sum(os.stat(os.path.join(self.root, name)).st_size
+                       for name in os.listdir(self.root) if name.startswith(HTTP_CACHE_FILE))
+        except FileNotFoundError:
+            return 0
+
+    def usage(self):
+        """
+        Disk usage report
+        Returns: total and HTTP cache bytes, the budget and sessions by size
+        """
+        sessions = self.sessions()
+        http_bytes = self._http_cache_bytes()
+        session_bytes = sum(s['bytes'] for s in sessions)
+        for session in sessions:
+            del session['last_used_ts']
+        return {
+            'root': os.path.abspath(self.root),
+            'max_bytes': self.max_bytes,
+            'total_bytes': session_bytes + http_bytes,
+            'session_bytes': session_bytes,
+            'http_cache_bytes': http_bytes,
+            'sessions_cached': len(sessions),
+            'sessions_pinned': sum(1 for s in sessions if s['pinned']),
+            'evictions': self.evictions,
+            'freed_bytes': self.freed_bytes,
+            'sessions': sorted(sessions, key=lambda s: s['bytes'], reverse=True),
+        }
+
+    def enforce(self):
+        """
+        Evict least recently used, unpinned sessions until the cache fits its budget
+        Only one process evicts at a time; returns the evicted paths (None if another
+        process holds the eviction lock).
+        """
+        if not self.max_bytes or not os.path.isdir(self.root):
+            return []
+        with open(os.path.join(self.root, LOCK_FILE), 'w') as lock_file:
+            if not lock(lock_file, blocking=False):
+                return None
+
+            sessions = self.sessions()
+            excess = sum(s['bytes'] for s in sessions) + self._http_cache_bytes() - self.max_bytes
+            if excess <= 0:
+                return []
+
+            candidates = sorted((s for s in sessions if not s['pinned']), key=lambda s: s['last_used_ts'])
+            evicted = []
+            for session in candidates:
+                if excess <= 0:
+                    break
+                shutil.rmtree(os.path.join(self.root, session['path']), ignore_errors=True)
+                excess -= session['bytes']
+                self.evictions += 1
+                self.freed_bytes += session['bytes']
+                evicted.append(session['path'])
+                logger.info(f"Evicted {session['path']} from the FastF1 cache ({session['bytes']} bytes)")
+
+            if excess > 0:
+                logger.warning(f"FastF1 cache is {excess} bytes over budget with only pinned sessions left")
+            return evicted
+
+    def start(self, interval=600):
+        """Enforce the budget now and every `interval` seconds in a daemon thread"""
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.enforce()
+                except Exception as e:
+                    logger.error(f"FastF1 cache eviction failed: {str(e)}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, name='disk-cache', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def options_from_env():
+    return {
+        'root': os.environ.get('FASTF1_CACHE_DIR', 'cache'),
+        'max_bytes': int(os.environ.get('FASTF1_CACHE_MAX_MB', 0)) * 1024 * 1024,
+        'pin_recent_hours': float(os.environ.get('FASTF1_CACHE_PIN_HOURS', 72)),
+    }
+
+
+def offline_from_env():
+    return os.environ.get('FASTF1_OFFLINE', 'False').lower() == 'true'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report on or shrink the FastF1 cache directory')
+    parser.add_argument('command', choices=('report', 'enforce'))
+    parser.add_argument('--max-mb', type=int, help='size budget (default: FASTF1_CACHE_MAX_MB)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    options = options_from_env()
+    if args.max_mb is not None:
+        options['max_bytes'] = args.max_mb * 1024 * 1024
+    cache = DiskCache(**options)
+    if args.command == 'enforce':
+        cache.enforce()
+    print(orjson.dumps(cache.usage(), option=orjson.OPT_INDENT_2).decode())
@@ -0,0 +1,199 @@
+"""
+Telemetry downsampling
+Reduces a lap of car data to what a chart needs, in one of four modes:
+    raw      - every sample
+    stride   - every n-th sample
+    lttb     - a target number of points chosen by largest-triangle-three-buckets on
+               speed, always keeping gear, brake and DRS changes
+    distance - resampled onto a fixed distance grid (e.g. every 10 m)
+"""
+
+import numpy as np
+import pandas as pd
+
+MODES = ('raw', 'stride', 'lttb', 'distance')
+# Every 10th sample, as /api/telemetry always served; the other modes are opt-in
+DEFAULT_MODE = 'stride'
+DEFAULT_STRIDE = 10
+DEFAULT_POINTS = 250
+DEFAULT_INTERVAL = 10.0  # meters
+
+# Channels whose changes mark braking points, gear shifts and DRS activation
+DISCRETE_CHANNELS = ('nGear', 'Brake', 'DRS')
+CONTINUOUS_CHANNELS = ('Speed', 'RPM', 'Throttle')
+
+
+def _seconds(telemetry):
+    return telemetry['SessionTime'].to_numpy(dtype='timedelta64[ns]').astype('int64') / 1e9
+
+
+def integrate_distance(telemetry):
+    """
+    Distance driven since the first sample, in meters
+    Same integration as fastf1.core.Telemetry.integrate_distance(): speed x time step
+    """
+    speed = telemetry['Speed'].to_numpy(dtype='float64') / 3.6
+    dt = np.diff(_seconds(telemetry), prepend=np.nan)
+    dt[0] = 0.0
+    return np.nancumsum(speed * dt)
+
+
+def stride(telemetry, step=DEFAULT_STRIDE):
+    """Every `step`-th sample (the old iloc[::10])"""
+    return telemetry.iloc[::step]
+
+
+def lttb_indices(x, y, points):
+    """
+    Indices of the `points` samples that best preserve the shape of y(x)
+    Largest-triangle-three-buckets: the first and last samples are kept and every bucket
+    in between contributes the sample forming the largest triangle with the previous
+    pick and the next bucket's average. Triangle areas are linear in the previous pick,
+    so their coefficients are computed for all samples at once and each bucket only
+    takes an argmax.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    # Bucket i (1..points-2) covers [edges[i-1], edges[i]); edges split the inner samples evenly
+    edges = (np.floor(np.arange(points - 1) * (n - 2) / (points - 2)) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of the following bucket (the last sample for the final bucket)
+    sums_x = np.concatenate(([0.0], np.cumsum(x)))
+    sums_y = np.concatenate(([0.0], np.cumsum(y)))
+    next_starts = np.append(starts[1:], n - 1)
+    next_ends = np.append(ends[1:], n)
+    counts = next_ends - next_starts
+    avg_x = (sums_x[next_ends] - sums_x[next_starts]) / counts
+    avg_y = (sums_y[next_ends] - sums_y[next_starts]) / counts
+
+    # 2 * area for sample p with anchor a and next average c:
+    #   |p_x (c_y - a_y) + c_x (a_y - p_y) + a_x (p_y - c_y)|
+    # = |(p_x c_y - c_x p_y) + a_x (p_y - c_y) + a_y (c_x - p_x)|
+    bucket = np.repeat(np.arange(len(starts)), ends - starts)
+    inner = slice(1, n - 1)
+    cx, cy = avg_x[bucket], avg_y[bucket]
+    const = x[inner] * cy - cx * y[inner]
+    coef_x = y[inner] - cy
+    coef_y = cx - x[inner]
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i, (start, end) in enumerate(zip(starts - 1, ends - 1)):
+        area = np.abs(const[start:end] + x[anchor] * coef_x[start:end] + y[anchor] * coef_y[start:end])
+        anchor = start + 1 + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def change_indices(telemetry, channels=DISCRETE_CHANNELS):
+    """Samples where any of the discrete channels changes value, plus the one before it"""
+    changed = np.zeros(len(telemetry), dtype=bool)
+    for name in channels:
+        if name in telemetry.columns:
+            values = telemetry[name].to_numpy()
+            step = values[1:] != values[:-1]
+            changed[1:] |= step
+            changed[:-1] |= step
+    return np.flatnonzero(changed)
+
+
+def lttb(telemetry, points=DEFAULT_POINTS, channel='Speed'):
+    """
+    About `points` samples: every gear/brake/DRS change, the rest chosen by LTTB
+    on `channel`
+    """
+    n = len(telemetry)
+    if points >= n:
+        return telemetry
+
+    changes = change_indices(telemetry)
+    if len(changes) >= points:
+        # More events than the budget; keep the events, evenly thinned
+        keep = changes[np.linspace(0, len(changes) - 1, points).round().astype(np.int64)]
+    else:
+        shape = lttb_indices(_seconds(telemetry), telemetry[channel].to_numpy(dtype='float64'),
+                             points - len(changes))
+        keep = np.union1d(shape, changes)
+    return telemetry.iloc[np.unique(keep)]
+
+
+def resample_distance(telemetry, interval=DEFAULT_INTERVAL, distance=None):
+    """
+    Car data on a grid every `interval` meters along the lap
+    Continuous channels are interpolated, discrete ones hold their last value.
+    """
+    if distance is None:
+        distance = integrate_distance(telemetry)
+    if len(telemetry) < 2:
+        return telemetry.assign(Distance=distance)
+
+    grid = np.arange(0.0, distance[-1], interval)
+    if len(grid) == 0 or grid[-1] < distance[-1]:
+        grid = np.append(grid, distance[-1])
+    resampled = {'Distance': grid}
+
+    seconds = _seconds(telemetry)
+    session_time = np.interp(grid, distance, seconds)
+    resampled['SessionTime'] = pd.to_timedelta(np.round(session_time * 1e9).astype('int64'), unit='ns')
+
+    for name in CONTINUOUS_CHANNELS:
+        if name in telemetry.columns:
+            resampled[name] = np.interp(grid, distance, telemetry[name].to_numpy(dtype='float64'))
+
+    # Standing still repeats distances; take the last sample at or before each grid point
+    previous = np.clip(np.searchsorted(distance, grid, side='right') - 1, 0, len(distance) - 1)
+    for name in DISCRETE_CHANNELS:
+        if name in telemetry.columns:
+            resampled[name] = telemetry[name].to_numpy()[previous]
+    return pd.DataFrame(resampled)
+
+
+def downsample(telemetry, mode=DEFAULT_MODE, step=DEFAULT_STRIDE, points=DEFAULT_POINTS,
+               interval=DEFAULT_INTERVAL):
+    """Downsample a lap of car data; the result always has a Distance column (meters)"""
+    telemetry = telemetry.reset_index(drop=True)
+    distance = integrate_distance(telemetry)
+    if mode == 'distance':
+        result = resample_distance(telemetry, interval, distance=distance)
+    elif mode in MODES:
+        result = telemetry.assign(Distance=distance)
+        if mode == 'stride':
+            result = stride(result, step)
+        elif mode == 'lttb':
+            result = lttb(result, points)
+    else:
+        raise ValueError(f"Unknown downsampling mode: {mode}")
+    return result.assign(Distance=result['Distance'].round(1))
+
+
+def options_from_args(args):
+    """
+    Downsampling options from query parameters (mode, step, points, interval)
+    Raises ValueError with a message for the client on invalid values.
+    """
+    mode = args.get('mode', DEFAULT_MODE).lower()
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+
+    try:
+        options = {
+            'mode': mode,
+            'step': int(args.get('step', DEFAULT_STRIDE)),
+            'points': int(args.get('points', DEFAULT_POINTS)),
+            'interval': float(args.get('interval', DEFAULT_INTERVAL)),
+        }
+    except ValueError:
+        raise ValueError('step and points must be integers and interval a number')
+
+    if options['step'] < 1:
+        raise ValueError('step must be at least 1')
+    if not 3 <= options['points'] <= 100_000:
+        raise ValueError('points must be between 3 and 100000')
+    if not 0.5 <= options['interval'] <= 1000:
+        raise ValueError('interval must be between 0.5 and 1000 meters')
+    return options
@@ -0,0 +1,50 @@
+"""
+Exclusive locks on files, shared by the processes on one host
+Uses fcntl.flock where there is fcntl (Linux, macOS) and msvcrt.locking on Windows, so
+`python app.py` keeps working on a Windows dev machine. Either way the lock belongs to
+the open file and goes away when it is closed. Where neither exists locking is a no-op:
+each process acts as if it were alone, which a single dev server is.
+"""
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# msvcrt can't wait for a lock indefinitely, so a blocking lock is retried this often
+RETRY_INTERVAL = 0.05
+
+
+def lock(file, blocking=True):
+    """
+    Lock an open file (or file descriptor) exclusively until it is closed
+    Returns: False if `blocking` is off and another process holds the lock, else True
+    """
+    fd = file if isinstance(file, int) else file.fileno()
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+    if msvcrt is None:
+        return True
+
+    # msvcrt locks bytes from the current position: always lock the first one
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(RETRY_INTERVAL)
@@ -11,12 +11,14 @@ import CircuitInfo from './components/CircuitInfo';
 import Teams from './components/Teams';
 import { Menu, X } from 'lucide-react';
 import API_BASE_URL from './config/api';
+import { ResponsiveImage, backgroundImage, useImageManifest } from './utils/assets';
 import { StatusBar, Style } from '@capacitor/status-bar';
 import { Capacitor } from '@capacitor/core';
 
 function App() {
   const [apiStatus, setApiStatus] = useState('checking');
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
+  const images = useImageManifest();
 
   useEffect(() => {
     // Configure status bar for native apps
@@ -39,7 +41,7 @@ function App() {
 
   return (
     <Router>
-      <div className="App">
+      <div className="App" style={{ '--app-background': backgroundImage(images, '/f1_bg.png') }}>
         {/* Mobile Menu Overlay */}
         {mobileMenuOpen && (
           <div className="mobile-overlay" onClick={closeMobileMenu}></div>
@@ -48,7 +50,7 @@ function App() {
         <header className={`app-header ${mobileMenuOpen ? 'menu-open' : ''}`}>
           <div className="header-content">
             <div className="logo">
-              <img src="/logo.png" alt="Circuit Stream Logo" />
+              <ResponsiveImage src="/logo.png" sizes="40px" alt="Circuit Stream Logo" />
               <h1>Circuit Stream</h1>
             </div>
             
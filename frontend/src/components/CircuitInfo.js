@@ -2,8 +2,45 @@ import React, { useState, useEffect } from 'react';
 import { axios } from '../config/api';
 import { MapPin } from 'lucide-react';
 import { getCircuitImageByCountry } from '../utils/imageMapper';
+import { ResponsiveImage } from '../utils/assets';
 import API_BASE_URL from '../config/api';
 
+// Rotate track coordinates (meters) by the circuit's map rotation, like the official map
+const rotate = (x, y, degrees) => {
+  const angle = (degrees * Math.PI) / 180;
+  return [x * Math.cos(angle) - y * Math.sin(angle), x * Math.sin(angle) + y * Math.cos(angle)];
+};
+
+const TrackMap = ({ track, corners, rotation }) => {
+  const points = track.x.map((x, i) => rotate(x, track.y[i], rotation || 0));
+  const xs = points.map(([x]) => x);
+  const ys = points.map(([, y]) => y);
+  const pad = 150;
+  const minX = Math.min(...xs) - pad;
+  const maxY = Math.max(...ys) + pad;
+  const width = Math.max(...xs) - minX + pad;
+  const height = maxY - Math.min(...ys) + pad;
+  // SVG y grows downwards
+  const toSvg = ([x, y]) => [x - minX, maxY - y];
+  const path = points.map((point) => toSvg(point).join(',')).join(' ');
+
+  return (
+    <svg viewBox={`0 0 ${width} ${height}`} style={{ width: '100%', maxHeight: '600px' }}>
+      <polygon points={path} fill="none" stroke="#E10600" strokeWidth={Math.max(width, height) / 120}
+               strokeLinejoin="round" />
+      {(corners || []).map((corner) => {
+        const [cx, cy] = toSvg(rotate(corner.x, corner.y, rotation || 0));
+        return (
+          <text key={`${corner.number}${corner.letter}`} x={cx} y={cy} fill="#fff"
+                fontSize={Math.max(width, height) / 40} textAnchor="middle" dominantBaseline="middle">
+            {corner.number}{corner.letter}
+          </text>
+        );
+      })}
+    </svg>
+  );
+};
+
 const CircuitInfo = () => {
   const [year, setYear] = useState(new Date().getFullYear());
   const [round, setRound] = useState(1);
@@ -155,6 +192,24 @@ const CircuitInfo = () => {
             </div>
           )}
 
+          {/* Track map from the stored layout */}
+          {circuitInfo.track && circuitInfo.track.points > 1 && (
+            <div className="data-card" style={{ 
+              marginBottom: '2rem', 
+              background: 'rgba(0, 0, 0, 0.3)',
+              padding: '2rem'
+            }}>
+              <h3 style={{ color: '#E10600', marginBottom: '1.5rem', textAlign: 'center' }}>
+                Track Map
+              </h3>
+              <TrackMap
+                track={circuitInfo.track}
+                corners={circuitInfo.circuit_info.corners}
+                rotation={circuitInfo.circuit_info.rotation}
+              />
+            </div>
+          )}
+
           {/* Circuit Image */}
           {circuitInfo.event_info && getCircuitImageByCountry(circuitInfo.event_info.country) && (
             <div className="data-card" style={{ 
@@ -166,8 +221,9 @@ const CircuitInfo = () => {
               <h3 style={{ color: '#E10600', marginBottom: '1.5rem', textAlign: 'center' }}>
                 Circuit Layout
               </h3>
-              <img 
+              <ResponsiveImage 
                 src={getCircuitImageByCountry(circuitInfo.event_info.country)} 
+                sizes="(max-width: 768px) 90vw, 1000px"
                 alt={`${circuitInfo.event_info.location} Circuit`}
                 style={{
                   width: '100%',
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { axios } from '../config/api';
 import { Calendar, MapPin, Clock, Trophy, Flag, ChevronRight, TrendingUp } from 'lucide-react';
 import { getCircuitImageByCountry } from '../utils/imageMapper';
+import { ResponsiveImage } from '../utils/assets';
 import API_BASE_URL from '../config/api';
 import './Dashboard.css';
 
@@ -159,8 +160,9 @@ const Dashboard = () => {
       {currentEvent ? (
         <div className="hero-section">
           <div className="hero-background">
-            <img 
+            <ResponsiveImage 
               src={getCircuitImageByCountry(currentEvent.country)} 
+              sizes="100vw"
               alt={currentEvent.event_name}
               className="hero-circuit-image"
               onError={(e) => {
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { axios } from '../config/api';
 import { Calendar } from 'lucide-react';
 import { getCircuitImageByCountry } from '../utils/imageMapper';
+import { ResponsiveImage } from '../utils/assets';
 import API_BASE_URL from '../config/api';
 
 const EventSchedule = () => {
@@ -92,8 +93,9 @@ const EventSchedule = () => {
           borderRadius: '10px',
           background: 'rgba(225, 6, 0, 0.05)'
         }}>
-          <img 
-            src={getCircuitImageByCountry(event.country)} 
+          <ResponsiveImage 
+            src={getCircuitImageByCountry(event.country)}
+            sizes="(max-width: 768px) 90vw, 360px" 
             alt={`${event.location} Circuit`}
             style={{
               width: '100%',
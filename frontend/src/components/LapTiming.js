@@ -3,6 +3,9 @@ import { axios } from '../config/api';
 import { Clock } from 'lucide-react';
 import API_BASE_URL from '../config/api';
 
+// Only the columns the table shows
+const LAP_FIELDS = 'lap_number,driver,driver_number,lap_time,sector1_time,sector2_time,sector3_time,compound,tyre_life,stint,is_personal_best';
+
 const LapTiming = () => {
   const [year, setYear] = useState(new Date().getFullYear());
   const [round, setRound] = useState(1);
@@ -40,15 +43,18 @@ const LapTiming = () => {
     }
   };
 
+  const lapsUrl = (cursor) => {
+    const params = new URLSearchParams({ fields: LAP_FIELDS });
+    if (driverNumber) params.set('driver', driverNumber);
+    if (cursor) params.set('cursor', cursor);
+    return `${API_BASE_URL}/api/laps/${year}/${round}/${sessionType}?${params}`;
+  };
+
   const fetchLaps = async () => {
     setLoading(true);
     setError(null);
     try {
-      const url = driverNumber
-        ? `${API_BASE_URL}/api/laps/${year}/${round}/${sessionType}?driver=${driverNumber}`
-        : `${API_BASE_URL}/api/laps/${year}/${round}/${sessionType}`;
-      
-      const response = await axios.get(url);
+      const response = await axios.get(lapsUrl());
       setLaps(response.data);
     } catch (err) {
       setError(err.response?.data?.error || err.message);
@@ -57,6 +63,23 @@ const LapTiming = () => {
     }
   };
 
+  const fetchMoreLaps = async () => {
+    setLoading(true);
+    setError(null);
+    try {
+      const response = await axios.get(lapsUrl(laps.next_cursor));
+      setLaps({
+        ...response.data,
+        laps: [...laps.laps, ...response.data.laps],
+        count: laps.count + response.data.count,
+      });
+    } catch (err) {
+      setError(err.response?.data?.error || err.message);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   return (
     <div className="page-container">
       <h2 className="page-title">
@@ -125,7 +148,7 @@ const LapTiming = () => {
       {laps && (
         <div>
           <p style={{ marginBottom: '1rem', color: '#666' }}>
-            Total Laps: {laps.total_laps}
+            Showing {laps.count} of {laps.total_laps} laps
             {laps.driver_filter && ` (Driver #${laps.driver_filter})`}
           </p>
           
@@ -180,6 +203,12 @@ const LapTiming = () => {
               </tbody>
             </table>
           </div>
+
+          {laps.next_cursor && (
+            <button onClick={fetchMoreLaps} className="btn-primary" disabled={loading} style={{ marginTop: '1rem' }}>
+              Load more laps
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -1,7 +1,8 @@
 import React, { useState } from 'react';
 import { axios } from '../config/api';
 import { Trophy } from 'lucide-react';
-import { getDriverImage } from '../utils/imageMapper';
+import { getDriverImages, getImageUrl } from '../utils/imageMapper';
+import { ResponsiveImage } from '../utils/assets';
 import API_BASE_URL from '../config/api';
 
 const SessionResults = () => {
@@ -13,9 +14,11 @@ const SessionResults = () => {
   const [error, setError] = useState(null);
   const [schedule, setSchedule] = useState([]);
   const [selectedEvent, setSelectedEvent] = useState('');
+  const [driverImages, setDriverImages] = useState({});
 
   React.useEffect(() => {
     fetchSchedule();
+    fetchDriverImages();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [year]);
 
@@ -32,6 +35,15 @@ const SessionResults = () => {
     }
   };
 
+  const fetchDriverImages = async () => {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/api/drivers/${year}`);
+      setDriverImages(getDriverImages(response.data));
+    } catch (err) {
+      setDriverImages({});
+    }
+  };
+
   const handleEventChange = (eventName) => {
     setSelectedEvent(eventName);
     const event = schedule.find(e => e.event_name === eventName);
@@ -141,7 +153,7 @@ const SessionResults = () => {
                   </td>
                   <td>
                     <div style={{ display: 'flex', alignItems: 'center', gap: '1rem' }}>
-                      {getDriverImage(driver.abbreviation, driver.team_name, year) && (
+                      {driverImages[driver.abbreviation]?.driver && (
                         <div style={{
                           width: '50px',
                           height: '50px',
@@ -153,8 +165,9 @@ const SessionResults = () => {
                           justifyContent: 'center',
                           background: '#1A1A24'
                         }}>
-                          <img 
-                            src={getDriverImage(driver.abbreviation, driver.team_name, year)} 
+                          <ResponsiveImage 
+                            src={getImageUrl(driverImages[driver.abbreviation].driver)} 
+                            sizes="60px"
                             alt={driver.full_name}
                             style={{
                               width: '120%',
@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { axios } from '../config/api';
 import { Car, Users } from 'lucide-react';
-import { getTeamCarImage, getDriverImage } from '../utils/imageMapper';
+import { getImageUrl } from '../utils/imageMapper';
+import { ResponsiveImage } from '../utils/assets';
 import API_BASE_URL from '../config/api';
 import './Teams.css';
 
@@ -29,6 +30,7 @@ const Teams = () => {
           teamMap[driver.team_name] = {
             teamName: driver.team_name,
             teamColor: driver.team_color,
+            carImage: getImageUrl(driver.images?.car),
             drivers: []
           };
         }
@@ -90,10 +92,11 @@ const Teams = () => {
                 }}
               >
                 <h3 className="team-name">{team.teamName}</h3>
-                {getTeamCarImage(team.teamName, year) && (
+                {team.carImage && (
                   <div className="team-car-container">
-                    <img 
-                      src={getTeamCarImage(team.teamName, year)} 
+                    <ResponsiveImage 
+                      src={team.carImage} 
+                      sizes="(max-width: 768px) 90vw, 400px"
                       alt={`${team.teamName} Car`}
                       className="team-car-image"
                     />
@@ -108,9 +111,10 @@ const Teams = () => {
                 </div>
                 {team.drivers.map((driver, driverIndex) => (
                   <div key={driverIndex} className="driver-item">
-                    {getDriverImage(driver.abbreviation, team.teamName, year) && (
-                      <img 
-                        src={getDriverImage(driver.abbreviation, team.teamName, year)} 
+                    {driver.images?.driver && (
+                      <ResponsiveImage 
+                        src={getImageUrl(driver.images.driver)} 
+                        sizes="60px"
                         alt={driver.full_name}
                         className="driver-image"
                       />
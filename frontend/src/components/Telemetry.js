@@ -164,7 +164,7 @@ const Telemetry = () => {
             <ResponsiveContainer width="100%" height={300}>
               <LineChart data={telemetry.telemetry}>
                 <CartesianGrid strokeDasharray="3 3" />
-                <XAxis dataKey="session_time" label={{ value: 'Time', position: 'insideBottom', offset: -5 }} />
+                <XAxis dataKey="distance" type="number" domain={['dataMin', 'dataMax']} label={{ value: 'Distance (m)', position: 'insideBottom', offset: -5 }} />
                 <YAxis label={{ value: 'Speed (km/h)', angle: -90, position: 'insideLeft' }} />
                 <Tooltip />
                 <Legend />
@@ -178,7 +178,7 @@ const Telemetry = () => {
             <ResponsiveContainer width="100%" height={300}>
               <LineChart data={telemetry.telemetry}>
                 <CartesianGrid strokeDasharray="3 3" />
-                <XAxis dataKey="session_time" label={{ value: 'Time', position: 'insideBottom', offset: -5 }} />
+                <XAxis dataKey="distance" type="number" domain={['dataMin', 'dataMax']} label={{ value: 'Distance (m)', position: 'insideBottom', offset: -5 }} />
                 <YAxis label={{ value: 'RPM', angle: -90, position: 'insideLeft' }} />
                 <Tooltip />
                 <Legend />
@@ -192,7 +192,7 @@ const Telemetry = () => {
             <ResponsiveContainer width="100%" height={300}>
               <LineChart data={telemetry.telemetry}>
                 <CartesianGrid strokeDasharray="3 3" />
-                <XAxis dataKey="session_time" label={{ value: 'Time', position: 'insideBottom', offset: -5 }} />
+                <XAxis dataKey="distance" type="number" domain={['dataMin', 'dataMax']} label={{ value: 'Distance (m)', position: 'insideBottom', offset: -5 }} />
                 <YAxis yAxisId="left" label={{ value: 'Throttle %', angle: -90, position: 'insideLeft' }} />
                 <YAxis yAxisId="right" orientation="right" label={{ value: 'Gear', angle: 90, position: 'insideRight' }} />
                 <Tooltip />
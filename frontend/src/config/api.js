@@ -8,8 +8,28 @@ const API_BASE_URL = process.env.REACT_APP_API_URL || (window.location.hostname
 
 // Create an axios instance with caching enabled
 // Cache will live for 15 minutes by default
+// 202 Accepted means the session is still loading on the server, so never cache it
 export const axios = setupCache(Axios.create(), {
   ttl: 1000 * 60 * 15, // 15 minutes
+  cachePredicate: {
+    statusCheck: (status) => status >= 200 && status < 400 && status !== 202,
+  },
+});
+
+// Cold sessions answer 202 with a Retry-After while they load; wait and ask again
+const MAX_LOADING_RETRIES = 30;
+
+axios.interceptors.response.use(async (response) => {
+  if (response.status !== 202) {
+    return response;
+  }
+  const retries = (response.config.loadingRetries || 0) + 1;
+  if (retries > MAX_LOADING_RETRIES) {
+    return Promise.reject(new Error('Session data is taking too long to load. Please try again.'));
+  }
+  const retryAfter = Number(response.headers['retry-after'] || (response.data && response.data.retry_after) || 2);
+  await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+  return axios.request({ ...response.config, loadingRetries: retries });
 });
 
 export default API_BASE_URL;
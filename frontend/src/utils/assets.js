@@ -0,0 +1,68 @@
+// Responsive images from the asset pipeline (assets.py)
+// After the build, image-manifest.json lists resized AVIF/WebP variants of the images in
+// public/ under fingerprinted names. Without it (e.g. `npm start`) the originals are used.
+import React, { useEffect, useState } from 'react';
+
+let manifest = null;
+const manifestLoaded = fetch('/image-manifest.json')
+  .then(response => (response.ok ? response.json() : {}))
+  .catch(() => ({}))
+  .then(data => {
+    manifest = data;
+    return data;
+  });
+
+export const useImageManifest = () => {
+  const [loaded, setLoaded] = useState(manifest);
+
+  useEffect(() => {
+    if (!loaded) {
+      manifestLoaded.then(setLoaded);
+    }
+  }, [loaded]);
+
+  // null until the manifest is in, so originals aren't fetched while it loads
+  return loaded;
+};
+
+// Manifest entry of an image by its URL ('/images/cars/2025haascarright.avif')
+const entryFor = (images, src) => (images && src ? images[src.replace(/^\//, '')] : undefined);
+
+// CSS background for an image: the smallest fallback-format variant covering the viewport
+export const backgroundImage = (images, src) => {
+  if (!images) {
+    return 'none';
+  }
+  const entry = entryFor(images, src);
+  if (!entry) {
+    return `url(${src})`;
+  }
+  const needed = window.innerWidth * (window.devicePixelRatio || 1);
+  const variants = entry.sources[entry.sources.length - 1].srcset.split(', ').map(item => {
+    const [url, width] = item.split(' ');
+    return { url, width: parseInt(width, 10) };
+  });
+  const variant = variants.find(v => v.width >= needed) || variants[variants.length - 1];
+  return `url(${variant.url})`;
+};
+
+// <img> with the manifest's variants; `sizes` is the width it is shown at
+export const ResponsiveImage = ({ src, sizes, alt, ...props }) => {
+  const images = useImageManifest();
+  const entry = entryFor(images, src);
+
+  if (!images) {
+    return null;
+  }
+  if (!entry) {
+    return <img src={src} alt={alt} {...props} />;
+  }
+  return (
+    <picture style={{ display: 'contents' }}>
+      {entry.sources.map(source => (
+        <source key={source.type} type={source.type} srcSet={source.srcset} sizes={sizes} />
+      ))}
+      <img src={entry.src} alt={alt} width={entry.width} height={entry.height} {...props} />
+    </picture>
+  );
+};
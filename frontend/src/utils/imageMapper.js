@@ -1,87 +1,16 @@
 // Image mapper utility for F1 assets
 
-// Team name mapping to car image filenames
-export const getTeamCarImage = (teamName, year = 2026) => {
-  const teamMap = {
-    'Alpine F1 Team': 'alpine',
-    'Aston Martin': 'astonmartin',
-    'Audi': 'audi',
-    'Cadillac': 'cadillac',
-    'Ferrari': 'ferrari',
-    'Haas F1 Team': 'haasf1team',
-    'Kick Sauber': 'kicksauber',
-    'McLaren': 'mclaren',
-    'Mercedes': 'mercedes',
-    'RB F1 Team': 'racingbulls',
-    'Racing Bulls': 'racingbulls',
-    'Red Bull Racing': 'redbullracing',
-    'Williams': 'williams'
-  };
-
-  // Fallback for 2025 Haas name
-  if (year === 2025 && teamName === 'Haas F1 Team') {
-    return `/images/cars/2025haascarright.avif`;
-  }
-
-  const teamKey = teamMap[teamName] || teamName.toLowerCase().replace(/\s+/g, '');
-  return `/images/cars/${year}${teamKey}carright.avif`;
-};
+// Driver and car images: the API returns their keys (e.g. 'drivers/2025haasolibea01right.avif')
+// with each driver of /api/drivers/{year}
+export const getImageUrl = (key) => (key ? `/images/${key}` : null);
 
-// Driver code mapping to driver image filenames
-export const getDriverImage = (driverCode, teamName, year = 2026) => {
-  const driverMap = {
-    // Alpine
-    'GAS': { team: 'alpine', code: 'piegas01' },
-    'COL': { team: 'alpine', code: 'fracol01' },
-    'DOO': { team: 'alpine', code: 'fracol01' }, // Jack Doohan - using placeholder
-    
-    // Aston Martin
-    'ALO': { team: 'astonmartin', code: 'feralo01' },
-    'STR': { team: 'astonmartin', code: 'lanstr01' },
-    
-    // Audi / Kick Sauber
-    'BOT': { team: year === 2026 ? 'cadillac' : 'kicksauber', code: year === 2026 ? 'valbot01' : 'gabbor01' },
-    'BOR': { team: year === 2026 ? 'audi' : 'kicksauber', code: 'gabbor01' },
-    'HUL': { team: year === 2026 ? 'audi' : 'kicksauber', code: 'nichul01' },
-    
-    // Cadillac
-    'PER': { team: 'cadillac', code: 'serper01' },
-    
-    // Ferrari
-    'LEC': { team: 'ferrari', code: 'chalec01' },
-    'HAM': { team: 'ferrari', code: 'lewham01' },
-    
-    // Haas
-    'OCO': { team: year === 2026 ? 'haasf1team' : 'haas', code: 'estoco01' },
-    'BEA': { team: year === 2026 ? 'haasf1team' : 'haas', code: 'olibea01' },
-    
-    // McLaren
-    'NOR': { team: 'mclaren', code: 'lannor01' },
-    'PIA': { team: 'mclaren', code: 'oscpia01' },
-    
-    // Mercedes
-    'ANT': { team: 'mercedes', code: 'andant01' },
-    'RUS': { team: 'mercedes', code: 'georus01' },
-    
-    // Racing Bulls
-    'HAD': { team: year === 2026 ? 'redbullracing' : 'racingbulls', code: 'isahad01' },
-    'LAW': { team: 'racingbulls', code: 'lialaw01' },
-    'LIN': { team: 'racingbulls', code: 'arvlin01' },
-    
-    // Red Bull Racing
-    'VER': { team: 'redbullracing', code: 'maxver01' },
-    'TSU': { team: 'redbullracing', code: 'yuktsu01' },
-    
-    // Williams
-    'ALB': { team: 'williams', code: 'alealb01' },
-    'SAI': { team: 'williams', code: 'carsai01' }
-  };
-
-  const driver = driverMap[driverCode];
-  if (driver) {
-    return `/images/drivers/${year}${driver.team}${driver.code}right.avif`;
-  }
-  return null;
+// Images of a season's drivers by abbreviation, from the /api/drivers/{year} roster
+export const getDriverImages = (roster) => {
+  const images = {};
+  (roster?.drivers || []).forEach(driver => {
+    images[driver.abbreviation] = driver.images || {};
+  });
+  return images;
 };
 
 // Circuit name mapping to circuit image filenames
@@ -0,0 +1,62 @@
+"""
+gunicorn settings, read automatically by `gunicorn app:app` from the working directory
+Bind address and worker count come from gunicorn's own PORT and WEB_CONCURRENCY.
+
+With PRELOAD_APP=true (the default) the master imports the app once, warms the hot
+sessions (see preload.py) and then forks the workers, so they start with a warm
+session cache whose memory they share copy-on-write instead of each importing FastF1
+and loading the same sessions cold. PRELOAD_APP=false gives every worker its own
+import and cold cache, as before.
+
+Under preload:
+  - background threads (disk cache eviction, prefetch, the live feed) start per worker
+    in post_fork; a thread started in the master would not exist in the workers, and
+    prefetch's per-host flock would be held by a descriptor every worker shares
+  - FastF1's HTTP connections and SQLite handle are closed before forking and reopen
+    per worker; the upstream guard opens its state file per use, so it is fork-safe
+  - code changes need a restart: SIGHUP re-forks workers from the already loaded app
+"""
+
+import gc
+import os
+import time
+
+preload_app = os.environ.get('PRELOAD_APP', 'true').lower() == 'true'
+if preload_app:
+    # Tells app.py to leave its background threads to post_fork
+    os.environ['GUNICORN_PRELOAD'] = 'true'
+
+_started = time.monotonic()
+
+
+def when_ready(server):
+    """Warm the hot sessions in the master, before any worker is forked"""
+    if not preload_app:
+        return
+    import app
+    from disk_cache import release_connections
+    from preload import hot_sessions, memory_usage, options_from_env, warm
+
+    options = options_from_env()
+    started = time.perf_counter()
+    sessions = hot_sessions(app.schedule_cache, options['sessions'])
+    warmed = warm(app.session_cache, sessions, options['data'])
+    release_connections()
+    # Keep the collector from writing to every shared object's header in each worker
+    gc.freeze()
+
+    message = f"Preloaded {len(warmed)}/{len(sessions)} sessions in {time.perf_counter() - started:.1f}s"
+    memory = memory_usage()
+    if memory is not None:
+        message += f", master RSS {memory['rss'] / 1e6:.0f} MB"
+    server.log.info(message)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+        app.start_background()
+
+
+def post_worker_init(worker):
+    worker.log.info(f"Worker {worker.pid} ready {time.monotonic() - _started:.1f}s after the master started")
@@ -0,0 +1,153 @@
+"""
+HTTP caching and compression for the JSON API
+An after_request hook that gives every successful /api response a strong ETag,
+answers matching If-None-Match requests with 304, sets Cache-Control from a per-route
+policy and compresses the body with brotli or gzip. Compressed variants are kept in
+memory by ETag, so a popular payload is only compressed once per worker.
+"""
+
+from collections import OrderedDict
+import gzip
+import hashlib
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+# Finished sessions never change; let browsers and CDNs keep them for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Our encodings in order of preference, with their ETag suffixes
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+_ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _accepted_encodings():
+    """Encodings the client accepts (q > 0), by Accept-Encoding"""
+    accepted = request.accept_encodings
+    return [encoding for encoding in ENCODINGS if accepted[encoding] > 0]
+
+
+class HttpCache:
+    """
+    Response middleware for the /api routes
+
+    `policy(request)` returns the Cache-Control value for a successful response
+    (views that set their own Cache-Control keep it). Bodies smaller than `min_size`
+    bytes are sent uncompressed; compressed variants use at most `max_bytes` of memory.
+    """
+
+    def __init__(self, app=None, policy=None, min_size=1024, max_bytes=64 * 1024 * 1024):
+        self.policy = policy
+        self.min_size = min_size
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._variants = OrderedDict()  # (etag, encoding) -> compressed body
+        self._bytes = 0
+        self.variant_hits = 0
+        self.variant_misses = 0
+        self.not_modified = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.process)
+
+    def process(self, response):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith('/api/'):
+            return response
+        if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+            return response
+
+        if 'Cache-Control' not in response.headers and self.policy is not None:
+            cache_control = self.policy(request)
+            if cache_control:
+                response.headers['Cache-Control'] = cache_control
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return response
+
+        body = response.get_data()
+        etag, _ = response.get_etag()
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+
+        encoding = None
+        if len(body) >= self.min_size and 'Content-Encoding' not in response.headers:
+            response.vary.add('Accept-Encoding')
+            encodings = _accepted_encodings()
+            encoding = encodings[0] if encodings else None
+        variant_etag = etag + _ETAG_SUFFIXES[encoding] if encoding else etag
+
+        # Each encoding has its own strong ETag; any of them validates the payload
+        if request.if_none_match:
+            candidates = [etag] + [etag + suffix for suffix in _ETAG_SUFFIXES.values()]
+            if request.if_none_match.star_tag or \
+                    any(request.if_none_match.contains(candidate) for candidate in candidates):
+                return self._not_modified(response, variant_etag)
+
+        if encoding is not None:
+            response.set_data(self._variant(etag, encoding, body))
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(variant_etag)
+        return response
+
+    def _not_modified(self, response, etag):
+        with self._lock:
+            self.not_modified += 1
+        not_modified = Response(status=304)
+        for header in ('Cache-Control', 'Vary', 'Last-Modified', 'Expires'):
+            if header in response.headers:
+                not_modified.headers[header] = response.headers[header]
+        not_modified.set_etag(etag)
+        return not_modified
+
+    def _variant(self, etag, encoding, body):
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._variants.get(key)
+            if compressed is not None:
+                self._variants.move_to_end(key)
+                self.variant_hits += 1
+                return compressed
+            self.variant_misses += 1
+
+        compressed = _compress(body, encoding)
+
+        with self._lock:
+            if key not in self._variants and len(compressed) <= self.max_bytes:
+                self._variants[key] = compressed
+                self._bytes += len(compressed)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._variants.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._variants.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.variant_hits + self.variant_misses
+            return {
+                'variants': len(self._variants),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.variant_hits,
+                'misses': self.variant_misses,
+                'hit_ratio': round(self.variant_hits / lookups, 4) if lookups else None,
+                'not_modified': self.not_modified,
+            }
@@ -0,0 +1,268 @@
+"""
+Offline ingest of finished sessions into the precomputed response store
+
+Loads every completed session of the given seasons once and writes the payloads
+served by /api/session, /api/laps, /api/race-control and /api/drivers, the circuit
+layouts behind /api/circuit, and the session's car data to the memory-mapped telemetry
+store.
+Sessions that were already ingested are skipped, so an interrupted run can simply
+be started again.
+
+Sessions load in a pool of worker processes sharing one FastF1 cache directory. Every
+outcome is recorded in a manifest (ingest_manifest.json in the store), failed sessions
+are retried in later passes, and the run reports its throughput in sessions/second.
+
+Usage:
+    python ingest.py 2018 2024 --workers 4
+    python ingest.py 2018 2024 --cache-only        # only warm the FastF1 cache/ volume
+    python ingest.py 2024 --refresh-days 7         # nightly: redo last week's sessions
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+
+import fastf1
+import orjson
+import pandas as pd
+
+from circuits import CircuitStore, build_layout, circuit_id
+from payloads import PayloadUnavailable, SESSION_PAYLOADS
+from precomputed import PrecomputedStore, normalize_session_type
+from telemetry_store import TelemetryStore
+
+logger = logging.getLogger('ingest')
+
+# Marker written once a session's payloads are complete
+DONE_MARKER = '_ingested'
+
+MANIFEST_NAME = 'ingest_manifest.json'
+
+
+def completed_sessions(year, min_age_hours):
+    """Yield (year, round, session_type, start) for sessions that finished long enough ago"""
+    schedule = fastf1.get_event_schedule(year, include_testing=False)
+    cutoff = pd.Timestamp.utcnow().tz_localize(None) - pd.Timedelta(hours=min_age_hours)
+
+    for _, event in schedule.iterrows():
+        for i in range(1, 6):
+            name = event.get(f'Session{i}')
+            date = event.get(f'Session{i}DateUtc')
+            if not name or pd.isna(name) or pd.isna(date) or date > cutoff:
+                continue
+            yield year, int(event['RoundNumber']), normalize_session_type(name), date
+
+
+def prepare_cache(cache_dir):
+    """
+    Make the FastF1 cache safe to share between worker processes
+    Parsed data is pickled per session, and no two workers load the same session, so
+    those files never collide. The raw HTTP cache is one SQLite database; switching it
+    to write-ahead logging (persistent in the file) lets readers carry on while one
+    worker writes, instead of failing with "database is locked".
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with sqlite3.connect(os.path.join(cache_dir, 'fastf1_http_cache.sqlite'), timeout=30) as db:
+        db.execute('PRAGMA journal_mode=WAL')
+
+
+def _init_worker(cache_dir):
+    logging.basicConfig(level=logging.WARNING)
+    fastf1.Cache.enable_cache(cache_dir)
+
+
+class Manifest:
+    """
+    Outcome of every session an ingest run touched, kept as JSON next to the payloads
+    Entries survive across runs, so the manifest shows when each session was last
+    ingested and which ones keep failing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+        except FileNotFoundError:
+            data = {}
+        self.sessions = data.get('sessions', {})
+        self.runs = data.get('runs', [])
+
+    @staticmethod
+    def key(year, round_number, session_type):
+        return f'{year}/{round_number:02d}/{session_type}'
+
+    def record(self, year, round_number, session_type, **fields):
+        entry = self.sessions.setdefault(self.key(year, round_number, session_type), {})
+        entry.update(fields, updated_at=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+
+    def save(self):
+        """Write atomically; a crashed run leaves the previous manifest intact"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps({'runs': self.runs[-50:], 'sessions': self.sessions},
+                                 option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+        os.replace(tmp_path, self.path)
+
+
+def store_session(store_root, session, year, round_number, session_type):
+    """Write every payload of a loaded session to the store and mark it as ingested"""
+    store = PrecomputedStore(store_root)
+    written, unavailable = [], []
+    for name, build in SESSION_PAYLOADS.items():
+        try:
+            payload = build(session)
+        except PayloadUnavailable:
+            unavailable.append(name)
+            continue
+        store.save(name, payload, year, round_number, session_type)
+        written.append(name)
+
+    # Races also record the circuit's layout (a new one only if the track changed)
+    if session_type == 'R':
+        try:
+            layout = build_layout(session)
+        except PayloadUnavailable:
+            unavailable.append('circuit')
+        else:
+            CircuitStore(store_root).add(circuit_id(session.event['Location']), layout, year)
+            written.append('circuit')
+
+    if getattr(session, '_car_data', None) and len(getattr(session, '_laps', ())):
+        TelemetryStore(store_root).write(session, year, round_number, session_type)
+        written.append('car_data')
+
+    # Without results the data has not been published yet; leave it for the next run
+    if 'session' in written:
+        store.save(DONE_MARKER, {'written': written, 'unavailable': unavailable},
+                   year, round_number, session_type)
+    return {'written': written, 'unavailable': unavailable}
+
+
+def ingest_session(store_root, year, round_number, session_type, cache_only=False):
+    """
+    Load one session and write all of its payloads; runs in a worker process
+    With cache_only the session only lands in the FastF1 cache directory.
+    """
+    started = time.monotonic()
+    session = fastf1.get_session(year, round_number, session_type)
+    session.load(laps=True, telemetry=True, weather=True, messages=True)
+    if cache_only:
+        summary = {'written': [], 'unavailable': []}
+    else:
+        summary = store_session(store_root, session, year, round_number, session_type)
+    summary['seconds'] = round(time.monotonic() - started, 1)
+    return summary
+
+
+def _ingest_pass(pending, attempt, args, manifest, progress):
+    """Load the pending sessions in a fresh process pool; returns the ones that failed"""
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.cache_dir,)) as pool:
+        futures = {pool.submit(ingest_session, args.store, *key, cache_only=args.cache_only): key
+                   for key in pending}
+        for future in as_completed(futures):
+            year, round_number, session_type = key = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                # A crashed worker (e.g. killed for memory) breaks the pool; the rest of
+                # the pass then fails here too and is retried with a new pool
+                failed.append(key)
+                manifest.record(*key, status='failed', attempts=attempt, error=f'{type(e).__name__}: {e}')
+                logger.error(f"{year} round {round_number} {session_type} failed "
+                             f"(attempt {attempt}): {str(e)}")
+            else:
+                progress['done'] += 1
+                manifest.record(*key, status='ok', attempts=attempt, error=None, **summary)
+                elapsed = time.monotonic() - progress['started']
+                logger.info(f"[{progress['done']}/{progress['total']}] {year} round {round_number} "
+                            f"{session_type} in {summary['seconds']:.0f}s: "
+                            f"wrote {', '.join(summary['written']) or 'nothing'} "
+                            f"({progress['done'] / elapsed:.2f} sessions/s)")
+            manifest.save()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute API payloads for finished sessions')
+    parser.add_argument('start_year', type=int)
+    parser.add_argument('end_year', type=int, nargs='?', help='last season to ingest (default: start_year)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='sessions loaded in parallel (default: CPU count)')
+    parser.add_argument('--store', default=os.environ.get('PRECOMPUTED_DIR', 'precomputed'))
+    parser.add_argument('--cache-dir', default=os.environ.get('FASTF1_CACHE_DIR', 'cache'),
+                        help='FastF1 cache directory (default: FASTF1_CACHE_DIR)')
+    parser.add_argument('--manifest', help=f'manifest file (default: <store>/{MANIFEST_NAME})')
+    parser.add_argument('--min-age-hours', type=float, default=24,
+                        help='only ingest sessions that started at least this long ago')
+    parser.add_argument('--force', action='store_true', help='re-ingest sessions that are already stored')
+    parser.add_argument('--refresh-days', type=float, default=0,
+                        help='re-ingest sessions that started within this many days (nightly refresh)')
+    parser.add_argument('--cache-only', action='store_true',
+                        help='only load sessions into the FastF1 cache, write no payloads')
+    parser.add_argument('--retries', type=int, default=2, help='extra passes over failed sessions')
+    parser.add_argument('--retry-delay', type=float, default=60,
+                        help='seconds to wait before each retry pass (rate limits)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    prepare_cache(args.cache_dir)
+    fastf1.Cache.enable_cache(args.cache_dir)
+    manifest = Manifest(args.manifest or os.path.join(args.store, MANIFEST_NAME))
+
+    # Schedules are fetched here, before the workers start, so they only read them
+    store = PrecomputedStore(args.store)
+    refresh_after = pd.Timestamp.utcnow().tz_localize(None) - pd.Timedelta(days=args.refresh_days)
+    pending = []
+    for season in range(args.start_year, (args.end_year or args.start_year) + 1):
+        for year, round_number, session_type, start in completed_sessions(season, args.min_age_hours):
+            key = (year, round_number, session_type)
+            if args.cache_only:
+                done = manifest.sessions.get(manifest.key(*key), {}).get('status') == 'ok'
+            else:
+                done = store.exists(DONE_MARKER, *key)
+            if args.force or not done or (args.refresh_days and start >= refresh_after):
+                pending.append(key)
+    logger.info(f"{len(pending)} sessions to {'cache' if args.cache_only else 'ingest into ' + args.store} "
+                f"with {args.workers} workers")
+
+    progress = {'done': 0, 'total': len(pending), 'started': time.monotonic()}
+    remaining = pending
+    for attempt in range(1, args.retries + 2):
+        if not remaining:
+            break
+        if attempt > 1:
+            logger.info(f"Retrying {len(remaining)} failed sessions in {args.retry_delay:.0f}s")
+            time.sleep(args.retry_delay)
+        remaining = _ingest_pass(remaining, attempt, args, manifest, progress)
+
+    elapsed = time.monotonic() - progress['started']
+    rate = progress['done'] / elapsed if elapsed else 0.0
+    manifest.runs.append({
+        'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'seasons': [args.start_year, args.end_year or args.start_year],
+        'cache_only': args.cache_only,
+        'workers': args.workers,
+        'sessions': len(pending),
+        'ok': progress['done'],
+        'failed': len(remaining),
+        'seconds': round(elapsed, 1),
+        'sessions_per_second': round(rate, 3),
+    })
+    manifest.save()
+    logger.info(f"Finished {progress['done']}/{len(pending)} sessions in {elapsed:.0f}s "
+                f"({rate:.2f} sessions/s), {len(remaining)} failed")
+    return 1 if remaining else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
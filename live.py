@@ -0,0 +1,510 @@
+"""
+Live timing over Server-Sent Events
+Each process reads one live-timing feed in the format FastF1's SignalR client records
+(`python -m fastf1.livetiming save feed.txt`): one [topic, data, timestamp] message
+per line. Messages update an in-memory LiveState (classification, completed laps,
+race-control messages, track and session status) and every change becomes an event.
+Events are encoded once and kept in a ring buffer that every SSE subscriber reads
+from, so a thousand clients cost one feed reader, not a thousand session loads.
+
+The reader either follows a file the recorder is still writing (live) or replays a
+finished recording in scaled real time (development and load tests):
+    python live.py feed.txt --speed 20
+"""
+
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+import argparse
+import ast
+import json
+import logging
+import os
+import threading
+import time
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Kinds of events a subscriber can ask for; a snapshot is always sent first
+EVENTS = ('classification', 'lap', 'race_control', 'status', 'weather')
+
+
+def _parse_time(text):
+    """Feed timestamp ('2024-03-02T15:03:01.1234567Z') as an aware datetime, or None"""
+    if not text:
+        return None
+    text = text.rstrip('Z')
+    whole, dot, fraction = text.partition('.')
+    try:
+        return datetime.fromisoformat(whole + dot + fraction[:6]).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def parse_line(line):
+    """
+    One recorded line as (topic, data, timestamp)
+    Returns None for lines that can't be read (the recorder writes Python reprs, which
+    are usually but not always valid JSON).
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        message = json.loads(line)
+    except ValueError:
+        try:
+            message = ast.literal_eval(line)
+        except (ValueError, SyntaxError):
+            return None
+    if not isinstance(message, list) or len(message) < 2:
+        return None
+
+    topic, data = message[0], message[1]
+    timestamp = message[2] if len(message) > 2 else ''
+    if isinstance(data, str):
+        # The initial state after subscribing is recorded as JSON strings
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return None
+    return topic, data, _parse_time(timestamp)
+
+
+def read_feed(path, follow=False, speed=None, stop=None, poll_interval=0.2):
+    """
+    Yield (topic, data, timestamp) messages from a recorded feed
+
+    follow: keep reading as the recorder appends to the file (live)
+    speed: replay with the recorded gaps divided by `speed` (None: as fast as possible)
+    stop: threading.Event ending the feed early
+    """
+    stop = stop or threading.Event()
+    while follow and not os.path.exists(path) and not stop.wait(poll_interval):
+        pass  # the recorder hasn't started yet
+    first_timestamp = started = None
+    with open(path, 'rb') as feed:
+        while not stop.is_set():
+            line = feed.readline()
+            if not line.endswith(b'\n'):
+                if follow:
+                    # Partial line: wait for the recorder to finish writing it
+                    feed.seek(-len(line), os.SEEK_CUR)
+                    stop.wait(poll_interval)
+                    continue
+                if not line:
+                    return
+
+            message = parse_line(line.decode('utf-8', 'replace'))
+            if message is None:
+                continue
+            timestamp = message[2]
+            if speed and timestamp is not None:
+                if first_timestamp is None:
+                    first_timestamp, started = timestamp, time.monotonic()
+                due = started + (timestamp - first_timestamp).total_seconds() / speed
+                if stop.wait(max(due - time.monotonic(), 0)):
+                    return
+            yield message
+
+
+def _merge(target, update):
+    """
+    Apply a partial feed update to a dict
+    The feed sends lists whole at first and then updates single items by index
+    ({'Sectors': {'2': {...}}}), so lists are kept as dicts keyed by index.
+    """
+    for key, value in update.items():
+        if key == '_kf':
+            continue
+        if isinstance(value, list):
+            value = {str(index): item for index, item in enumerate(value)}
+        if isinstance(value, dict):
+            current = target.get(key)
+            target[key] = _merge(current if isinstance(current, dict) else {}, value)
+        else:
+            target[key] = value
+    return target
+
+
+def _items(indexed):
+    """Values of an index-keyed dict in index order"""
+    return [indexed[key] for key in sorted(indexed, key=lambda key: int(key) if key.isdigit() else 0)]
+
+
+def _value(entry):
+    """Timing values arrive as {'Value': ...}; empty strings mean no value"""
+    if isinstance(entry, dict):
+        entry = entry.get('Value')
+    return entry if entry not in ('', None) else None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flag(value):
+    return value in (True, 'true', 'True')
+
+
+class LiveState:
+    """Session state built from feed messages, in the API's field names"""
+
+    def __init__(self):
+        self.session = {}
+        self.status = {}
+        self.weather = {}
+        self.drivers = {}  # driver number -> DriverList entry
+        self.timing = {}  # driver number -> TimingData line
+        self.tyres = {}  # driver number -> TimingAppData line
+        self.laps = []
+        self.race_control = []
+        self._rows = {}  # driver number -> last classification row sent
+        self._messages = set()  # race-control message indexes seen
+        self.updated = None
+
+    def row(self, number):
+        """Classification row of one driver"""
+        driver = self.drivers.get(number, {})
+        line = self.timing.get(number, {})
+        stints = _items(self.tyres.get(number, {}).get('Stints', {}))
+        stint = stints[-1] if stints else {}
+        return {
+            'position': _int(line.get('Position')) or _int(driver.get('Line')),
+            'driver_number': number,
+            'driver': driver.get('Tla'),
+            'full_name': driver.get('FullName'),
+            'team_name': driver.get('TeamName'),
+            'team_color': driver.get('TeamColour'),
+            'laps': _int(line.get('NumberOfLaps')),
+            'gap_to_leader': _value(line.get('GapToLeader')),
+            'interval': _value(line.get('IntervalToPositionAhead')),
+            'last_lap_time': _value(line.get('LastLapTime')),
+            'best_lap_time': _value(line.get('BestLapTime')),
+            'in_pit': _flag(line.get('InPit')),
+            'pit_stops': _int(line.get('NumberOfPitStops')) or 0,
+            'retired': _flag(line.get('Retired')) or _flag(line.get('Stopped')),
+            'compound': stint.get('Compound'),
+            'tyre_laps': _int(stint.get('TotalLaps')),
+            'stint': len(stints) or None,
+        }
+
+    def classification(self):
+        numbers = set(self.drivers) | set(self.timing)
+        rows = [self.row(number) for number in numbers]
+        return sorted(rows, key=lambda row: (row['position'] is None, row['position'] or 0,
+                                             _int(row['driver_number']) or 0))
+
+    def snapshot(self):
+        # Copies, so the feed thread can keep updating while the snapshot is encoded
+        return {
+            'session': json.loads(json.dumps(self.session)),
+            'status': dict(self.status),
+            'weather': dict(self.weather),
+            'classification': self.classification(),
+            'laps': list(self.laps),
+            'race_control': list(self.race_control),
+            'updated': self.updated,
+        }
+
+    def _changed_rows(self, numbers):
+        changed = []
+        for number in numbers:
+            row = self.row(number)
+            if self._rows.get(number) != row:
+                self._rows[number] = row
+                changed.append(row)
+        return [('classification', {'drivers': changed})] if changed else []
+
+    def _timing(self, data, timestamp):
+        events = []
+        lines = data.get('Lines', {})
+        for number, update in lines.items():
+            line = self.timing.setdefault(number, {})
+            laps_before = _int(line.get('NumberOfLaps'))
+            _merge(line, update)
+            lap_number = _int(line.get('NumberOfLaps'))
+            if 'NumberOfLaps' in update and lap_number and lap_number != laps_before \
+                    and _value(line.get('LastLapTime')):
+                sectors = [_value(sector) for sector in _items(line.get('Sectors', {}))]
+                stints = _items(self.tyres.get(number, {}).get('Stints', {}))
+                lap = {
+                    'time': timestamp,
+                    'driver': self.drivers.get(number, {}).get('Tla'),
+                    'driver_number': number,
+                    'lap_number': lap_number,
+                    'lap_time': _value(line.get('LastLapTime')),
+                    'sector1_time': sectors[0] if len(sectors) > 0 else None,
+                    'sector2_time': sectors[1] if len(sectors) > 1 else None,
+                    'sector3_time': sectors[2] if len(sectors) > 2 else None,
+                    'compound': stints[-1].get('Compound') if stints else None,
+                    'tyre_life': _int(stints[-1].get('TotalLaps')) if stints else None,
+                    'position': _int(line.get('Position')),
+                }
+                self.laps.append(lap)
+                events.append(('lap', lap))
+        return self._changed_rows(lines) + events
+
+    def _race_control(self, data):
+        messages = data.get('Messages', {})
+        if isinstance(messages, list):
+            messages = {str(index): message for index, message in enumerate(messages)}
+        events = []
+        for index in sorted(messages, key=lambda key: _int(key) or 0):
+            if index in self._messages:
+                continue
+            self._messages.add(index)
+            message = messages[index]
+            entry = {
+                'time': message.get('Utc'),
+                'lap': message.get('Lap'),
+                'category': message.get('Category'),
+                'message': message.get('Message'),
+                'flag': message.get('Flag'),
+                'scope': message.get('Scope'),
+                'sector': str(message['Sector']) if message.get('Sector') is not None else None,
+            }
+            self.race_control.append(entry)
+            events.append(('race_control', entry))
+        return events
+
+    def _status(self, topic, data):
+        before = dict(self.status)
+        if topic == 'TrackStatus':
+            self.status['track_status'] = data.get('Status', self.status.get('track_status'))
+            self.status['track_message'] = data.get('Message', self.status.get('track_message'))
+        elif topic == 'SessionStatus':
+            self.status['session_status'] = data.get('Status', self.status.get('session_status'))
+        elif topic == 'LapCount':
+            self.status['current_lap'] = data.get('CurrentLap', self.status.get('current_lap'))
+            self.status['total_laps'] = data.get('TotalLaps', self.status.get('total_laps'))
+        elif topic == 'SessionInfo':
+            _merge(self.session, data)
+        return [('status', dict(self.status))] if self.status != before else []
+
+    def apply(self, topic, data, timestamp=None):
+        """
+        Apply one feed message
+        Returns: [(event, payload)] for everything that changed
+        """
+        if not isinstance(data, dict) or topic.endswith('.z'):
+            # Compressed car and position data isn't part of the live state
+            return []
+        if timestamp is not None:
+            self.updated = timestamp.isoformat().replace('+00:00', 'Z')
+        timestamp = self.updated
+
+        if topic == 'DriverList':
+            numbers = [number for number, entry in data.items() if isinstance(entry, dict)]
+            for number in numbers:
+                _merge(self.drivers.setdefault(number, {}), data[number])
+            return self._changed_rows(numbers)
+        if topic == 'TimingData':
+            return self._timing(data, timestamp)
+        if topic == 'TimingAppData':
+            lines = data.get('Lines', {})
+            for number, update in lines.items():
+                _merge(self.tyres.setdefault(number, {}), update)
+            return self._changed_rows(lines)
+        if topic == 'RaceControlMessages':
+            return self._race_control(data)
+        if topic == 'WeatherData':
+            before = dict(self.weather)
+            _merge(self.weather, data)
+            return [('weather', dict(self.weather))] if self.weather != before else []
+        if topic in ('TrackStatus', 'SessionStatus', 'LapCount', 'SessionInfo'):
+            return self._status(topic, data)
+        return []
+
+
+def _encode(event_id, event, payload):
+    return f'id: {event_id}\nevent: {event}\ndata: '.encode() + orjson.dumps(payload) + b'\n\n'
+
+
+class LiveHub:
+    """
+    Feed reader thread, live state and a ring buffer of encoded events
+
+    Subscribers wait on one Condition and copy new events out of the buffer, so
+    publishing costs the same for one subscriber or thousands. A subscriber that falls
+    more than `buffer_events` behind gets a fresh snapshot instead.
+
+    Every open stream holds a request thread, so at most `max_streams` are admitted
+    (0: no limit) and each is closed after `max_stream_seconds` (0: never); the
+    client's EventSource then reconnects with Last-Event-ID and misses nothing.
+    """
+
+    def __init__(self, buffer_events=1000, heartbeat=15, max_streams=0, max_stream_seconds=0):
+        self.state = LiveState()
+        self.heartbeat = heartbeat
+        self.max_streams = max_streams
+        self.max_stream_seconds = max_stream_seconds
+        self._events = deque(maxlen=buffer_events)  # (id, event, encoded bytes)
+        self._condition = threading.Condition()
+        self._last_id = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.source = None
+        self.feed_state = 'idle'
+        self.messages = 0
+        self.published = 0
+        self.subscribers = 0
+        self.streams = 0  # admitted, including streams not started yet
+        self.rejected = 0
+
+    def ingest(self, topic, data, timestamp=None):
+        """Apply a feed message and publish the events it causes"""
+        with self._condition:
+            self.messages += 1
+            changes = self.state.apply(topic, data, timestamp)
+            for event, payload in changes:
+                self._last_id += 1
+                self._events.append((self._last_id, event, _encode(self._last_id, event, payload)))
+            if changes:
+                self.published += len(changes)
+                self._condition.notify_all()
+
+    def start(self, path, follow=True, speed=None, loop=False):
+        """Read the feed in a daemon thread; replays start over with fresh state when looping"""
+        self.source = path
+
+        def run():
+            self.feed_state = 'running'
+            try:
+                while True:
+                    for message in read_feed(path, follow=follow, speed=speed, stop=self._stop):
+                        self.ingest(*message)
+                    if not loop or self._stop.is_set():
+                        break
+                    with self._condition:
+                        # Skipping an id sends every subscriber a fresh snapshot
+                        self.state = LiveState()
+                        self._events.clear()
+                        self._last_id += 1
+                        self._condition.notify_all()
+                self.feed_state = 'finished'
+            except Exception as e:
+                self.feed_state = 'failed'
+                logger.error(f"Live feed {path} failed: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='live-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            return {**self.state.snapshot(), 'last_event_id': self._last_id}
+
+    def _backlog(self, cursor):
+        """Encoded events after `cursor`, or None if they have left the buffer (lock held)"""
+        if cursor >= self._last_id:
+            return []
+        if not self._events or cursor < self._events[0][0] - 1:
+            return None
+        return list(islice(self._events, cursor - self._events[0][0] + 1, None))
+
+    def admit(self):
+        """Reserve a stream; False when `max_streams` are open (call release() when done)"""
+        with self._condition:
+            if self.max_streams and self.streams >= self.max_streams:
+                self.rejected += 1
+                return False
+            self.streams += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self.streams -= 1
+
+    def stream(self, last_event_id=None, events=None):
+        """
+        Yield SSE chunks for one subscriber
+        Starts with a snapshot, or with the buffered events after `last_event_id` when a
+        client reconnects in time, then sends each event as it is published and a
+        comment every `heartbeat` seconds so proxies keep the connection open. Ends
+        within a heartbeat of `max_stream_seconds`.
+        """
+        deadline = time.monotonic() + self.max_stream_seconds if self.max_stream_seconds else None
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield b'retry: 3000\n\n'
+            cursor = last_event_id
+            while not self._stop.is_set() and (deadline is None or time.monotonic() < deadline):
+                with self._condition:
+                    backlog = None if cursor is None else self._backlog(cursor)
+                    if backlog is None:
+                        snapshot = {**self.state.snapshot(), 'last_event_id': self._last_id}
+                        cursor = self._last_id
+                        chunk = _encode(cursor, 'snapshot', snapshot)
+                    else:
+                        if not backlog:
+                            self._condition.wait(self.heartbeat)
+                            backlog = self._backlog(cursor)
+                            if backlog is None:
+                                continue
+                        if backlog:
+                            cursor = backlog[-1][0]
+                        chunk = b''.join(encoded for _, event, encoded in backlog
+                                         if events is None or event in events) or None
+                if chunk is None:
+                    yield b': keep-alive\n\n'
+                elif chunk:
+                    yield chunk
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def stats(self):
+        with self._condition:
+            return {
+                'source': self.source,
+                'feed': self.feed_state,
+                'messages': self.messages,
+                'events_published': self.published,
+                'last_event_id': self._last_id,
+                'buffered_events': len(self._events),
+                'subscribers': self.subscribers,
+                'streams': self.streams,
+                'max_streams': self.max_streams,
+                'rejected': self.rejected,
+            }
+
+
+def options_from_env():
+    """Feed options for LiveHub.start, or None when live mode is off (no LIVE_FEED)"""
+    path = os.environ.get('LIVE_FEED')
+    if not path:
+        return None
+    mode = os.environ.get('LIVE_FEED_MODE', 'follow').lower()
+    if mode not in ('follow', 'replay'):
+        raise ValueError(f"LIVE_FEED_MODE must be follow or replay, not '{mode}'")
+    return {
+        'path': path,
+        'follow': mode == 'follow',
+        'speed': float(os.environ.get('LIVE_REPLAY_SPEED', 1)) if mode == 'replay' else None,
+        'loop': mode == 'replay' and os.environ.get('LIVE_REPLAY_LOOP', 'False').lower() == 'true',
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a recorded live-timing feed and print its events')
+    parser.add_argument('feed', help='file written by `python -m fastf1.livetiming save`')
+    parser.add_argument('--speed', type=float, default=0, help='replay speed (0: as fast as possible)')
+    parser.add_argument('--follow', action='store_true', help='keep reading as the file grows')
+    args = parser.parse_args()
+
+    state = LiveState()
+    for message in read_feed(args.feed, follow=args.follow, speed=args.speed or None):
+        for event, payload in state.apply(*message):
+            print(event, orjson.dumps(payload).decode())
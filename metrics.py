@@ -0,0 +1,224 @@
+"""
+Request and session-load instrumentation in the Prometheus text format
+Histograms are fixed-bucket counters updated under a lock, so recording a request costs
+a few microseconds and the instrumentation can stay on in production.
+
+Every request is split into stages:
+    load      - getting session data (session cache, FastF1 loads, precomputed store)
+    serialize - turning DataFrames into JSON-ready rows and encoding JSON
+    transform - everything else the view does (total minus the other two)
+With SERVER_TIMING=true the same numbers go out in a Server-Timing header, where
+browser dev tools show them next to the request.
+
+Metrics are kept per process, like /api/cache/stats; each gunicorn worker reports its own.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+
+# Seconds; covers cached responses (ms) up to cold FastF1 loads (a minute or more)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        bounds = self.buckets + (float('inf'),)
+        for label_values, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                labels = _labels(self.labels + ('le',), label_values + (_number(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {values[-1]!r}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = dict(self._series)
+        if not series and not self.labels:
+            series[()] = 0
+        for label_values, value in sorted(series.items()):
+            lines.append(f'{self.name}{_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram('f1api_request_duration_seconds', 'Time to build an API response',
+                            ('route', 'method', 'status'))
+STAGE_SECONDS = Histogram('f1api_request_stage_seconds', 'Time spent per request stage',
+                          ('route', 'stage'))
+SESSION_LOAD_SECONDS = Histogram('f1api_session_load_seconds',
+                                 'FastF1 session load time by step (get_session, load)', ('step',))
+SESSION_LOAD_ERRORS = Counter('f1api_session_load_errors_total', 'Failed FastF1 session loads')
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+_collectors = []
+
+
+def observe_load(step, seconds):
+    SESSION_LOAD_SECONDS.observe(seconds, step)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as one stage of the current request
+    A no-op outside requests (ingest, prefetch) and inside another timed stage, so
+    nested helpers aren't counted twice.
+    """
+    if not has_request_context() or 'stages' not in g or g.stage_depth:
+        yield
+        return
+    g.stage_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.stages[name] = g.stages.get(name, 0.0) + time.perf_counter() - started
+        g.stage_depth -= 1
+
+
+def add_collector(collect):
+    """
+    Register a callable run at scrape time, returning [(name, type, help, [(labels, value)])]
+    where labels is a dict; used to export gauges and counters kept elsewhere (cache stats).
+    """
+    _collectors.append(collect)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in (REQUEST_SECONDS, STAGE_SECONDS, SESSION_LOAD_SECONDS, SESSION_LOAD_ERRORS):
+        lines.extend(metric.render())
+    lines.extend([
+        '# HELP f1api_requests_in_flight API requests being handled by this worker',
+        '# TYPE f1api_requests_in_flight gauge',
+        f'f1api_requests_in_flight {_in_flight}',
+    ])
+    for collect in _collectors:
+        for name, kind, help, samples in collect():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f'{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_response():
+    return Response(render(), mimetype=None, content_type=CONTENT_TYPE,
+                    headers={'Cache-Control': 'no-store'})
+
+
+def init_app(app, server_timing=False):
+    """
+    Time every /api request; register before other after_request hooks (e.g. HttpCache)
+    so the total includes them
+    """
+
+    @app.before_request
+    def start_timer():
+        global _in_flight
+        if not request.path.startswith('/api/'):
+            return
+        g.request_started = time.perf_counter()
+        g.stages = {}
+        g.stage_depth = 0
+        with _in_flight_lock:
+            _in_flight += 1
+
+    @app.after_request
+    def record(response):
+        if 'request_started' not in g:
+            return response
+        total = time.perf_counter() - g.request_started
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(total, route, request.method, str(response.status_code))
+
+        stages = g.stages
+        stages['transform'] = max(total - sum(stages.values()), 0.0)
+        for name, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, route, name)
+        if server_timing:
+            timings = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in stages.items()]
+            timings.append(f'total;dur={total * 1000:.1f}')
+            response.headers['Server-Timing'] = ', '.join(timings)
+            # Lets the frontend (another origin in development) read the timings too
+            response.headers['Timing-Allow-Origin'] = '*'
+        return response
+
+    @app.teardown_request
+    def finish(exc):
+        global _in_flight
+        if g.pop('request_started', None) is not None:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+
+def server_timing_from_env():
+    return os.environ.get('SERVER_TIMING', 'False').lower() == 'true'
@@ -0,0 +1,152 @@
+"""
+Cursor pagination, field projection and NDJSON streaming for list endpoints
+Rows are ordered by a stable key and a cursor is the key of the last row a client
+has seen, so pages stay consistent while live sessions keep adding rows
+"""
+
+from bisect import bisect_right
+
+import orjson
+import pandas as pd
+
+from serializers import serialize_frame
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_ROWS = 200
+
+
+def _driver_key(driver_number):
+    """Sort driver numbers numerically ('2' before '10')"""
+    driver_number = str(driver_number)
+    return (0, int(driver_number), '') if driver_number.isdigit() else (1, 0, driver_number)
+
+
+def lap_key(lap):
+    """Order laps lap by lap, then by driver number"""
+    return (lap.get('lap_number') or 0, _driver_key(lap.get('driver_number')))
+
+
+def lap_cursor(lap):
+    return f"{lap.get('lap_number') or 0}:{lap.get('driver_number')}"
+
+
+def parse_lap_cursor(cursor):
+    """'<lap number>:<driver number>' -> sort key; raises ValueError"""
+    lap_number, separator, driver_number = cursor.partition(':')
+    if not separator or not driver_number:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    try:
+        return (int(lap_number), _driver_key(driver_number))
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+def page_options(args, available_fields):
+    """
+    Pagination options from query parameters (limit, cursor, fields, format)
+    Raises ValueError with a message for the client on invalid values.
+    """
+    stream = args.get('format', '').lower() == 'ndjson'
+
+    limit = args.get('limit')
+    if limit is None:
+        limit = None if stream else DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    fields = None
+    if args.get('fields'):
+        fields = [name.strip() for name in args['fields'].split(',') if name.strip()]
+        unknown = [name for name in fields if name not in available_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. "
+                             f"Available: {', '.join(available_fields)}")
+
+    cursor = parse_lap_cursor(args['cursor']) if args.get('cursor') else None
+    return {'limit': limit, 'cursor': cursor, 'fields': fields, 'stream': stream}
+
+
+def sort_lap_frame(laps):
+    """A laps DataFrame in lap_key order: lap by lap, then by driver number"""
+    numbers = laps['DriverNumber'].astype(str)
+    numeric = numbers.str.isdigit()
+    order = pd.DataFrame({
+        'lap': laps['LapNumber'].fillna(0).to_numpy(),
+        'named': (~numeric).to_numpy(),
+        'number': pd.to_numeric(numbers.where(numeric), errors='coerce').fillna(0).to_numpy(),
+        'name': numbers.where(~numeric, '').to_numpy(),
+    })
+    return laps.iloc[order.sort_values(['lap', 'named', 'number', 'name']).index]
+
+
+class FrameLapKeys:
+    """
+    lap_key of each row of a sorted laps DataFrame, computed when looked up
+    Enough of a sequence for after_cursor() to bisect without a key per row.
+    """
+
+    def __init__(self, laps):
+        self.lap_numbers = laps['LapNumber'].fillna(0).to_numpy()
+        self.driver_numbers = laps['DriverNumber'].astype(str).to_numpy()
+
+    def __len__(self):
+        return len(self.lap_numbers)
+
+    def __getitem__(self, index):
+        return (int(self.lap_numbers[index]), _driver_key(self.driver_numbers[index]))
+
+    def cursor(self, index):
+        """lap_cursor() of the row at `index`"""
+        return f"{int(self.lap_numbers[index])}:{self.driver_numbers[index]}"
+
+
+def order_rows(rows, key):
+    """Rows sorted by key, with the matching list of keys for cursor lookups"""
+    keyed = sorted(((key(row), index) for index, row in enumerate(rows)))
+    return [rows[index] for _, index in keyed], [k for k, _ in keyed]
+
+
+def after_cursor(keys, cursor):
+    """Index of the first row after the cursor (keys must be sorted)"""
+    return 0 if cursor is None else bisect_right(keys, cursor)
+
+
+def project(rows, fields):
+    """Keep only the requested fields of each row (all of them if fields is None)"""
+    if fields is None:
+        return rows
+    return [{name: row.get(name) for name in fields} for row in rows]
+
+
+def ndjson_lines(rows, fields=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Yield rows as newline-delimited JSON, a chunk of rows at a time
+    Rows are encoded lazily so the full body never exists in memory at once.
+    """
+    chunk = []
+    for row in rows:
+        if fields is not None:
+            row = {name: row.get(name) for name in fields}
+        chunk.append(orjson.dumps(row))
+        if len(chunk) == chunk_rows:
+            yield b'\n'.join(chunk) + b'\n'
+            chunk = []
+    if chunk:
+        yield b'\n'.join(chunk) + b'\n'
+
+
+def frame_ndjson_lines(frame, columns, fields=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Yield a DataFrame's rows as newline-delimited JSON
+    Rows are serialized a chunk at a time, so only one chunk of dicts exists at once.
+    """
+    if fields is not None:
+        columns = [column for column in columns if column.name in fields]
+    for start in range(0, len(frame), chunk_rows):
+        yield from ndjson_lines(serialize_frame(frame.iloc[start:start + chunk_rows], columns), fields, chunk_rows)
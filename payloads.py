@@ -0,0 +1,139 @@
+"""
+Response payload builders shared by the Flask routes and the offline ingest
+Each builder turns a loaded FastF1 session into the data part of an API response
+"""
+
+import logging
+
+from serializers import Column, serialize_frame
+
+logger = logging.getLogger(__name__)
+
+
+class PayloadUnavailable(Exception):
+    """The session is loaded but has no data for this payload (yet)"""
+
+
+SCHEDULE_COLUMNS = [
+    Column('RoundNumber', 'round_number', 'int'),
+    Column('Country', 'country'),
+    Column('Location', 'location'),
+    Column('EventName', 'event_name'),
+    Column('EventDate', 'event_date', 'date'),
+    Column('EventFormat', 'event_format'),
+    Column('Session1', 'session1'),
+    Column('Session1Date', 'session1_date', 'utc'),
+    Column('Session2', 'session2'),
+    Column('Session2Date', 'session2_date', 'utc'),
+    Column('Session3', 'session3'),
+    Column('Session3Date', 'session3_date', 'utc'),
+    Column('Session4', 'session4'),
+    Column('Session4Date', 'session4_date', 'utc'),
+    Column('Session5', 'session5'),
+    Column('Session5Date', 'session5_date', 'utc'),
+]
+
+RESULT_COLUMNS = [
+    Column('Position', 'position', 'int'),
+    Column('DriverNumber', 'driver_number', 'str'),
+    Column('Abbreviation', 'abbreviation'),
+    Column('FullName', 'full_name'),
+    Column('TeamName', 'team_name'),
+    Column('TeamColor', 'team_color'),
+    Column('GridPosition', 'grid_position', 'int'),
+    Column('Points', 'points', 'float', default=0),
+    Column('Status', 'status'),
+    Column('Time', 'time', 'timedelta'),
+]
+
+LAP_COLUMNS = [
+    Column('Time', 'time', 'timedelta'),
+    Column('Driver', 'driver'),
+    Column('DriverNumber', 'driver_number', 'str'),
+    Column('LapTime', 'lap_time', 'laptime'),
+    Column('LapNumber', 'lap_number', 'int'),
+    Column('Stint', 'stint', 'int'),
+    Column('PitOutTime', 'pit_out_time', 'timedelta'),
+    Column('PitInTime', 'pit_in_time', 'timedelta'),
+    Column('Sector1Time', 'sector1_time', 'laptime'),
+    Column('Sector2Time', 'sector2_time', 'laptime'),
+    Column('Sector3Time', 'sector3_time', 'laptime'),
+    Column('Compound', 'compound'),
+    Column('TyreLife', 'tyre_life', 'int'),
+    Column('TrackStatus', 'track_status', 'str'),
+    Column('IsPersonalBest', 'is_personal_best', 'bool', default=False),
+]
+
+TELEMETRY_COLUMNS = [
+    Column('SessionTime', 'session_time', 'timedelta'),
+    Column('Speed', 'speed', 'int'),
+    Column('RPM', 'rpm', 'int'),
+    Column('nGear', 'gear', 'int'),
+    Column('Throttle', 'throttle', 'int'),
+    Column('Brake', 'brake', 'bool', default=False),
+    Column('DRS', 'drs', 'int'),
+    Column('Distance', 'distance', 'float'),
+]
+
+RACE_CONTROL_COLUMNS = [
+    Column('Time', 'time', 'timedelta'),
+    Column('Category', 'category'),
+    Column('Message', 'message'),
+    Column('Flag', 'flag'),
+    Column('Scope', 'scope'),
+    Column('Sector', 'sector', 'str'),
+]
+
+DRIVER_COLUMNS = [
+    Column('DriverNumber', 'driver_number', 'str'),
+    Column('Abbreviation', 'abbreviation'),
+    Column('FullName', 'full_name'),
+    Column('TeamName', 'team_name'),
+    Column('TeamColor', 'team_color'),
+]
+
+
+def build_results(session):
+    """Data for /api/session"""
+    results = session.results
+    if len(results) == 0:
+        raise PayloadUnavailable('Session results are not available yet.')
+    return {'results': serialize_frame(results, RESULT_COLUMNS)}
+
+
+def session_laps(session):
+    """The session's laps DataFrame, for /api/laps responses that serialize it in parts"""
+    if len(session.laps) == 0:
+        raise PayloadUnavailable('Lap data is not available for this session yet.')
+    return session.laps
+
+
+def build_laps(session):
+    """Data for /api/laps: every lap of the session, unfiltered"""
+    return {'laps': serialize_frame(session_laps(session), LAP_COLUMNS)}
+
+
+def build_race_control(session):
+    """Data for /api/race-control"""
+    race_control = session.race_control_messages
+    if len(race_control) == 0:
+        raise PayloadUnavailable('Race control messages are not available yet.')
+    messages = serialize_frame(race_control, RACE_CONTROL_COLUMNS)
+    return {'messages': messages, 'total_messages': len(messages)}
+
+
+def build_drivers(session):
+    """Data for /api/drivers/<year>/<round>/<session_type>"""
+    results = session.results
+    if len(results) == 0:
+        raise PayloadUnavailable('Driver list is not available for this session yet.')
+    return {'drivers': serialize_frame(results, DRIVER_COLUMNS)}
+
+
+# Per-session payloads kept in the precomputed store, by store name
+SESSION_PAYLOADS = {
+    'session': build_results,
+    'laps': build_laps,
+    'race_control': build_race_control,
+    'drivers': build_drivers,
+}
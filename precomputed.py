@@ -0,0 +1,91 @@
+"""
+Precomputed response store
+Finished sessions never change, so their payloads are built once (see ingest.py)
+and kept as gzip-compressed JSON files that the API serves directly
+"""
+
+import gzip
+import logging
+import os
+import tempfile
+
+import orjson
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Canonical short identifiers used in URLs, by FastF1 session name
+SESSION_ABBREVIATIONS = {
+    'RACE': 'R',
+    'QUALIFYING': 'Q',
+    'SPRINT': 'S',
+    'SPRINT QUALIFYING': 'SQ',
+    'SPRINT SHOOTOUT': 'SS',
+    'PRACTICE 1': 'FP1',
+    'PRACTICE 2': 'FP2',
+    'PRACTICE 3': 'FP3',
+}
+
+
+def normalize_session_type(session_type):
+    """Map 'Race', 'race', 'r' and 'R' to the same identifier"""
+    name = str(session_type).strip().upper()
+    return SESSION_ABBREVIATIONS.get(name, name)
+
+
+class PrecomputedStore:
+    """
+    Directory of payloads laid out as <root>/<year>/<round>/<session_type>/<name>.json.gz
+    Per-event payloads sit directly in the round directory, season rosters in the year
+    directory (see roster.py); circuit layouts, which outlive any one season, are under
+    <root>/circuits/ (see circuits.py)
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, name, year, round_number, session_type=None):
+        parts = [self.root, str(int(year)), f'{int(round_number):02d}']
+        if session_type is not None:
+            parts.append(normalize_session_type(session_type))
+        return os.path.join(*parts, f'{name}.json.gz')
+
+    def exists(self, name, year, round_number, session_type=None):
+        return os.path.exists(self.path(name, year, round_number, session_type))
+
+    def load(self, name, year, round_number, session_type=None):
+        """Return the stored payload, or None if it has not been precomputed"""
+        return read_payload(self.path(name, year, round_number, session_type))
+
+    def save(self, name, payload, year, round_number, session_type=None):
+        """Write a payload atomically so readers never see a partial file"""
+        return write_payload(self.path(name, year, round_number, session_type), payload)
+
+
+def read_payload(path):
+    """A gzipped JSON payload, or None if the file is missing or unreadable"""
+    try:
+        with metrics.stage('load'), gzip.open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable precomputed payload {path}: {str(e)}")
+        return None
+
+
+def write_payload(path, payload):
+    """Write a gzipped JSON payload atomically (temporary file, then rename)"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            f.write(orjson.dumps(payload))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
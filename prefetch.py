@@ -0,0 +1,297 @@
+"""
+Background prefetch of sessions that just finished
+Watches the event schedule and, shortly after each session's scheduled end, keeps
+trying to load it until the data is complete, so the first fans after a session never
+wait on a cold FastF1 download. Until the session is final (`final_after_hours` past its
+start, when penalties have been applied) it is only warmed: the session cache holds it
+and the FastF1 disk cache has its data. Once final it is loaded again and its payloads
+are written to the precomputed store, which is served as is from then on.
+
+Runs either inside the web app (PREFETCH_ENABLED=true, one scheduler per host) or as
+a separate process:
+    python prefetch.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import fastf1
+import orjson
+import pandas as pd
+
+from disk_cache import enable as enable_disk_cache
+from file_lock import lock
+from ingest import DONE_MARKER, store_session
+from precomputed import PrecomputedStore, normalize_session_type
+from session_cache import SessionCache
+
+logger = logging.getLogger(__name__)
+
+STATUS_FILE = '_prefetch_status.json'
+
+# Rough scheduled length of each session type, in minutes
+SESSION_DURATIONS = {
+    'R': 150,
+    'S': 60,
+    'Q': 75,
+    'SQ': 60,
+    'SS': 60,
+}
+DEFAULT_DURATION = 75
+
+
+def _now():
+    return pd.Timestamp.utcnow().tz_localize(None)
+
+
+class _Target:
+    __slots__ = ('year', 'round', 'session_type', 'name', 'ready_at', 'final_at', 'expires_at',
+                 'status', 'attempts', 'next_attempt', 'last_error', 'warmed_at')
+
+    def __init__(self, year, round_number, session_type, name, ready_at, final_at, expires_at):
+        self.year = year
+        self.round = round_number
+        self.session_type = session_type
+        self.name = name
+        self.ready_at = ready_at
+        self.final_at = final_at
+        self.expires_at = expires_at
+        self.status = 'waiting'
+        self.attempts = 0
+        self.next_attempt = ready_at
+        self.last_error = None
+        self.warmed_at = None
+
+    def as_dict(self):
+        def iso(ts):
+            return ts.strftime('%Y-%m-%dT%H:%M:%SZ') if ts is not None else None
+        return {
+            'year': self.year,
+            'round': self.round,
+            'session_type': self.session_type,
+            'session_name': self.name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt': iso(self.next_attempt) if self.status in ('waiting', 'retrying') else None,
+            'last_error': self.last_error,
+            'warmed_at': iso(self.warmed_at),
+        }
+
+
+class PrefetchScheduler:
+    """
+    Schedule-driven cache warmer
+
+    A session becomes a target `delay` minutes after its scheduled end and stays one
+    for `window_hours`. Failed or incomplete loads are retried with exponential
+    backoff; at most `max_concurrent` loads run at once. A warm target is loaded once
+    more and stored when it turns final, `final_after_hours` after its start, if that
+    is within its window (otherwise ingest.py stores it).
+    """
+
+    def __init__(self, store_root, session_cache=None, delay=15, window_hours=48, final_after_hours=24,
+                 max_concurrent=2, refresh_interval=900, backoff_base=120, backoff_max=1800):
+        self.store_root = store_root
+        self.session_cache = session_cache or SessionCache(max_entries=max_concurrent)
+        self.delay = pd.Timedelta(minutes=delay)
+        self.window = pd.Timedelta(hours=window_hours)
+        self.final_after = pd.Timedelta(hours=final_after_hours)
+        self.refresh_interval = refresh_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._targets = {}  # (year, round, session_type) -> _Target
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='prefetch')
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self._schedule_refreshed = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='prefetch-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, tick=30):
+        logger.info("Prefetch scheduler started")
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Prefetch tick failed: {str(e)}")
+            self._stop.wait(tick)
+
+    def tick(self):
+        if time.monotonic() - self._schedule_refreshed > self.refresh_interval:
+            self._refresh_targets()
+            self._schedule_refreshed = time.monotonic()
+
+        now = _now()
+        with self._lock:
+            for key, target in list(self._targets.items()):
+                if target.status in ('stored', 'failed', 'loading'):
+                    continue
+                if target.status == 'warm':
+                    # Provisional data in memory; store it once it is final
+                    if target.final_at <= now <= target.expires_at:
+                        target.status = 'loading'
+                        self._pool.submit(self._attempt, target)
+                elif now > target.expires_at:
+                    target.status = 'failed'
+                elif now >= target.next_attempt:
+                    target.status = 'loading'
+                    self._pool.submit(self._attempt, target)
+        self._write_status()
+
+    def _refresh_targets(self):
+        """Add sessions whose post-session window is open, drop the ones long gone"""
+        now = _now()
+        store = PrecomputedStore(self.store_root)
+        for year in sorted({now.year, (now - self.window).year}):
+            schedule = fastf1.get_event_schedule(year, include_testing=False)
+            for _, event in schedule.iterrows():
+                for i in range(1, 6):
+                    name = event.get(f'Session{i}')
+                    start = event.get(f'Session{i}DateUtc')
+                    if not name or pd.isna(name) or pd.isna(start):
+                        continue
+                    session_type = normalize_session_type(name)
+                    duration = pd.Timedelta(minutes=SESSION_DURATIONS.get(session_type, DEFAULT_DURATION))
+                    ready_at = start + duration + self.delay
+                    expires_at = ready_at + self.window
+                    if not ready_at <= now <= expires_at:
+                        continue
+                    key = (year, int(event['RoundNumber']), session_type)
+                    with self._lock:
+                        if key in self._targets:
+                            continue
+                        target = _Target(*key, name, ready_at, start + self.final_after, expires_at)
+                        # Already stored before a restart
+                        if store.exists(DONE_MARKER, *key):
+                            target.status = 'stored'
+                        self._targets[key] = target
+
+        with self._lock:
+            for key, target in list(self._targets.items()):
+                if now > target.expires_at + self.window:
+                    del self._targets[key]
+
+    def _attempt(self, target):
+        key = (target.year, target.round, target.session_type)
+        final = _now() >= target.final_at
+        try:
+            if final:
+                # The copy in memory may predate penalties; store what the source has now
+                self.session_cache.discard(*key)
+            session = self.session_cache.get(*key)
+            missing = self._missing_data(session)
+            if missing:
+                # Don't let an incomplete session linger in memory; reload it next time
+                self.session_cache.discard(*key)
+                raise RuntimeError(f"data not complete yet (missing {', '.join(missing)})")
+            if final:
+                store_session(self.store_root, session, *key)
+        except Exception as e:
+            with self._lock:
+                target.attempts += 1
+                target.last_error = str(e)
+                target.status = 'retrying'
+                backoff = min(self.backoff_base * 2 ** (target.attempts - 1), self.backoff_max)
+                target.next_attempt = _now() + pd.Timedelta(seconds=backoff)
+            logger.info(f"Prefetch of {key} not ready, retrying in {backoff}s: {str(e)}")
+        else:
+            with self._lock:
+                target.attempts += 1
+                target.status = 'stored' if final else 'warm'
+                target.last_error = None
+                target.warmed_at = _now()
+            logger.info(f"Prefetched and {'stored' if final else 'warmed'} {key}")
+        self._write_status()
+
+    @staticmethod
+    def _missing_data(session):
+        missing = []
+        if len(session.results) == 0:
+            missing.append('results')
+        if not len(getattr(session, '_laps', ())):
+            missing.append('laps')
+        if not getattr(session, '_car_data', None):
+            missing.append('car data')
+        return missing
+
+    def status(self):
+        with self._lock:
+            targets = sorted(self._targets.values(), key=lambda t: t.ready_at)
+            sessions = [t.as_dict() for t in targets]
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'pid': os.getpid(),
+            'updated_at': _now().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'warm': [s for s in sessions if s['status'] in ('warm', 'stored')],
+            'sessions': sessions,
+        }
+
+    def _write_status(self):
+        """Publish status to a file so any web worker can report it"""
+        os.makedirs(self.store_root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(self.status()))
+        os.replace(tmp_path, os.path.join(self.store_root, STATUS_FILE))
+
+
+def read_status(store_root):
+    """Return the last status published by a scheduler, or None if none has run"""
+    try:
+        with open(os.path.join(store_root, STATUS_FILE), 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def start_in_process(store_root, session_cache, **options):
+    """
+    Start a scheduler thread unless another process on this host already runs one
+    Returns the scheduler, or None if the lock is held elsewhere.
+    """
+    os.makedirs(store_root, exist_ok=True)
+    lock_file = open(os.path.join(store_root, '.prefetch.lock'), 'w')
+    if not lock(lock_file, blocking=False):
+        lock_file.close()
+        return None
+
+    scheduler = PrefetchScheduler(store_root, session_cache, **options)
+    scheduler._lock_file = lock_file  # held until the process exits
+    scheduler.start()
+    return scheduler
+
+
+def options_from_env():
+    return {
+        'delay': int(os.environ.get('PREFETCH_DELAY_MINUTES', 15)),
+        'window_hours': int(os.environ.get('PREFETCH_WINDOW_HOURS', 48)),
+        'max_concurrent': int(os.environ.get('PREFETCH_MAX_CONCURRENT', 2)),
+    }
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    enable_disk_cache(os.environ.get('FASTF1_CACHE_DIR', 'cache'))
+
+    store_root = os.environ.get('PRECOMPUTED_DIR', 'precomputed')
+    scheduler = start_in_process(store_root, None, **options_from_env())
+    if scheduler is None:
+        raise SystemExit("Another prefetch scheduler is already running for this store")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
@@ -0,0 +1,129 @@
+"""
+Warm sessions loaded once in the gunicorn master and shared with every worker
+With PRELOAD_APP=true (the default in gunicorn.conf.py) the master imports the app,
+loads the hot sessions (PRELOAD_SESSIONS: by default the last race and the finished
+sessions of the current weekend) into the session cache and then forks the workers.
+Each worker starts with those sessions already in its cache, and the memory holding
+them is shared copy-on-write: pages are only copied once a worker writes to them, which
+serving read-only DataFrames mostly doesn't do.
+
+Nothing here starts a thread. Threads don't survive fork, so the background work
+(prefetch, disk cache eviction, the live feed) is started per worker in post_fork.
+"""
+
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import time
+
+from prefetch import DEFAULT_DURATION, SESSION_DURATIONS
+from session_cache import SLICES, estimate_session_bytes
+
+logger = logging.getLogger(__name__)
+
+# A race's data is complete a few hours after its start; a weekend stays "current" for
+# a few days after its last session
+RACE_READY_AFTER = timedelta(hours=3)
+WEEKEND_WINDOW = timedelta(days=4)
+
+
+def _finished_sessions(schedule, now):
+    """[(start, round, session type)] of a season's sessions that are over, by start"""
+    finished = []
+    for (round_number, session_type), start in schedule.session_starts.items():
+        duration = timedelta(minutes=SESSION_DURATIONS.get(session_type, DEFAULT_DURATION))
+        if start + duration <= now:
+            finished.append((start, round_number, session_type))
+    return sorted(finished)
+
+
+def hot_sessions(schedule_cache, spec='auto', now=None):
+    """
+    Sessions to warm before the workers fork
+    `spec` is 'auto' or a comma-separated list like '2025/24/R,2025/24/Q'. 'auto' means
+    the finished sessions of the current weekend (if its latest one ended within
+    WEEKEND_WINDOW) and the last race whose data is complete.
+    Returns: [(year, round, session type)]
+    """
+    spec = (spec or '').strip()
+    if spec.lower() in ('', 'none', 'off'):
+        return []
+    if spec.lower() != 'auto':
+        sessions = []
+        for item in spec.split(','):
+            year, round_number, session_type = item.strip().split('/')
+            sessions.append((int(year), int(round_number), session_type.upper()))
+        return sessions
+
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    sessions = []
+    for year in (now.year, now.year - 1):
+        try:
+            finished = _finished_sessions(schedule_cache.get(year), now)
+        except Exception as e:
+            logger.warning(f"No {year} schedule to pick sessions to preload from: {str(e)}")
+            continue
+        if not finished:
+            continue
+        start, latest_round, _ = finished[-1]
+        if not sessions and now - start <= WEEKEND_WINDOW:
+            sessions = [(year, round_number, session_type) for _, round_number, session_type in finished
+                        if round_number == latest_round]
+
+        races = [(year, round_number, session_type) for start, round_number, session_type in finished
+                 if session_type == 'R' and start + RACE_READY_AFTER <= now]
+        if races:
+            if races[-1] not in sessions:
+                sessions.append(races[-1])
+            break
+    return sessions
+
+
+def warm(session_cache, sessions, data=('laps',)):
+    """
+    Load sessions into the cache one after another, in the caller's thread
+    A session that fails to load is logged and skipped: the workers load it on demand.
+    Returns: the sessions that are now in the cache
+    """
+    warmed = []
+    for year, round_number, session_type in sessions:
+        started = time.perf_counter()
+        try:
+            session = session_cache.get(year, round_number, session_type, data=data)
+        except Exception as e:
+            logger.warning(f"Preloading {year} round {round_number} {session_type} failed: {str(e)}")
+            continue
+        logger.info(f"Preloaded {year} round {round_number} {session_type} in "
+                    f"{time.perf_counter() - started:.1f}s ({estimate_session_bytes(session) / 1e6:.0f} MB)")
+        warmed.append((year, round_number, session_type))
+    return warmed
+
+
+def memory_usage(pid=None):
+    """
+    Memory of a process from /proc/<pid>/smaps_rollup, in bytes
+    Returns: rss, pss (shared pages split between the processes sharing them) and uss
+    (pages no other process shares), or None where /proc isn't available
+    """
+    fields = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}
+    usage = {'rss': 0, 'pss': 0, 'uss': 0}
+    try:
+        with open(f'/proc/{pid or os.getpid()}/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    usage[fields[name]] += int(value.split()[0]) * 1024
+    except OSError:
+        return None
+    return usage
+
+
+def options_from_env():
+    data = tuple(name.strip() for name in os.environ.get('PRELOAD_DATA', 'laps').split(',') if name.strip())
+    unknown = set(data) - set(SLICES)
+    if unknown:
+        raise ValueError(f"Unknown PRELOAD_DATA slices: {', '.join(sorted(unknown))}")
+    return {
+        'sessions': os.environ.get('PRELOAD_SESSIONS', 'auto'),
+        'data': data,
+    }
@@ -0,0 +1,303 @@
+"""
+Season rosters: who drove for which team, round by round
+A season's roster is folded from the driver list of every finished race: the 'drivers'
+payload ingest already stored, or else a results-only load (no laps or telemetry) that
+is then stored the same way. The fold keeps each driver's latest number, team and
+colour, the rounds they started, their teams over the season and the line-up changes
+(substitutes, mid-season swaps) per team and round.
+
+The folded index is written to <store>/<year>/roster.json.gz once every round in it is
+final, so /api/drivers/<year> and the session driver fallback are dictionary lookups
+after the first build. Seasons without a finished race use PRESEASON_ROSTERS.
+
+Each driver also carries the keys of their images under /images/ (driver portraits in
+drivers/, cars in cars/), found by scanning the asset directories rather than guessed.
+"""
+
+from datetime import datetime
+import bisect
+import logging
+import os
+import re
+import unicodedata
+
+from payloads import build_drivers
+from precomputed import read_payload, write_payload
+from season_builder import BuildPending, SeasonBuilder
+
+logger = logging.getLogger(__name__)
+
+# Bump when the index layout changes; older stored indexes are rebuilt
+ROSTER_VERSION = 1
+ROSTER_FILE = 'roster.json.gz'
+
+# Announced line-ups for seasons that haven't run a race yet:
+# (abbreviation, full name, number, team, team colour)
+PRESEASON_ROSTERS = {
+    2026: [
+        ('GAS', 'Pierre Gasly', '10', 'Alpine F1 Team', 'FF87BC'),
+        ('COL', 'Franco Colapinto', '43', 'Alpine F1 Team', 'FF87BC'),
+        ('ALO', 'Fernando Alonso', '14', 'Aston Martin', '229971'),
+        ('STR', 'Lance Stroll', '18', 'Aston Martin', '229971'),
+        ('HUL', 'Nico Hulkenberg', '27', 'Audi', 'F50537'),
+        ('BOR', 'Gabriel Bortoleto', '5', 'Audi', 'F50537'),
+        ('PER', 'Sergio Perez', '11', 'Cadillac', 'FFB800'),
+        ('BOT', 'Valtteri Bottas', '77', 'Cadillac', 'FFB800'),
+        ('LEC', 'Charles Leclerc', '16', 'Ferrari', 'E8002D'),
+        ('HAM', 'Lewis Hamilton', '44', 'Ferrari', 'E8002D'),
+        ('OCO', 'Esteban Ocon', '31', 'Haas F1 Team', 'B6BABD'),
+        ('BEA', 'Oliver Bearman', '87', 'Haas F1 Team', 'B6BABD'),
+        ('NOR', 'Lando Norris', '4', 'McLaren', 'FF8000'),
+        ('PIA', 'Oscar Piastri', '81', 'McLaren', 'FF8000'),
+        ('RUS', 'George Russell', '63', 'Mercedes', '27F4D2'),
+        ('ANT', 'Andrea Kimi Antonelli', '12', 'Mercedes', '27F4D2'),
+        ('LAW', 'Liam Lawson', '30', 'Racing Bulls', '6692FF'),
+        ('LIN', 'Arvid Lindblad', '40', 'Racing Bulls', '6692FF'),
+        ('VER', 'Max Verstappen', '1', 'Red Bull Racing', '3671C6'),
+        ('HAD', 'Isack Hadjar', '6', 'Red Bull Racing', '3671C6'),
+        ('ALB', 'Alexander Albon', '23', 'Williams', '64C4FF'),
+        ('SAI', 'Carlos Sainz', '55', 'Williams', '64C4FF'),
+    ],
+}
+
+# Image directories in the repo, by the /images/ directory the frontend serves them from
+ASSET_DIRECTORIES = {
+    'drivers': ('drivers', '2026_drivers'),
+    'cars': ('cars', '2026_cars'),
+}
+
+# 2025haasolibea01right.avif: season, team, first 3 + last 3 letters of the name, number
+_DRIVER_FILE = re.compile(r'^(\d{4})([a-z0-9]+?)([a-z]{6}\d{2})right\.\w+$')
+# 2026haasf1teamcarright.avif: season, team
+_CAR_FILE = re.compile(r'^(\d{4})([a-z0-9]+)carright\.\w+$')
+
+
+class RosterPending(BuildPending):
+    """The season's roster is still being built in the background"""
+
+    message = "Roster for {year} is still being built"
+
+
+def _ascii(text):
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode()
+    return ''.join(c for c in text.lower() if c.isalnum() or c.isspace())
+
+
+def driver_code(full_name):
+    """Image code of a driver: 'Nico Hülkenberg' -> 'nichul01'"""
+    words = _ascii(full_name).split()
+    if len(words) < 2:
+        return None
+    return f'{words[0][:3]}{words[-1][:3]}01'
+
+
+def team_key(team_name):
+    """Image key of a team: 'Haas F1 Team' -> 'haasf1team'"""
+    return ''.join(_ascii(team_name).split())
+
+
+class AssetIndex:
+    """Driver and car images in the asset directories, by season"""
+
+    def __init__(self, root, directories=ASSET_DIRECTORIES):
+        self.drivers = {}  # (year, driver code) -> key
+        self.cars = {}  # year -> [(team key, key)]
+        for kind, sources in directories.items():
+            for source in sources:
+                try:
+                    names = sorted(os.listdir(os.path.join(root, source)))
+                except FileNotFoundError:
+                    continue
+                for name in names:
+                    key = f'{kind}/{name}'
+                    if kind == 'drivers' and (match := _DRIVER_FILE.match(name)):
+                        self.drivers.setdefault((int(match[1]), match[3]), key)
+                    elif kind == 'cars' and (match := _CAR_FILE.match(name)):
+                        self.cars.setdefault(int(match[1]), []).append((match[2], key))
+
+    def driver(self, year, full_name):
+        return self.drivers.get((year, driver_code(full_name)))
+
+    def car(self, year, team_name):
+        """The team's car that season; file names may shorten the team ('haas' for 'Haas F1 Team')"""
+        wanted = team_key(team_name)
+        if not wanted:
+            return None
+        candidates = self.cars.get(year, [])
+        for key, path in candidates:
+            if key == wanted:
+                return path
+        for key, path in candidates:
+            if wanted.startswith(key) or key.startswith(wanted):
+                return path
+        return None
+
+    def images(self, year, full_name, team_name):
+        return {'driver': self.driver(year, full_name), 'car': self.car(year, team_name)}
+
+
+def fold(year, lineups):
+    """
+    Season roster from per-round driver lists (DRIVER_COLUMNS rows, by round number)
+    Returns: drivers with their latest details, rounds and teams, and the line-up
+    changes per team and round
+    """
+    drivers = {}
+    changes = []
+    previous = None
+    for round_number in sorted(lineups):
+        teams = {}
+        for row in lineups[round_number]:
+            abbreviation = row['abbreviation']
+            entry = drivers.setdefault(abbreviation, {'abbreviation': abbreviation, 'rounds': [], 'teams': []})
+            entry.update(full_name=row['full_name'], number=row['driver_number'],
+                         team_name=row['team_name'], team_color=row['team_color'])
+            entry['rounds'].append(round_number)
+            if entry['teams'] and entry['teams'][-1]['team_name'] == row['team_name']:
+                entry['teams'][-1]['to_round'] = round_number
+            else:
+                entry['teams'].append({'team_name': row['team_name'], 'from_round': round_number,
+                                       'to_round': round_number})
+            teams.setdefault(row['team_name'], set()).add(abbreviation)
+
+        if previous is not None:
+            for team in sorted(teams.keys() | previous.keys(), key=str):
+                joined = teams.get(team, set()) - previous.get(team, set())
+                left = previous.get(team, set()) - teams.get(team, set())
+                if joined or left:
+                    changes.append({'round': round_number, 'team_name': team,
+                                    'joined': sorted(joined), 'left': sorted(left)})
+        previous = teams
+
+    return {
+        'version': ROSTER_VERSION,
+        'year': year,
+        'source': 'results',
+        'rounds': sorted(lineups),
+        'drivers': list(drivers.values()),
+        'changes': changes,
+        'lineups': {str(r): rows for r, rows in lineups.items()},
+    }
+
+
+def preseason(year):
+    """Roster of a season without results, from PRESEASON_ROSTERS (None if not listed)"""
+    if year not in PRESEASON_ROSTERS:
+        return None
+    rows = [{'driver_number': number, 'abbreviation': abbreviation, 'full_name': full_name,
+             'team_name': team_name, 'team_color': team_color}
+            for abbreviation, full_name, number, team_name, team_color in PRESEASON_ROSTERS[year]]
+    roster = fold(year, {0: rows})
+    for entry in roster['drivers']:
+        entry['rounds'], entry['teams'] = [], [{'team_name': entry['team_name'], 'from_round': None,
+                                                'to_round': None}]
+    return {**roster, 'source': 'preseason', 'rounds': [], 'lineups': {'0': rows}}
+
+
+def _sort_key(entry):
+    number = str(entry['number'])
+    return (str(entry['team_name']), int(number) if number.isdigit() else 10 ** 6, number)
+
+
+class RosterIndex(SeasonBuilder):
+    """
+    Builds, stores and serves season rosters
+
+    Driver lists of final races (older than `final_after`) are kept in the precomputed
+    store; rounds still open to corrections are kept in memory for `open_ttl` seconds.
+    Rounds load `workers` at a time.
+    """
+
+    pending = RosterPending
+    label = 'Roster'
+
+    def __init__(self, store, session_cache, schedule_cache, assets, workers=4, **options):
+        super().__init__(store, session_cache, schedule_cache, workers, name='roster', **options)
+        self.assets = assets
+        self.round_loads = 0
+
+    def path(self, year):
+        return os.path.join(self.store.root, str(int(year)), ROSTER_FILE)
+
+    def _lineup(self, year, round_number, final):
+        stored = self.store.load('drivers', year, round_number, 'R')
+        if stored is not None:
+            return stored['drivers']
+        if not final:
+            cached = self._open_round(year, round_number)
+            if cached is not None:
+                return cached
+
+        session = self.session_cache.get(year, round_number, 'R', data=('results',))
+        with self._lock:
+            self.round_loads += 1
+        payload = build_drivers(session)
+        if final:
+            # The same payload /api/drivers/<year>/<round>/R serves
+            self.store.save('drivers', payload, year, round_number, 'R')
+        else:
+            self._keep_open_round(year, round_number, payload['drivers'])
+        return payload['drivers']
+
+    def _build(self, year, job):
+        try:
+            rounds = self._rounds(year)
+        except Exception:
+            if year not in PRESEASON_ROSTERS:
+                raise
+            rounds = []
+        if not rounds:
+            roster = preseason(year) or fold(year, {})
+            return self._keep(year, (), self._decorate(roster))
+
+        lineups, missing = self._load_rounds(year, rounds, job, self._lineup)
+        roster = {**fold(year, lineups), 'missing_rounds': missing}
+        if not missing and all(final for _, final in rounds):
+            write_payload(self.path(year), {**roster, 'fingerprint': rounds})
+        return self._keep(year, rounds, self._decorate(roster), missing)
+
+    def _decorate(self, roster):
+        """Add image keys (not stored: the asset directories may change) and the round lookup"""
+        year = roster['year']
+        for entry in roster['drivers']:
+            entry['images'] = self.assets.images(year, entry['full_name'], entry['team_name'])
+        roster['drivers'].sort(key=_sort_key)
+        roster.setdefault('missing_rounds', [])
+        roster['_lineups'] = {int(r): rows for r, rows in roster.pop('lineups').items()}
+        return roster
+
+    def _restore(self, year):
+        """The stored roster if it covers every finished round, else None"""
+        stored = read_payload(self.path(year))
+        if stored is None or stored.get('version') != ROSTER_VERSION:
+            return None
+        fingerprint = tuple(map(tuple, stored.pop('fingerprint')))
+        if year >= datetime.now().year and fingerprint != tuple(self._rounds(year)):
+            return None
+        return self._keep(year, fingerprint, self._decorate(stored))
+
+    def get(self, year, timeout=None):
+        """
+        Return the season's roster
+        Waits at most `timeout` seconds for a build, then raises RosterPending.
+        """
+        return self._season(year, timeout)
+
+    def lineup(self, year, round_number, timeout=None):
+        """
+        Drivers of one round as DRIVER_COLUMNS rows with their image keys
+        Rounds the roster doesn't have (not run yet, or left out) get the latest line-up
+        before them. Returns: the rows, or None if the roster has none
+        """
+        roster = self.get(year, timeout=timeout)
+        lineups = roster['_lineups']
+        if not lineups:
+            return None
+        rounds = sorted(lineups)
+        index = bisect.bisect_right(rounds, round_number)
+        rows = lineups[round_number] if round_number in lineups else lineups[rounds[max(index - 1, 0)]]
+        return [{**row, 'images': self.assets.images(year, row['full_name'], row['team_name'])} for row in rows]
+
+    def stats(self):
+        with self._lock:
+            return {'years': sorted(self._built), 'round_loads': self.round_loads}
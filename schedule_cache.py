@@ -0,0 +1,165 @@
+"""
+Per-season event schedule cache
+Keeps each season's schedule together with its serialized /api/schedule payload and a
+date-sorted index, so schedule, event and current-event requests don't go back to
+FastF1 and "current or next event" is a binary search instead of a scan
+"""
+
+from datetime import datetime, timezone
+import hashlib
+import logging
+import threading
+import time
+
+import fastf1
+import numpy as np
+import pandas as pd
+
+from payloads import SCHEDULE_COLUMNS
+from precomputed import normalize_session_type
+from serializers import dumps, serialize_frame
+
+logger = logging.getLogger(__name__)
+
+# An event still counts as the current one until 3 days after its date
+CURRENT_EVENT_AFTER = pd.Timedelta(days=3)
+
+
+def _format_local(value, fmt):
+    return value.strftime(fmt) if pd.notna(value) else None
+
+
+def _event_record(event):
+    return {
+        'event_name': event['EventName'],
+        'country': event['Country'],
+        'location': event['Location'],
+        'event_date': _format_local(event['EventDate'], '%Y-%m-%d'),
+        'event_format': event['EventFormat'],
+        'official_name': event.get('OfficialEventName'),
+    }
+
+
+class SeasonSchedule:
+    """One season's schedule, built once per fetch and read-only afterwards"""
+
+    def __init__(self, year, schedule, fetched_at, previous=None):
+        self.year = year
+        self.fetched_at = fetched_at
+
+        # /api/schedule payload, without pre-season testing (RoundNumber 0)
+        events = serialize_frame(schedule[schedule['RoundNumber'] != 0], SCHEDULE_COLUMNS)
+        self.body = dumps({'year': year, 'events': events, 'total_events': len(events)})
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+        # Last-Modified only moves when the content actually changed
+        if previous is not None and previous.etag == self.etag:
+            self.last_modified = previous.last_modified
+        else:
+            self.last_modified = datetime.fromtimestamp(fetched_at, tz=timezone.utc).replace(microsecond=0)
+
+        self.events = {}  # round number -> /api/event record
+        self.session_starts = {}  # (round number, session type) -> naive UTC start
+        dated = []
+        for _, event in schedule.iterrows():
+            round_number = int(event['RoundNumber']) if pd.notna(event['RoundNumber']) else None
+            record = _event_record(event)
+            if round_number:
+                self.events[round_number] = record
+                for i in range(1, 6):
+                    name = event.get(f'Session{i}')
+                    start = event.get(f'Session{i}DateUtc')
+                    if name and pd.notna(name) and pd.notna(start):
+                        self.session_starts[(round_number, normalize_session_type(name))] = pd.Timestamp(start)
+            if pd.notna(event['EventDate']):
+                dated.append((event['EventDate'], {
+                    'round_number': round_number,
+                    **record,
+                    'session5_date': _format_local(event['Session5Date'], '%Y-%m-%d %H:%M:%S'),
+                }))
+
+        # Sorted by date (stable, so schedule order breaks ties) for bisection
+        dated.sort(key=lambda item: item[0])
+        self.event_dates = np.array([date for date, _ in dated], dtype='datetime64[ns]')
+        self.dated_events = [record for _, record in dated]
+
+    def event(self, round_number):
+        """Return the /api/event record for a round, or None if there is no such round"""
+        return self.events.get(int(round_number))
+
+    def session_start(self, round_number, session_type):
+        """Scheduled UTC start of a session, or None if the schedule doesn't list it"""
+        return self.session_starts.get((int(round_number), normalize_session_type(session_type)))
+
+    def current_event(self, now):
+        """
+        Return the event in progress around `now` or else the next one, with days_until
+        Returns None once the season is over.
+        """
+        now = pd.Timestamp(now)
+        # First event dated no more than 3 days ago; any later one is further away
+        index = int(np.searchsorted(self.event_dates, np.datetime64(now - CURRENT_EVENT_AFTER, 'ns'), 'left'))
+        if index == len(self.dated_events):
+            return None
+        event_date = pd.Timestamp(self.event_dates[index])
+        return {**self.dated_events[index], 'days_until': (event_date - now).days}
+
+
+class ScheduleCache:
+    """
+    Season schedules by year
+    The running season (and later ones) are refetched after `current_ttl` seconds;
+    past seasons are final and kept for the life of the process.
+    """
+
+    def __init__(self, current_ttl=3600, loader=None):
+        self.current_ttl = current_ttl
+        self._loader = loader or fastf1.get_event_schedule
+        self._lock = threading.Lock()
+        self._seasons = {}  # year -> SeasonSchedule
+        self._year_locks = {}
+
+    def _expired(self, season, now):
+        if season.year < datetime.now().year:
+            return False
+        return now - season.fetched_at > self.current_ttl
+
+    def max_age(self, year):
+        """Seconds a client may reuse a schedule response without revalidating"""
+        return 86400 if year < datetime.now().year else min(self.current_ttl, 300)
+
+    def get(self, year):
+        """Return the SeasonSchedule for a year, fetching it if missing or stale"""
+        year = int(year)
+        now = time.time()
+        with self._lock:
+            season = self._seasons.get(year)
+            if season is not None and not self._expired(season, now):
+                return season
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+
+        # One fetch per season at a time; other callers wait for its result
+        with year_lock:
+            with self._lock:
+                current = self._seasons.get(year)
+            if current is not season and current is not None:
+                return current
+
+            try:
+                schedule = self._loader(year)
+            except Exception as e:
+                if season is None:
+                    raise
+                # Keep serving the stale schedule and try again after another TTL
+                logger.warning(f"Refreshing the {year} schedule failed, serving the cached one: {str(e)}")
+                season.fetched_at = time.time()
+                return season
+
+            fresh = SeasonSchedule(year, schedule, time.time(), previous=season)
+            with self._lock:
+                self._seasons[year] = fresh
+            return fresh
+
+    def clear(self):
+        with self._lock:
+            self._seasons.clear()
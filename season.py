@@ -0,0 +1,303 @@
+"""
+Season-wide aggregation: standings, points progression, race pace and tyre usage
+Each finished race is boiled down once to a small per-round summary (results, sprint
+results, pace and stints), kept in the precomputed store. Season payloads are then
+cheap folds over those summaries, so a new race only costs loading that one round.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from season_builder import BuildPending, SeasonBuilder
+from serializers import Column, serialize_frame
+
+logger = logging.getLogger(__name__)
+
+# Bump when the summary layout or its calculations change; older summaries are rebuilt
+SUMMARY_VERSION = 1
+SUMMARY_NAME = 'season_round'
+
+# Laps slower than this multiple of the session's fastest lap don't count as race pace
+QUICK_LAP_THRESHOLD = 1.07
+
+RESULT_SUMMARY_COLUMNS = [
+    Column('DriverNumber', 'driver_number', 'str'),
+    Column('Abbreviation', 'abbreviation'),
+    Column('FullName', 'full_name'),
+    Column('TeamName', 'team_name'),
+    Column('TeamColor', 'team_color'),
+    Column('Position', 'position', 'int'),
+    Column('GridPosition', 'grid_position', 'int'),
+    Column('Points', 'points', 'float', default=0),
+    Column('Status', 'status'),
+]
+
+PACE_COLUMNS = [
+    Column('DriverNumber', 'driver_number', 'str'),
+    Column('Laps', 'laps', 'int'),
+    Column('Median', 'median', 'float'),
+    Column('Mean', 'mean', 'float'),
+]
+
+STINT_COLUMNS = [
+    Column('DriverNumber', 'driver_number', 'str'),
+    Column('Stint', 'stint', 'int'),
+    Column('Compound', 'compound'),
+    Column('Laps', 'laps', 'int'),
+    Column('StartLap', 'start_lap', 'int'),
+    Column('EndLap', 'end_lap', 'int'),
+    Column('TyreLife', 'tyre_life', 'int'),
+    Column('Median', 'median', 'float'),
+]
+
+
+class SeasonPending(BuildPending):
+    """The season is still being aggregated in the background"""
+
+    message = "Season {year} is still being aggregated"
+
+
+def _seconds(values):
+    return values.dt.total_seconds()
+
+
+def _representative_laps(laps):
+    """Green-flag laps without pit stops, within 107% of the session's fastest lap"""
+    laps = laps[laps['LapTime'].notna() & (laps['LapNumber'] > 1)]
+    if 'PitInTime' in laps.columns:
+        laps = laps[laps['PitInTime'].isna() & laps['PitOutTime'].isna()]
+    if 'TrackStatus' in laps.columns:
+        laps = laps[laps['TrackStatus'].astype(str) == '1']
+    if len(laps) == 0:
+        return laps
+    return laps[laps['LapTime'] <= laps['LapTime'].min() * QUICK_LAP_THRESHOLD]
+
+
+def summarize_round(race, sprint=None):
+    """Per-round summary of a race session (laps loaded) and its sprint, if any"""
+    results = race.results
+    if len(results) == 0:
+        raise ValueError('Race results are not available yet')
+    summary = {
+        'version': SUMMARY_VERSION,
+        'event_name': race.event.get('EventName'),
+        'results': serialize_frame(results, RESULT_SUMMARY_COLUMNS),
+        'sprint_results': serialize_frame(sprint.results, RESULT_SUMMARY_COLUMNS) if sprint is not None else [],
+        'pace': [],
+        'stints': [],
+    }
+
+    laps = pd.DataFrame(race.laps)
+    if len(laps) == 0:
+        return summary
+
+    quick = _representative_laps(laps)
+    if len(quick):
+        lap_seconds = _seconds(quick['LapTime'])
+        pace = lap_seconds.groupby(quick['DriverNumber']).agg(['count', 'median', 'mean'])
+        pace = pace.reset_index().rename(columns={'count': 'Laps', 'median': 'Median', 'mean': 'Mean'})
+        pace[['Median', 'Mean']] = pace[['Median', 'Mean']].round(3)
+        summary['pace'] = serialize_frame(pace, PACE_COLUMNS)
+
+    stinted = laps[laps['Stint'].notna()]
+    if len(stinted):
+        group = stinted.groupby(['DriverNumber', 'Stint'])
+        stints = group.agg(
+            Compound=('Compound', 'last'),
+            Laps=('LapNumber', 'count'),
+            StartLap=('LapNumber', 'min'),
+            EndLap=('LapNumber', 'max'),
+            TyreLife=('TyreLife', 'max'),
+        ).reset_index()
+        stint_pace = _seconds(quick['LapTime']).groupby([quick['DriverNumber'], quick['Stint']]).median()
+        stints['Median'] = [round(stint_pace.get(key, np.nan), 3)
+                            for key in zip(stints['DriverNumber'], stints['Stint'])]
+        summary['stints'] = serialize_frame(stints, STINT_COLUMNS)
+    return summary
+
+
+def _rank(frame, by, ascending):
+    frame = frame.sort_values(by, ascending=ascending, kind='stable').reset_index(drop=True)
+    frame.insert(0, 'position', np.arange(1, len(frame) + 1))
+    return frame
+
+
+def _records(frame):
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+def aggregate(summaries):
+    """
+    Season payloads from per-round summaries, keyed by endpoint name
+    `summaries` maps round number -> summary, for the rounds to include
+    """
+    rounds = sorted(summaries)
+    result_rows, pace_rows, stint_rows = [], [], []
+    for round_number in rounds:
+        summary = summaries[round_number]
+        for kind in ('results', 'sprint_results'):
+            for row in summary[kind]:
+                result_rows.append({**row, 'round': round_number, 'sprint': kind == 'sprint_results'})
+        pace_rows.extend({**row, 'round': round_number} for row in summary['pace'])
+        stint_rows.extend({**row, 'round': round_number} for row in summary['stints'])
+
+    round_info = [{'round': r, 'event_name': summaries[r].get('event_name')} for r in rounds]
+    if not result_rows:
+        empty = {'rounds': round_info}
+        return {
+            'standings': {**empty, 'drivers': [], 'constructors': []},
+            'points_progression': {**empty, 'drivers': [], 'constructors': []},
+            'pace': {**empty, 'drivers': []},
+            'tyres': {**empty, 'compounds': [], 'by_round': []},
+        }
+
+    results = pd.DataFrame(result_rows)
+    results['points'] = results['points'].fillna(0.0)
+    races = results[~results['sprint']]
+
+    # Who a driver is: their latest entry of the season
+    drivers = races.sort_values('round').groupby('abbreviation').last()[
+        ['driver_number', 'full_name', 'team_name', 'team_color']]
+
+    # Driver standings, ties broken by wins, then second places, ...
+    points = results.groupby('abbreviation')['points'].sum()
+    finishes = races[races['position'].notna()].pivot_table(
+        index='abbreviation', columns='position', values='round', aggfunc='count', fill_value=0)
+    standings = drivers.join(points).join(
+        races.groupby('abbreviation').agg(
+            starts=('round', 'count'),
+            wins=('position', lambda p: int((p == 1).sum())),
+            podiums=('position', lambda p: int((p <= 3).sum())),
+            best_finish=('position', 'min'),
+        ))
+    order = ['points'] + [f'p{int(p)}' for p in sorted(finishes.columns)]
+    standings = standings.join(finishes.rename(columns=lambda p: f'p{int(p)}')).fillna(
+        {name: 0 for name in order[1:]})
+    standings = _rank(standings.reset_index(), order, [False] * len(order))
+    driver_standings = _records(standings[['position', 'abbreviation', 'driver_number', 'full_name',
+                                           'team_name', 'team_color', 'points', 'starts', 'wins',
+                                           'podiums', 'best_finish']])
+
+    team_colors = races.sort_values('round').groupby('team_name')['team_color'].last()
+    constructors = results.groupby('team_name')['points'].sum().to_frame().join(
+        races.groupby('team_name')['position'].agg(
+            wins=lambda p: int((p == 1).sum()), podiums=lambda p: int((p <= 3).sum())))
+    constructors = _rank(constructors.join(team_colors).reset_index(), ['points', 'wins'], [False, False])
+    constructor_standings = _records(constructors[['position', 'team_name', 'team_color', 'points',
+                                                   'wins', 'podiums']])
+
+    # Points after every round (sprint points count towards their weekend)
+    per_round = results.pivot_table(index='abbreviation', columns='round', values='points',
+                                    aggfunc='sum', fill_value=0.0).reindex(columns=rounds, fill_value=0.0)
+    cumulative = per_round.cumsum(axis=1).loc[standings['abbreviation']]
+    driver_progression = [
+        {'abbreviation': abbreviation, 'team_name': drivers.at[abbreviation, 'team_name'],
+         'team_color': drivers.at[abbreviation, 'team_color'], 'points': values.tolist()}
+        for abbreviation, values in zip(cumulative.index, cumulative.to_numpy())
+    ]
+    team_rounds = results.pivot_table(index='team_name', columns='round', values='points',
+                                      aggfunc='sum', fill_value=0.0).reindex(columns=rounds, fill_value=0.0)
+    team_cumulative = team_rounds.cumsum(axis=1).loc[constructors['team_name']]
+    team_progression = [
+        {'team_name': team, 'team_color': team_colors.get(team), 'points': values.tolist()}
+        for team, values in zip(team_cumulative.index, team_cumulative.to_numpy())
+    ]
+
+    # Race pace: each driver's median representative lap as a gap to the best median of the race
+    pace_payload = []
+    if pace_rows:
+        pace = pd.DataFrame(pace_rows)
+        pace = pace.merge(races[['round', 'driver_number', 'abbreviation', 'team_name']],
+                          on=['round', 'driver_number'], how='left')
+        pace = pace[pace['abbreviation'].notna() & pace['median'].notna()]
+        pace['gap_pct'] = (pace['median'] / pace.groupby('round')['median'].transform('min') - 1) * 100
+        season_pace = pace.groupby('abbreviation').agg(
+            rounds=('round', 'count'), laps=('laps', 'sum'),
+            average_gap_pct=('gap_pct', 'mean'), median_gap_pct=('gap_pct', 'median'))
+        season_pace = season_pace.join(drivers[['team_name', 'team_color']]).reset_index()
+        season_pace[['average_gap_pct', 'median_gap_pct']] = season_pace[
+            ['average_gap_pct', 'median_gap_pct']].round(3)
+        season_pace = _rank(season_pace, ['average_gap_pct'], [True])
+        by_driver = {abbreviation: group for abbreviation, group in pace.groupby('abbreviation')}
+        for row in _records(season_pace):
+            group = by_driver[row['abbreviation']]
+            row['by_round'] = [{'round': int(r), 'median': m, 'gap_pct': round(g, 3)}
+                               for r, m, g in zip(group['round'], group['median'], group['gap_pct'])]
+            pace_payload.append(row)
+
+    # Tyres: stints and laps per compound, over the season and per round
+    compounds, by_round = [], []
+    if stint_rows:
+        stints = pd.DataFrame(stint_rows)
+        stints['compound'] = stints['compound'].fillna('UNKNOWN')
+        summary = stints.groupby('compound').agg(
+            stints=('laps', 'count'), laps=('laps', 'sum'), average_stint_laps=('laps', 'mean'),
+            longest_stint_laps=('laps', 'max'), median_lap_time=('median', 'median'))
+        summary[['average_stint_laps', 'median_lap_time']] = summary[
+            ['average_stint_laps', 'median_lap_time']].round(2)
+        compounds = _records(summary.sort_values('laps', ascending=False).reset_index())
+        usage = stints.groupby(['round', 'compound']).agg(stints=('laps', 'count'), laps=('laps', 'sum'))
+        for round_number, group in usage.reset_index().groupby('round'):
+            by_round.append({'round': int(round_number),
+                             'compounds': _records(group.drop(columns='round'))})
+
+    return {
+        'standings': {'rounds': round_info, 'drivers': driver_standings, 'constructors': constructor_standings},
+        'points_progression': {'rounds': round_info, 'drivers': driver_progression,
+                               'constructors': team_progression},
+        'pace': {'rounds': round_info, 'drivers': pace_payload},
+        'tyres': {'rounds': round_info, 'compounds': compounds, 'by_round': by_round},
+    }
+
+
+class SeasonAggregator(SeasonBuilder):
+    """
+    Builds and caches season payloads in the background
+
+    Per-round summaries of final races (older than `final_after`) are kept in the
+    precomputed store; rounds still open to corrections are kept in memory for
+    `open_ttl` seconds. Rounds load `workers` at a time.
+    """
+
+    pending = SeasonPending
+
+    def __init__(self, store, session_cache, schedule_cache, workers=4, **options):
+        super().__init__(store, session_cache, schedule_cache, workers, name='season', **options)
+
+    def _summary(self, year, round_number, final):
+        if final:
+            stored = self.store.load(SUMMARY_NAME, year, round_number)
+            if stored is not None and stored.get('version') == SUMMARY_VERSION:
+                return stored
+        else:
+            cached = self._open_round(year, round_number)
+            if cached is not None:
+                return cached
+
+        has_sprint = self.schedule_cache.get(year).session_start(round_number, 'S') is not None
+        race = self.session_cache.get(year, round_number, 'R', data=('laps',))
+        sprint = self.session_cache.get(year, round_number, 'S', data=('results',)) if has_sprint else None
+        summary = summarize_round(race, sprint)
+        if final:
+            self.store.save(SUMMARY_NAME, summary, year, round_number)
+        else:
+            self._keep_open_round(year, round_number, summary)
+        return summary
+
+    def _build(self, year, job):
+        rounds = self._rounds(year)
+        summaries, missing = self._load_rounds(year, rounds, job, self._summary)
+        payloads = aggregate(summaries)
+        for payload in payloads.values():
+            payload['missing_rounds'] = missing
+        return self._keep(year, rounds, payloads, missing)
+
+    def get(self, year, name, timeout=None):
+        """
+        Return one season payload (standings, points_progression, pace or tyres)
+        Waits at most `timeout` seconds for a build, then raises SeasonPending.
+        """
+        return self._season(year, timeout)[name]
@@ -0,0 +1,182 @@
+"""
+Per-season builds in the background, shared by the season statistics and the rosters
+A season value (standings, a roster) is folded from one small piece per finished race.
+SeasonBuilder runs the build on its own threads, loads the rounds `workers` at a time
+and reports progress while callers get a *Pending error after their timeout. Pieces of
+rounds still open to corrections are kept in memory for `open_ttl` seconds; the built
+value is reused until a round finishes or turns final, or the TTL runs out.
+
+Subclasses only say how to load a round and fold the season (_build).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BuildPending(Exception):
+    """The season is still being built in the background"""
+
+    message = "Season {year} is still being built"
+
+    def __init__(self, year, progress):
+        super().__init__(self.message.format(year=year))
+        self.year = year
+        self.progress = progress
+
+
+class SeasonBuilder:
+    """
+    Builds and caches one value per season from per-round pieces, in the background
+
+    A race counts once it is `ready_after` past its start and is final (no more
+    corrections) after `final_after`. Subclasses implement _build(year, job), which
+    loads rounds with _load_rounds() and hands the result to _keep(), and may restore
+    a stored value in _restore(year).
+    """
+
+    pending = BuildPending
+    label = 'Season'
+
+    def __init__(self, store, session_cache, schedule_cache, workers=4, name='season',
+                 ready_after=timedelta(hours=3), final_after=timedelta(hours=24), open_ttl=600):
+        self.store = store
+        self.session_cache = session_cache
+        self.schedule_cache = schedule_cache
+        self.ready_after = ready_after
+        self.final_after = final_after
+        self.open_ttl = open_ttl
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{name}-round')
+        # Builds wait on their rounds, so they get their own threads to avoid starving the round pool
+        self._builds = ThreadPoolExecutor(max_workers=2, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._open_rounds = {}  # (year, round) -> (built at, piece)
+        self._built = {}  # year -> (built at, fingerprint, value, missing rounds)
+        self._jobs = {}  # year -> _Job
+
+    def _rounds(self, year):
+        """[(round, final)] for races that have finished, from the schedule"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        season = self.schedule_cache.get(year)
+        return [(round_number, start + self.final_after <= now)
+                for (round_number, session_type), start in sorted(season.session_starts.items())
+                if session_type == 'R' and start + self.ready_after <= now]
+
+    def _open_round(self, year, round_number):
+        """The piece of a round still open to corrections, if built within `open_ttl`"""
+        with self._lock:
+            cached = self._open_rounds.get((year, round_number))
+        if cached is not None and time.time() - cached[0] < self.open_ttl:
+            return cached[1]
+        return None
+
+    def _keep_open_round(self, year, round_number, piece):
+        with self._lock:
+            self._open_rounds[(year, round_number)] = (time.time(), piece)
+
+    def _load_rounds(self, year, rounds, job, load):
+        """
+        Run load(year, round, final) for each round on the round pool
+        Returns: ({round: piece}, sorted rounds that failed to load)
+        """
+        job.total = len(rounds)
+        futures = {self._pool.submit(load, year, *spec): spec[0] for spec in rounds}
+        pieces, missing = {}, []
+        for future, round_number in futures.items():
+            try:
+                pieces[round_number] = future.result()
+            except Exception as e:
+                logger.warning(f"{self.label} {year} round {round_number} left out: {str(e)}")
+                missing.append(round_number)
+            job.done += 1
+        return pieces, sorted(missing)
+
+    def _keep(self, year, fingerprint, value, missing=()):
+        with self._lock:
+            self._built[year] = (time.time(), tuple(map(tuple, fingerprint)), value, tuple(missing))
+        return value
+
+    def _restore(self, year):
+        """A stored value to serve when nothing is built in memory yet, or None"""
+        return None
+
+    def _fresh(self, year, cached):
+        built_at, fingerprint, _, missing = cached
+        if year < datetime.now().year and fingerprint and not missing:
+            return True
+        # Current season (or rounds that failed to load): valid until a round finishes or
+        # an open round's piece expires
+        if time.time() - built_at > self.open_ttl:
+            return False
+        try:
+            return fingerprint == tuple(self._rounds(year))
+        except Exception:
+            return not fingerprint
+
+    def _season(self, year, timeout=None):
+        """
+        The season's value, built in the background if it isn't fresh
+        Waits at most `timeout` seconds for a build, then raises `pending`.
+        """
+        with self._lock:
+            cached = self._built.get(year)
+        if cached is not None and self._fresh(year, cached):
+            return cached[2]
+        if cached is None:
+            restored = self._restore(year)
+            if restored is not None:
+                return restored
+
+        with self._lock:
+            job = self._jobs.get(year)
+            if job is None:
+                job = _Job()
+                job.future = self._builds.submit(self._run, year, job)
+                self._jobs[year] = job
+
+        try:
+            return job.future.result(timeout=timeout)
+        except TimeoutError:
+            if job.future.done():
+                raise
+            raise self.pending(year, self.progress(year))
+
+    def _run(self, year, job):
+        try:
+            return self._build(year, job)
+        finally:
+            with self._lock:
+                self._jobs.pop(year, None)
+
+    def _build(self, year, job):
+        raise NotImplementedError
+
+    def clear(self):
+        """Forget in-memory pieces and season values (stored ones stay)"""
+        with self._lock:
+            self._open_rounds.clear()
+            self._built.clear()
+
+    def progress(self, year):
+        with self._lock:
+            job = self._jobs.get(year)
+            if job is not None:
+                return {'status': 'building', 'rounds_done': job.done, 'rounds_total': job.total}
+            cached = self._built.get(year)
+        if cached is not None:
+            return {'status': 'ready', 'rounds': len(cached[1])}
+        return {'status': 'not_built'}
+
+
+class _Job:
+    __slots__ = ('future', 'done', 'total')
+
+    def __init__(self):
+        self.future = None
+        self.done = 0
+        self.total = None
@@ -0,0 +1,201 @@
+"""
+Column-wise DataFrame to JSON serialization
+Converts whole columns at once with NumPy/pandas instead of looping over rows
+"""
+
+from flask import Response, request
+import numpy as np
+import pandas as pd
+import orjson
+
+import metrics
+
+_NS_PER_DAY = 86_400 * 10**9
+
+class Column:
+    """
+    Output spec for one DataFrame column
+
+    kind controls the conversion:
+        raw       - value as is (strings, already-native values)
+        str       - str(value)
+        int       - int(value), truncating floats
+        float     - float(value)
+        bool      - bool(value)
+        laptime   - timedelta as M:SS.mmm (SS.mmm under a minute)
+        timedelta - str(pd.Timedelta), e.g. '0 days 00:01:32.345000'
+        utc       - UTC ISO timestamp, e.g. '2024-03-02T15:00:00Z'
+        date      - calendar date, e.g. '2024-03-02'
+    Missing values (NaN/NaT/None) become `default`.
+    """
+
+    __slots__ = ('source', 'name', 'kind', 'default')
+
+    def __init__(self, source, name, kind='raw', default=None):
+        self.source = source
+        self.name = name
+        self.kind = kind
+        self.default = default
+
+
+def _format_laptime(values):
+    # Same arithmetic as Timedelta.total_seconds() (whole microseconds) so rounding matches
+    ns = values.to_numpy(dtype='timedelta64[ns]')
+    valid = ~np.isnat(ns)
+    seconds = (ns[valid].astype('int64') // 1000) / 1e6
+    minutes = seconds // 60
+    text = np.char.mod('%06.3f', seconds % 60).astype(object)
+    with_minutes = minutes > 0
+    text[with_minutes] = (
+        np.char.mod('%d:', minutes[with_minutes]).astype(object) + text[with_minutes])
+
+    formatted = np.empty(len(ns), dtype=object)
+    formatted[valid] = text
+    return formatted
+
+
+def _write_digits(buffer, start, values, width):
+    """Write zero-padded decimal digits of values into buffer[:, start:start + width]"""
+    for position in range(start + width - 1, start - 1, -1):
+        buffer[:, position] = 48 + values % 10
+        values = values // 10
+
+
+def _format_timedelta_fast(days, hours, minutes, seconds, micros, with_fraction):
+    """Build 'D days HH:MM:SS[.ffffff]' as raw ASCII for single-digit, non-negative days"""
+    buffer = np.empty((len(days), 22), dtype=np.uint8)
+    buffer[:, :] = np.frombuffer(b'0 days 00:00:00.000000', dtype=np.uint8)
+    _write_digits(buffer, 0, days, 1)
+    _write_digits(buffer, 7, hours, 2)
+    _write_digits(buffer, 10, minutes, 2)
+    _write_digits(buffer, 13, seconds, 2)
+    _write_digits(buffer, 16, micros, 6)
+
+    formatted = np.empty(len(days), dtype=object)
+    formatted[with_fraction] = buffer[with_fraction].view('S22').ravel().astype('U22')
+    formatted[~with_fraction] = np.ascontiguousarray(
+        buffer[~with_fraction, :15]).view('S15').ravel().astype('U15')
+    return formatted
+
+
+def _format_timedelta(values):
+    """Vectorized str(pd.Timedelta): '0 days 00:01:32.345000', '-1 days +23:59:59.500000'"""
+    ns = values.to_numpy(dtype='timedelta64[ns]')
+    valid = ~np.isnat(ns)
+    formatted = np.empty(len(ns), dtype=object)
+    formatted[valid] = _format_valid_timedeltas(ns[valid].astype('int64'))
+    return formatted
+
+
+def _format_valid_timedeltas(ns):
+    days, rest = np.divmod(ns, _NS_PER_DAY)
+    hours, rest = np.divmod(rest, 3600 * 10**9)
+    minutes, rest = np.divmod(rest, 60 * 10**9)
+    seconds, fraction = np.divmod(rest, 10**9)
+
+    # Session times are almost always under a day with millisecond precision,
+    # which can be laid out as fixed-width ASCII without any per-value formatting
+    fast = (days >= 0) & (days <= 9) & (fraction % 1000 == 0)
+    formatted = np.empty(len(ns), dtype=object)
+    formatted[fast] = _format_timedelta_fast(
+        days[fast], hours[fast], minutes[fast], seconds[fast],
+        fraction[fast] // 1000, fraction[fast] != 0)
+
+    slow = ~fast
+    if slow.any():
+        days, hours, minutes = days[slow], hours[slow], minutes[slow]
+        seconds, fraction = seconds[slow], fraction[slow]
+        text = (
+            np.char.mod('%d days ', days).astype(object)
+            + np.where(days < 0, '+', '').astype(object)
+            + np.char.mod('%02d:', hours).astype(object)
+            + np.char.mod('%02d:', minutes).astype(object)
+            + np.char.mod('%02d', seconds).astype(object)
+        )
+        # Like pandas: no fraction when whole seconds, else microseconds, else nanoseconds
+        micro = (fraction % 1000 == 0) & (fraction != 0)
+        nano = fraction % 1000 != 0
+        text[micro] += np.char.mod('.%06d', fraction[micro] // 1000).astype(object)
+        text[nano] += np.char.mod('.%09d', fraction[nano]).astype(object)
+        formatted[slow] = text
+    return formatted
+
+
+def _format_utc(values):
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = values.dt.tz_convert('UTC')
+    elif not pd.api.types.is_datetime64_dtype(values.dtype):
+        # Mixed-offset local times come through as an object column
+        values = pd.to_datetime(values, utc=True)
+    # Naive datetimes are assumed to be UTC already
+    return values.dt.strftime('%Y-%m-%dT%H:%M:%SZ').to_numpy(dtype=object)
+
+
+def _convert(values, kind):
+    """Convert a column to an object array of native Python values (nulls not handled)"""
+    if kind == 'raw':
+        return values.to_numpy(dtype=object)
+    if kind == 'str':
+        return values.astype(str).to_numpy(dtype=object)
+    if kind == 'int':
+        return values.fillna(0).to_numpy().astype('int64').astype(object)
+    if kind == 'float':
+        return values.to_numpy(dtype='float64', na_value=np.nan).astype(object)
+    if kind == 'bool':
+        return values.fillna(False).to_numpy().astype(bool).astype(object)
+    if kind == 'laptime':
+        return _format_laptime(values)
+    if kind == 'timedelta':
+        return _format_timedelta(values)
+    if kind == 'utc':
+        return _format_utc(values)
+    if kind == 'date':
+        return pd.to_datetime(values).dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def serialize_columns(df, columns):
+    """Return {output name: list of values} for the given column specs"""
+    data = {}
+    for column in columns:
+        if column.source in df.columns:
+            values = df[column.source]
+            converted = _convert(values, column.kind)
+            converted[values.isna().to_numpy()] = column.default
+        else:
+            converted = np.full(len(df), column.default, dtype=object)
+        data[column.name] = converted.tolist()
+    return data
+
+
+def serialize_frame(df, columns):
+    """Return the DataFrame as a list of JSON-ready dicts, one per row"""
+    with metrics.stage('serialize'):
+        data = serialize_columns(df, columns)
+        names = list(data)
+        return [dict(zip(names, row)) for row in zip(*data.values())]
+
+
+def dumps(payload):
+    """Encode a payload to JSON bytes"""
+    with metrics.stage('serialize'):
+        return orjson.dumps(payload)
+
+
+def json_response(payload, status=200):
+    """Build a JSON response using the fast encoder"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def cached_json_response(body, etag, last_modified=None, max_age=0):
+    """
+    Build a revalidatable response from already-encoded JSON
+    Answers 304 Not Modified when the client's If-None-Match/If-Modified-Since still match.
+    """
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
@@ -0,0 +1,385 @@
+"""
+In-memory cache of loaded FastF1 sessions
+Keeps parsed Session objects hot per worker so repeated requests skip session.load()
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+import threading
+import logging
+import time
+
+import fastf1
+from fastf1.exceptions import DataNotLoadedError
+import pandas as pd
+
+import metrics
+from upstream import PUBLISHING_WINDOW, EmptyLoad
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_session_bytes(session):
+    """
+    Rough in-memory size of a loaded session
+    Only the loaded DataFrames are counted, which is where nearly all the memory goes
+    """
+    total = 0
+    for name in ('_results', '_laps', '_race_control_messages', '_weather_data',
+                 '_track_status', '_session_status'):
+        frame = getattr(session, name, None)
+        if frame is not None:
+            total += int(frame.memory_usage(index=True, deep=True).sum())
+
+    # Telemetry is large and almost entirely numeric, so a shallow count is close enough
+    for name in ('_car_data', '_pos_data'):
+        for frame in (getattr(session, name, None) or {}).values():
+            total += int(frame.memory_usage(index=True, deep=False).sum())
+
+    return total
+
+
+# Data slices an endpoint can ask for. Results and session info are always loaded.
+SLICES = ('results', 'laps', 'car_data', 'pos_data', 'weather', 'messages')
+
+# Slices that other slices need to be usable
+_SLICE_DEPENDENCIES = {
+    # Deleted lap times are flagged from race control messages
+    'laps': ('messages',),
+    # Per-lap telemetry is sliced using lap timing
+    'car_data': ('laps',),
+    'pos_data': ('laps',),
+}
+
+
+def resolve_slices(data):
+    """Expand requested data slices with everything they depend on"""
+    resolved = {'results'}
+    pending = list(data)
+    while pending:
+        name = pending.pop()
+        if name not in SLICES:
+            raise ValueError(f"Unknown session data slice: {name}")
+        if name not in resolved:
+            resolved.add(name)
+            pending.extend(_SLICE_DEPENDENCIES.get(name, ()))
+    return frozenset(resolved)
+
+
+def has_data(session, name):
+    """Whether a session's `name` frame ('results', 'laps') is loaded and has rows"""
+    try:
+        frame = getattr(session, name)
+    except DataNotLoadedError:
+        return False
+    return frame is not None and len(frame) > 0
+
+
+def _empty(session, slices):
+    """
+    Which core data a past session came back without ('results', 'laps'), or None
+    Until PUBLISHING_WINDOW after its start a session may simply have nothing published
+    yet, which is no upstream failure.
+    """
+    try:
+        if pd.isna(session.date) or session.date + PUBLISHING_WINDOW > pd.Timestamp.utcnow().tz_localize(None):
+            return None
+    except (AttributeError, TypeError):
+        return None
+    for name in ('results', 'laps'):
+        if name in slices and not has_data(session, name):
+            return name
+    return None
+
+
+class SessionLoading(Exception):
+    """The session is still being loaded in the background"""
+
+    def __init__(self, key, status):
+        super().__init__(f"Session {key[0]} round {key[1]} {key[2]} is still loading")
+        self.key = key
+        self.status = status  # 'queued' or 'loading'
+
+
+class _Load:
+    __slots__ = ('slices', 'future', 'submitted', 'started')
+
+    def __init__(self, slices):
+        self.slices = slices
+        self.future = None
+        self.submitted = time.monotonic()
+        self.started = None
+
+
+class _Entry:
+    __slots__ = ('session', 'slices', 'size')
+
+    def __init__(self, session, slices, size):
+        self.session = session
+        self.slices = slices
+        self.size = size
+
+
+class SessionCache:
+    """
+    LRU cache of loaded sessions keyed by (year, round, session_type)
+
+    Callers say which data slices they need and only those are loaded. A cached
+    session that lacks a slice is upgraded by loading a new Session with both its slices
+    and the missing ones (mostly from the FastF1 disk cache), which then replaces the
+    entry: the cached Session is never loaded into while requests read it.
+    Concurrent requests for the same session share a single load: the first caller
+    loads it and everyone else waits on the same future.
+
+    request()/fetch() run loads on a pool of `load_workers` threads instead of the
+    caller's thread, so request threads can give up waiting without cancelling the load.
+
+    An `upstream` guard (upstream.UpstreamGuard) rate-limits loads and may refuse one
+    with UpstreamUnavailable before FastF1 is asked for any data.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=1024 * 1024 * 1024, load_workers=4, upstream=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.load_workers = load_workers
+        self.upstream = upstream
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> _Entry
+        self._inflight = {}  # key -> Future of the load in progress
+        self._bytes = 0
+        self._pool = ThreadPoolExecutor(max_workers=load_workers, thread_name_prefix='session-load')
+        self._pending = {}  # key -> [_Load] submitted to the pool
+        self._failures = {}  # key -> error of the last failed pool load
+
+        self.hits = 0
+        self.misses = 0
+        self.upgrades = 0
+        self.evictions = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(year, round_number, session_type):
+        return (int(year), int(round_number), str(session_type).upper())
+
+    def get(self, year, round_number, session_type, data=SLICES):
+        """
+        Return a session with at least the requested data slices loaded
+        Each slice is loaded at most once across concurrent callers
+        """
+        key = self.make_key(year, round_number, session_type)
+        needed = resolve_slices(data)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and needed <= entry.slices:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.session
+
+                future = self._inflight.get(key)
+                if future is None:
+                    future = Future()
+                    self._inflight[key] = future
+                    if entry is None:
+                        self.misses += 1
+                        cached, loaded = None, frozenset()
+                    else:
+                        self.upgrades += 1
+                        cached, loaded = entry.session, entry.slices
+                    break
+                self.coalesced += 1
+
+            # Someone else is loading this session; wait for it, then check
+            # whether what they loaded covers what we need
+            future.result()
+
+        try:
+            # get_session() fetches the schedule, so a cold load is guarded from the start
+            with self.upstream.fetch(cached) if self.upstream is not None else nullcontext() as fetch:
+                # An upgrade loads into a new Session too: requests are still reading the
+                # cached one, and load() replaces its results and laps as it goes. The
+                # entry is swapped once the new one is complete.
+                started = time.perf_counter()
+                session = fastf1.get_session(year, round_number, session_type)
+                metrics.observe_load('get_session', time.perf_counter() - started)
+                if fetch is not None:
+                    fetch.local(session)
+                started = time.perf_counter()
+                loaded = self._load(session, needed | loaded)
+                metrics.observe_load('load', time.perf_counter() - started)
+                empty = _empty(session, needed)
+                if fetch is not None and empty:
+                    fetch.failed(EmptyLoad(f"{year} round {round_number} {session_type} loaded without {empty}"))
+            size = estimate_session_bytes(session)
+        except BaseException as e:
+            metrics.SESSION_LOAD_ERRORS.inc()
+            with self._lock:
+                self.load_errors += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self.loads += 1
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = _Entry(session, loaded, size)
+            self._bytes += size
+            del self._inflight[key]
+            self._evict()
+        future.set_result(session)
+        return session
+
+    def request(self, year, round_number, session_type, data=SLICES):
+        """
+        Start loading a session on the load pool and return a Future of it
+        Already cached sessions come back as a completed future; a pending load that
+        covers the requested slices is shared instead of queueing another one.
+        """
+        key = self.make_key(year, round_number, session_type)
+        needed = resolve_slices(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and needed <= entry.slices:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(entry.session)
+                return future
+
+            for load in self._pending.get(key, ()):
+                if needed <= load.slices:
+                    self.coalesced += 1
+                    return load.future
+
+            load = _Load(needed)
+            self._pending.setdefault(key, []).append(load)
+            load.future = self._pool.submit(self._run, key, load, year, round_number, session_type)
+        return load.future
+
+    def _run(self, key, load, year, round_number, session_type):
+        load.started = time.monotonic()
+        try:
+            session = self.get(year, round_number, session_type, data=load.slices)
+        except Exception as e:
+            with self._lock:
+                self._failures[key] = str(e)
+            raise
+        finally:
+            with self._lock:
+                pending = self._pending[key]
+                pending.remove(load)
+                if not pending:
+                    del self._pending[key]
+        with self._lock:
+            self._failures.pop(key, None)
+        return session
+
+    def fetch(self, year, round_number, session_type, data=SLICES, timeout=None):
+        """
+        Return a session with the requested slices, loading it on the load pool
+        Waits at most `timeout` seconds (None: as long as it takes), then raises
+        SessionLoading while the load carries on for the next request to pick up.
+        """
+        future = self.request(year, round_number, session_type, data=data)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            if future.done():
+                raise  # the load itself timed out
+            key = self.make_key(year, round_number, session_type)
+            raise SessionLoading(key, 'loading' if future.running() else 'queued')
+
+    def progress(self, year, round_number, session_type):
+        """Where a session is in the load pipeline: queued, loading, ready, failed or not_loaded"""
+        key = self.make_key(year, round_number, session_type)
+        now = time.monotonic()
+        with self._lock:
+            queued = sum(1 for loads in self._pending.values() for load in loads if load.started is None)
+            loads = self._pending.get(key)
+            if loads:
+                started = [load.started for load in loads if load.started is not None]
+                return {
+                    'status': 'loading' if started else 'queued',
+                    'data': sorted(frozenset().union(*(load.slices for load in loads))),
+                    'elapsed_seconds': round(now - min(started or [load.submitted for load in loads]), 1),
+                    'queued_loads': queued,
+                    'load_workers': self.load_workers,
+                }
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                return {'status': 'ready', 'data': sorted(entry.slices)}
+            if key in self._failures:
+                return {'status': 'failed', 'error': self._failures[key]}
+            return {'status': 'not_loaded'}
+
+    def _load(self, session, slices):
+        """Load the slices into a new session and return the slices now loaded"""
+        telemetry = 'car_data' in slices or 'pos_data' in slices
+        logger.info(f"Loading {session.event.year} round {session.event.RoundNumber} "
+                    f"{session.name}: {', '.join(sorted(slices))}")
+        session.load(
+            laps='laps' in slices,
+            telemetry=telemetry,
+            weather='weather' in slices,
+            messages='messages' in slices,
+        )
+        # Car and position data always come in together
+        if telemetry:
+            slices = slices | {'car_data', 'pos_data'}
+        return slices | {'results'}
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the byte budget
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+            logger.info(f"Evicted session {key} from memory ({entry.size / 1e6:.1f} MB)")
+
+    def discard(self, year, round_number, session_type):
+        """Drop a session so the next request loads it again (e.g. data was incomplete)"""
+        key = self.make_key(year, round_number, session_type)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.upgrades
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'upgrades': self.upgrades,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'loads': self.loads,
+                'load_errors': self.load_errors,
+                'coalesced': self.coalesced,
+                'loading': len(self._inflight),
+                'queued': sum(1 for loads in self._pending.values() for load in loads if load.started is None),
+                'load_workers': self.load_workers,
+                'sessions': [
+                    {'year': k[0], 'round': k[1], 'session_type': k[2],
+                     'bytes': entry.size, 'data': sorted(entry.slices)}
+                    for k, entry in self._entries.items()
+                ],
+            }
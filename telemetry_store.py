@@ -0,0 +1,207 @@
+"""
+Columnar, memory-mapped store of session car data
+Each session's car telemetry is kept as one fixed-dtype .npy file per channel plus an
+index of (driver, lap) -> (start, end) offsets, so a lap is a zero-copy slice of the
+mapped arrays instead of a full session load
+"""
+
+from collections import OrderedDict
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from precomputed import normalize_session_type
+
+# Stored channels and their on-disk dtypes, named like FastF1's car data columns.
+# SessionTime is kept as int64 nanoseconds and viewed back as timedelta64[ns].
+CHANNELS = {
+    'SessionTime': 'int64',
+    'Speed': 'float32',
+    'RPM': 'float32',
+    'nGear': 'int8',
+    'Throttle': 'float32',
+    'Brake': 'bool',
+    'DRS': 'int8',
+}
+
+
+def _nanoseconds(values):
+    return values.to_numpy(dtype='timedelta64[ns]').astype('int64')
+
+
+class LapNotFound(LookupError):
+    """The store has the session but not this driver/lap"""
+
+
+class _SessionArrays:
+    __slots__ = ('columns', 'laps', 'drivers', 'fastest')
+
+    def __init__(self, columns, laps, drivers, fastest):
+        self.columns = columns  # channel -> memory-mapped array
+        self.laps = laps  # (driver number, lap number) -> (start, end)
+        self.drivers = drivers  # abbreviation -> driver number
+        self.fastest = fastest  # driver number -> lap number, None if not indexed
+
+
+class TelemetryStore:
+    """
+    Car data laid out under <root>/<year>/<round>/<session_type>/car_data/
+    A bounded number of sessions are kept mapped; the OS page cache does the rest.
+    """
+
+    def __init__(self, root, max_open=32):
+        self.root = root
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._open = OrderedDict()  # directory -> _SessionArrays
+
+    def directory(self, year, round_number, session_type):
+        return os.path.join(self.root, str(int(year)), f'{int(round_number):02d}',
+                            normalize_session_type(session_type), 'car_data')
+
+    def exists(self, year, round_number, session_type):
+        return os.path.exists(os.path.join(self.directory(year, round_number, session_type), 'index.json'))
+
+    def write(self, session, year, round_number, session_type):
+        """Persist a session's car data (needs laps and telemetry loaded); returns the sample count"""
+        arrays = {name: [] for name in CHANNELS}
+        laps_index = {}
+        offset = 0
+
+        laps = session.laps
+        for driver_number, car_data in session.car_data.items():
+            session_time = _nanoseconds(car_data['SessionTime'])
+            order = np.argsort(session_time, kind='stable')
+            session_time = session_time[order]
+            arrays['SessionTime'].append(session_time)
+            for name, dtype in CHANNELS.items():
+                if name != 'SessionTime':
+                    values = car_data[name]
+                    if dtype != 'float32':
+                        values = values.fillna(0)
+                    arrays[name].append(values.to_numpy()[order].astype(dtype))
+
+            # Same bounds as Telemetry.slice_by_lap(): LapStartTime <= SessionTime <= Time
+            driver_laps = laps[laps['DriverNumber'] == driver_number]
+            driver_laps = driver_laps.dropna(subset=['LapNumber', 'LapStartTime', 'Time'])
+            starts = np.searchsorted(session_time, _nanoseconds(driver_laps['LapStartTime']), 'left')
+            ends = np.searchsorted(session_time, _nanoseconds(driver_laps['Time']), 'right')
+            for lap_number, start, end in zip(driver_laps['LapNumber'].to_numpy(), starts, ends):
+                laps_index[f'{driver_number}:{int(lap_number)}'] = [offset + int(start), offset + int(end)]
+
+            offset += len(session_time)
+
+        # Fastest lap per driver, picked like Laps.pick_fastest(): personal bests only
+        fastest = {}
+        if 'IsPersonalBest' in laps.columns:
+            best = laps[laps['IsPersonalBest'].eq(True) & laps['LapTime'].notna()]
+            if len(best):
+                best = best.loc[best.groupby('DriverNumber')['LapTime'].idxmin()]
+                fastest = {str(driver_number): int(lap_number) for driver_number, lap_number
+                           in zip(best['DriverNumber'], best['LapNumber'])}
+
+        drivers = {}
+        if 'Abbreviation' in session.results.columns:
+            drivers = {str(abbr): str(num) for abbr, num in
+                       zip(session.results['Abbreviation'], session.results['DriverNumber'])
+                       if pd.notna(abbr)}
+
+        final_dir = self.directory(year, round_number, session_type)
+        parent = os.path.dirname(final_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.car_data-')
+        try:
+            for name, dtype in CHANNELS.items():
+                parts = arrays[name]
+                column = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), column)
+            with open(os.path.join(tmp_dir, 'index.json'), 'w') as f:
+                json.dump({'samples': offset, 'laps': laps_index, 'drivers': drivers,
+                           'fastest': fastest}, f)
+
+            # Swap the finished directory into place
+            if os.path.exists(final_dir):
+                shutil.rmtree(final_dir)
+            os.replace(tmp_dir, final_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        with self._lock:
+            self._open.pop(final_dir, None)
+        return offset
+
+    def _session(self, year, round_number, session_type):
+        """Return the mapped arrays for a session, or None if it is not stored"""
+        directory = self.directory(year, round_number, session_type)
+        with self._lock:
+            arrays = self._open.get(directory)
+            if arrays is not None:
+                self._open.move_to_end(directory)
+                return arrays
+
+        try:
+            with open(os.path.join(directory, 'index.json')) as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                   for name in CHANNELS}
+        laps = {}
+        for key, bounds in index['laps'].items():
+            driver_number, lap_number = key.rsplit(':', 1)
+            laps[(driver_number, int(lap_number))] = tuple(bounds)
+        arrays = _SessionArrays(columns, laps, index.get('drivers', {}), index.get('fastest'))
+
+        with self._lock:
+            self._open[directory] = arrays
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return arrays
+
+    def clear(self):
+        """Forget mapped sessions (the files stay on disk)"""
+        with self._lock:
+            self._open.clear()
+
+    def get_lap(self, year, round_number, session_type, driver, lap_number):
+        """
+        Return one lap of car data as a DataFrame, or None if the session is not stored
+        `driver` may be a driver number or an abbreviation, like Laps.pick_driver()
+        Raises LapNotFound if the session is stored but the lap is not.
+        """
+        arrays = self._session(year, round_number, session_type)
+        if arrays is None:
+            return None
+
+        driver_number = arrays.drivers.get(str(driver), str(driver))
+        bounds = arrays.laps.get((driver_number, int(lap_number)))
+        if bounds is None:
+            raise LapNotFound(f'Driver {driver} or lap {lap_number} not found.')
+
+        start, end = bounds
+        data = {name: column[start:end] for name, column in arrays.columns.items()}
+        data['SessionTime'] = data['SessionTime'].view('timedelta64[ns]')
+        return pd.DataFrame(data, copy=False)
+
+    def fastest_lap_number(self, year, round_number, session_type, driver):
+        """
+        Return the driver's fastest lap number, or None if the store can't tell
+        (session not stored, or stored before fastest laps were indexed)
+        Raises LapNotFound if the driver has no valid fastest lap.
+        """
+        arrays = self._session(year, round_number, session_type)
+        if arrays is None or arrays.fastest is None:
+            return None
+
+        driver_number = arrays.drivers.get(str(driver), str(driver))
+        lap_number = arrays.fastest.get(driver_number)
+        if lap_number is None:
+            raise LapNotFound(f'No fastest lap found for driver {driver}.')
+        return lap_number
@@ -0,0 +1,333 @@
+"""
+Protection for the upstream F1 data sources
+Two guards keep a crowd refreshing a session that hasn't happened (or hasn't published
+its data) from turning every request into a FastF1 load that goes to the network:
+
+    NegativeCache  per worker, remembers "not available yet" answers per payload for a
+                   TTL that depends on how far the session is from its scheduled start
+    UpstreamGuard  a token bucket and a circuit breaker shared by every worker on the
+                   host: the state lives in one small JSON file updated under a file
+                   lock, so the limit holds for the host however many gunicorn workers
+                   there are
+
+Requests the guards turn away never reach FastF1: a cached negative answer is a 404
+with Retry-After, a throttled or open-circuit fetch a 503 with Retry-After.
+"""
+
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+import logging
+import os
+import threading
+import time
+
+from fastf1.exceptions import RateLimitExceededError
+import orjson
+import requests
+
+from file_lock import lock
+from payloads import PayloadUnavailable
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '.upstream.state'
+
+# What a failing data source looks like from here; anything else (an unknown round, a
+# bad session type) is the request's fault and must not count towards opening the circuit
+UPSTREAM_ERRORS = (requests.RequestException, ConnectionError, TimeoutError, RateLimitExceededError)
+
+# Right after a session starts its data is on the way, so check again soon
+PUBLISHING_WINDOW = timedelta(hours=6)
+# A few days after the session, whatever is missing is unlikely to appear
+RECENT_WINDOW = timedelta(days=3)
+
+
+class NotAvailableYet(PayloadUnavailable):
+    """A payload recently found missing, answered from the negative cache"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EmptyLoad(Exception):
+    """A past session came back without its data: FastF1 logs most upstream errors
+    inside Session.load() and returns what it has, so this is how they show"""
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream fetch was suppressed by the rate limiter or the open circuit"""
+
+    def __init__(self, reason, retry_after):
+        messages = {
+            'rate_limited': 'Too many upstream data requests right now, try again shortly.',
+            'circuit_open': 'The F1 data source is failing, try again shortly.',
+        }
+        super().__init__(messages[reason])
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def negative_ttl(start, now, min_ttl=30, max_ttl=3600):
+    """
+    Seconds to remember that a session's payload is missing
+    Returns: a quarter of the time left before a future session (so the answer runs out
+    as the start approaches), `min_ttl` while the session runs and its data is being
+    published, 5 minutes for the following days and `max_ttl` after that or for
+    sessions the schedule doesn't list.
+    """
+    if start is None:
+        return max_ttl
+    until = (start - now).total_seconds()
+    if until > 0:
+        return int(min(max_ttl, max(min_ttl, until / 4)))
+    if now - start < PUBLISHING_WINDOW:
+        return min_ttl
+    if now - start < RECENT_WINDOW:
+        return min(max_ttl, max(min_ttl, 300))
+    return max_ttl
+
+
+class NegativeCache:
+    """"Not available yet" answers by (payload, year, round, session_type), until they expire"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (message, expires_at)
+        self.hits = 0
+        self.added = 0
+
+    def check(self, key):
+        """Raise NotAvailableYet if the payload was found missing within its TTL"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            message, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return
+            self.hits += 1
+        raise NotAvailableYet(message, max(1, int(expires_at - now)))
+
+    def add(self, key, message, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop what has expired, then the entries closest to expiring
+                for stale in sorted(self._entries, key=lambda k: self._entries[k][1])[:len(self._entries) // 4 + 1]:
+                    del self._entries[stale]
+            self._entries[key] = (message, now + ttl)
+            self.added += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'entries': sum(1 for _, expires_at in self._entries.values() if expires_at > now),
+                'hits': self.hits,
+                'added': self.added,
+            }
+
+
+class UpstreamGuard:
+    """
+    Host-wide rate limit and circuit breaker for FastF1 loads that go to the network
+
+    Every guarded load takes a token from a bucket refilled at `rate_per_minute` and
+    holding at most `burst`. `failure_threshold` upstream errors in a row open the
+    circuit for `cooldown` seconds; after that one load is let through as a probe (the
+    circuit stays open for everyone else until it reports back) and its success closes
+    the circuit again. Loads that `is_local(session)` says FastF1 serves from its disk
+    cache are not guarded. Besides network errors, a load of a past session that came
+    back without results or laps (EmptyLoad) counts as a failure, since FastF1 swallows
+    most upstream errors inside Session.load().
+    """
+
+    def __init__(self, root, rate_per_minute=30, burst=10, failure_threshold=5, cooldown=60, is_local=None):
+        self.path = os.path.join(root, STATE_FILE)
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.is_local = is_local
+
+        # This worker's counters; the shared state is in the file
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.failures = 0
+        self.trips = 0
+        self.suppressed = {'rate_limited': 0, 'circuit_open': 0}
+
+    @contextmanager
+    def _shared(self):
+        # Opened per use: a descriptor inherited across fork would share its flock with
+        # the parent, so workers forked from a preloading master must not reuse one
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            lock(fd)
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                state = orjson.loads(os.read(fd, 4096) or b'{}')
+            except orjson.JSONDecodeError:
+                state = {}
+            state = {'tokens': self.burst, 'updated': time.time(), 'failures': 0, 'open_until': 0, **state}
+            before = dict(state)
+            yield state
+            if state != before:
+                data = orjson.dumps(state)
+                os.ftruncate(fd, 0)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def _suppress(self, reason, retry_after):
+        with self._lock:
+            self.suppressed[reason] += 1
+        raise UpstreamUnavailable(reason, retry_after)
+
+    def acquire(self):
+        """
+        Take a token for one upstream load; raises UpstreamUnavailable if there is none
+        Returns: whether this load is the probe of a half-open circuit
+        """
+        with self._shared() as state:
+            now = time.time()
+            if state['open_until'] > now:
+                self._suppress('circuit_open', state['open_until'] - now)
+
+            tokens = min(self.burst, state['tokens'] + (now - state['updated']) * self.rate)
+            if tokens < 1:
+                self._suppress('rate_limited', (1 - tokens) / self.rate)
+            state['tokens'], state['updated'] = tokens - 1, now
+
+            probe = bool(state['open_until'])
+            if probe:
+                # Cool-down is over: this load probes, everyone else still fails fast
+                state['open_until'] = now + self.cooldown
+                logger.info("Upstream circuit half-open, probing with one load")
+        with self._lock:
+            self.fetches += 1
+        return probe
+
+    def success(self):
+        with self._shared() as state:
+            if state['open_until']:
+                logger.info("Upstream circuit closed")
+            state['failures'], state['open_until'] = 0, 0
+
+    def failure(self, error):
+        with self._lock:
+            self.failures += 1
+        with self._shared() as state:
+            state['failures'] += 1
+            if state['failures'] >= self.failure_threshold:
+                if not state['open_until']:
+                    logger.warning(f"Upstream circuit opened for {self.cooldown}s after "
+                                   f"{state['failures']} failed loads: {str(error)}")
+                    with self._lock:
+                        self.trips += 1
+                state['open_until'] = time.time() + self.cooldown
+
+    def release(self, probe):
+        """Hand back the token of a load that turned out not to go upstream"""
+        with self._shared() as state:
+            state['tokens'] = min(self.burst, state['tokens'] + 1)
+            if probe:
+                # Not a probe after all; let the next load probe instead
+                state['open_until'] = min(state['open_until'], time.time())
+        with self._lock:
+            self.fetches -= 1
+
+    @contextmanager
+    def _fetch(self):
+        fetch = _Fetch(self, self.acquire())
+        try:
+            yield fetch
+        except UPSTREAM_ERRORS as e:
+            if fetch.guarded:
+                self.failure(e)
+            raise
+        except Exception:
+            if fetch.guarded and fetch.probe:
+                # Says nothing about the data source; let the next load probe instead
+                with self._shared() as state:
+                    state['open_until'] = min(state['open_until'], time.time())
+            raise
+        if not fetch.guarded:
+            return
+        if fetch.error is not None:
+            self.failure(fetch.error)
+        else:
+            self.success()
+
+    def fetch(self, session=None):
+        """
+        Context manager around one session load: rate limited and recorded unless local
+        Without a session (a cold load, where fastf1.get_session() itself fetches the
+        schedule) the token is taken up front; call local(session) on the yielded
+        _Fetch once the session exists to hand it back if the session is served from
+        disk, and failed(error) if the load returned without its data.
+        """
+        if session is not None and self.is_local is not None and self.is_local(session):
+            return nullcontext(_Fetch(self, False, guarded=False))
+        return self._fetch()
+
+    def stats(self):
+        with self._shared() as state:
+            now = time.time()
+            tokens = min(self.burst, state['tokens'] + (now - state['updated']) * self.rate)
+            if state['open_until'] > now:
+                circuit = 'open'
+            elif state['open_until']:
+                circuit = 'half_open'
+            else:
+                circuit = 'closed'
+            shared = {'circuit': circuit, 'consecutive_failures': state['failures'], 'tokens': round(tokens, 2)}
+        with self._lock:
+            return {
+                **shared,
+                'rate_per_minute': self.rate * 60,
+                'burst': self.burst,
+                'fetches': self.fetches,
+                'failures': self.failures,
+                'trips': self.trips,
+                'suppressed': dict(self.suppressed),
+            }
+
+
+class _Fetch:
+    """One load inside UpstreamGuard.fetch()"""
+    __slots__ = ('guard', 'probe', 'guarded', 'error')
+
+    def __init__(self, guard, probe, guarded=True):
+        self.guard = guard
+        self.probe = probe
+        self.guarded = guarded
+        self.error = None
+
+    def local(self, session):
+        """Stop guarding the load if `session` is served from the disk cache"""
+        if self.guarded and self.guard.is_local is not None and self.guard.is_local(session):
+            self.guard.release(self.probe)
+            self.guarded = False
+
+    def failed(self, error):
+        """Count a load that returned normally but without its data as a failure"""
+        self.error = error
+
+
+def options_from_env():
+    return {
+        'rate_per_minute': float(os.environ.get('UPSTREAM_RATE_PER_MINUTE', 30)),
+        'burst': int(os.environ.get('UPSTREAM_BURST', 10)),
+        'failure_threshold': int(os.environ.get('UPSTREAM_FAILURE_THRESHOLD', 5)),
+        'cooldown': int(os.environ.get('UPSTREAM_COOLDOWN_SECONDS', 60)),
+    }